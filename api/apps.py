@@ -6,3 +6,8 @@ class ApiConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        """Connect the catalog cache invalidation signals"""
+        # pylint: disable=import-outside-toplevel,unused-import
+        from api import signals  # noqa: F401
@@ -0,0 +1,244 @@
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.media import signing_window_start
+
+DEFAULT_CATALOG_CACHE = {
+    "BACKEND": "api.cache.LocalLRUBackend",
+    "OPTIONS": {"max_bytes": 32 * 1024 * 1024},
+    "TIMEOUT": 60,
+}
+
+
+class LocalLRUBackend:
+    """In-process LRU cache bounded by the pickled size of its entries
+
+    Suitable for a single node. The version counter lives in the process:
+    the worker that handles a catalog change invalidates its entries right
+    away, the other workers serve theirs until the timeout expires.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, **_: Any) -> None:
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[str, tuple[Optional[float], bytes]]" = OrderedDict()
+        self._version = 1
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the entry for key and mark it as recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires is not None and expires <= time.monotonic():
+                del self._entries[key]
+                self.current_bytes -= len(value)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, timeout: Optional[int] = None) -> None:
+        """Store an entry, evicting the least recently used ones to make room"""
+        if len(value) > self.max_bytes:
+            return
+        expires = time.monotonic() + timeout if timeout is not None else None
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= len(previous[1])
+            self._entries[key] = (expires, value)
+            self.current_bytes += len(value)
+            while self.current_bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.current_bytes -= len(evicted)
+
+    def get_version(self) -> int:
+        """Return the current catalog version"""
+        return self._version
+
+    def bump_version(self) -> None:
+        """Invalidate every entry by moving to a new version"""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def clear(self) -> None:
+        """Drop every entry"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return the size of the cache"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class SharedBackend:
+    """Cache stored in one of the `CACHES` aliases (Redis, Memcached...)
+
+    Suitable for several nodes: entries and the version counter are shared,
+    so a change on any node invalidates the catalog everywhere. Stale
+    versions are left to expire through the cache timeout.
+    """
+
+    version_key = "catalog:version"
+
+    def __init__(self, alias: str = "default", **_: Any) -> None:
+        self.cache = caches[alias]
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the entry for key"""
+        return self.cache.get(key)
+
+    def set(self, key: str, value: bytes, timeout: Optional[int] = None) -> None:
+        """Store an entry"""
+        self.cache.set(key, value, timeout)
+
+    def get_version(self) -> int:
+        """Return the current catalog version"""
+        version = self.cache.get(self.version_key)
+        if version is None:
+            self.cache.add(self.version_key, 1, None)
+            version = self.cache.get(self.version_key, 1)
+        return version
+
+    def bump_version(self) -> None:
+        """Invalidate every entry by moving to a new version"""
+        try:
+            self.cache.incr(self.version_key)
+        except ValueError:
+            self.cache.add(self.version_key, 2, None)
+
+    def clear(self) -> None:
+        """Drop the version counter, orphaning every entry"""
+        self.cache.delete(self.version_key)
+
+    def stats(self) -> dict[str, int]:
+        """Return the size of the cache (unknown for shared backends)"""
+        return {}
+
+
+class CatalogCache:
+    """Versioned cache for serialized catalog responses"""
+
+    def __init__(self) -> None:
+        self._backend: Optional[Any] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def config(self) -> dict[str, Any]:
+        """Return the cache configuration from the settings"""
+        return getattr(settings, "CATALOG_CACHE", DEFAULT_CATALOG_CACHE)
+
+    @property
+    def backend(self) -> Any:
+        """Return the configured backend, building it on first use"""
+        if self._backend is None:
+            backend_class = import_string(self.config["BACKEND"])
+            self._backend = backend_class(**self.config.get("OPTIONS", {}))
+        return self._backend
+
+    def make_key(self, request: Request, scope: str) -> str:
+        """Build a key unique to the catalog version, user, view and filters
+
+        Bodies with signed media URLs are also keyed by their signing window,
+        so none is served once its URLs expire.
+        """
+        url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+        version = self.backend.get_version()
+        window = signing_window_start() or ""
+        return f"catalog:{version}:{request.user.pk}:{scope}:{window}:{url}"
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached data for key, recording a hit or a miss"""
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return pickle.loads(value)
+
+    def set(self, key: str, data: Any) -> None:
+        """Store data for key"""
+        value = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        self.backend.set(key, value, self.config.get("TIMEOUT"))
+
+    def invalidate(self) -> None:
+        """Invalidate the whole catalog"""
+        self.backend.bump_version()
+
+    def reset(self) -> None:
+        """Drop every entry, the configured backend and the counters"""
+        if self._backend is not None:
+            self._backend.clear()
+        self._backend = None
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters along with the backend statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "version": self.backend.get_version(),
+            **self.backend.stats(),
+        }
+
+
+catalog_cache = CatalogCache()
+
+
+class CachedResponseMixin:
+    """Serve responses of a view from the catalog cache"""
+
+    def cached_response(self, handler: Any, request: Request, *args, **kwargs):
+        """Return the cached response for the request or build and cache it"""
+        key = catalog_cache.make_key(request, f"{self.basename}-{self.action}")
+        data = catalog_cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            catalog_cache.set(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class CachedListMixin(CachedResponseMixin):
+    """Cache the list action, to be placed before `ListModelMixin`"""
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """List objects, using the catalog cache"""
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CachedResponseMixin):
+    """Cache the retrieve action, to be placed before `RetrieveModelMixin`"""
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Retrieve an object, using the catalog cache"""
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
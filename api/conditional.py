@@ -0,0 +1,103 @@
+import hashlib
+from typing import Any, Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.media import signing_window_start
+
+
+class ConditionalGetMixin:
+    """Answer GET requests with 304 when the client copy is still current
+
+    Validators are computed from an aggregate over the queryset instead of
+    the response body, so unchanged data is neither serialized nor sent.
+    With signed media URLs, the bodies also change with the signing window:
+    a client can't keep URLs past their expiry by revalidating.
+    """
+
+    last_modified_field = "updated_date"
+
+    def get_validators(
+        self, queryset: Any, send_last_modified: bool
+    ) -> tuple[str, Optional[int]]:
+        """Return a weak ETag and the Last-Modified timestamp for a queryset"""
+        stats = queryset.order_by().aggregate(
+            last_modified=Max(self.last_modified_field), count=Count("pk")
+        )
+        last_modified = stats["last_modified"]
+        window_start = signing_window_start()
+        request = self.request
+        fingerprint = ":".join(
+            (
+                str(request.user.pk),
+                request.accepted_renderer.format,
+                request.get_full_path(),
+                last_modified.isoformat() if last_modified else "",
+                str(stats["count"]),
+                str(window_start or ""),
+            )
+        )
+        etag = f'W/"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+        if not send_last_modified or last_modified is None:
+            return etag, None
+        return etag, max(int(last_modified.timestamp()), window_start or 0)
+
+    def conditional_response(
+        self,
+        handler: Any,
+        queryset: Any,
+        send_last_modified: bool,
+        request: Request,
+        *args: Any,
+        **kwargs: Any,
+    ) -> HttpResponseBase:
+        """Return 304 if the validators match, or the handler's response"""
+        etag, last_modified = self.get_validators(queryset, send_last_modified)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+
+class ConditionalListMixin(ConditionalGetMixin):
+    """Conditional list action, to be placed before `ListModelMixin`"""
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """List objects unless the client copy is still current"""
+        queryset = self.filter_queryset(self.get_queryset())
+        # Deleting a row doesn't move the newest modification date of a list,
+        # only the ETag (which includes the row count) can detect it.
+        return self.conditional_response(
+            super().list, queryset, False, request, *args, **kwargs
+        )
+
+
+class ConditionalRetrieveMixin(ConditionalGetMixin):
+    """Conditional retrieve action, to be placed before `RetrieveModelMixin`"""
+
+    def retrieve(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """Retrieve an object unless the client copy is still current"""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError) as exc:
+            # Like get_object_or_404, a malformed lookup value is not found
+            raise Http404 from exc
+        return self.conditional_response(
+            super().retrieve, queryset, True, request, *args, **kwargs
+        )
@@ -0,0 +1,94 @@
+import csv
+import itertools
+from typing import Any, Iterator
+
+from django.db.models import QuerySet
+from rest_framework.utils.encoders import JSONEncoder
+
+ORDER_FIELDS = (
+    "id",
+    "tracking_number",
+    "order_status",
+    "payment_mode",
+    "order_total",
+    "is_paid",
+    "order_date",
+    "updated_date",
+    "shipped_date",
+)
+ORDER_ITEM_FIELDS = (
+    "id",
+    "product",
+    "quantity",
+    "item_price",
+    "discount",
+    "total_price",
+)
+CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """File-like object that returns what is written, for csv.writer"""
+
+    def write(self, value: str) -> str:  # pylint: disable=no-self-use
+        """Return the value instead of buffering it"""
+        return value
+
+
+def _order_rows(queryset: QuerySet) -> Iterator[tuple]:
+    """Return one (order..., item...) row per order item, in order id order
+
+    Orders and items are read through a single LEFT JOIN with a chunked
+    (server-side on PostgreSQL) cursor, so memory doesn't grow with history.
+    Orders without items yield a single row whose item columns are None.
+    """
+    columns = ORDER_FIELDS + tuple(
+        f"order_items__{field}" for field in ORDER_ITEM_FIELDS
+    )
+    return (
+        queryset.order_by("id", "order_items__id")
+        .values_list(*columns)
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+
+def _csv_value(value: Any) -> Any:
+    """Format a value for CSV"""
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def stream_ndjson(queryset: QuerySet) -> Iterator[str]:
+    """Yield one JSON document per order with its items nested"""
+    encoder = JSONEncoder()
+    split = len(ORDER_FIELDS)
+    for order, rows in itertools.groupby(
+        _order_rows(queryset), key=lambda row: row[:split]
+    ):
+        data: dict[str, Any] = dict(zip(ORDER_FIELDS, order))
+        data["order_items"] = [
+            dict(zip(ORDER_ITEM_FIELDS, row[split:]))
+            for row in rows
+            if row[split] is not None
+        ]
+        yield encoder.encode(data) + "\n"
+
+
+def stream_csv(queryset: QuerySet) -> Iterator[str]:
+    """Yield a CSV header and one line per order item"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(
+        [f"order_{field}" for field in ORDER_FIELDS]
+        + [f"item_{field}" for field in ORDER_ITEM_FIELDS]
+    )
+    for row in _order_rows(queryset):
+        yield writer.writerow([_csv_value(value) for value in row])
+
+
+EXPORT_FORMATS = {
+    "ndjson": (stream_ndjson, "application/x-ndjson"),
+    "csv": (stream_csv, "text/csv"),
+}
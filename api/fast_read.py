@@ -0,0 +1,265 @@
+import decimal
+import functools
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any, Callable, Optional, Sequence
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, FileField, Model
+from rest_framework import fields as drf_fields
+from rest_framework import relations, serializers
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from core.instrumentation import timed
+
+DEFAULT_FAST_READ = {
+    # Serve the list actions of the viewsets using FastReadListMixin from
+    # values_list() rows when their serializer supports it
+    "ENABLED": True,
+}
+
+# Fields whose representation of a database value is the value itself
+IDENTITY_FIELDS = (
+    drf_fields.IntegerField,
+    drf_fields.CharField,
+    drf_fields.BooleanField,
+    relations.PrimaryKeyRelatedField,
+)
+# Getter of a field: (row, object of the method fields, loaded relations)
+Getter = Callable[[tuple, Any, dict], Any]
+
+
+def fast_read_settings() -> dict[str, Any]:
+    """Return the fast read settings merged over the defaults"""
+    return {**DEFAULT_FAST_READ, **getattr(settings, "FAST_READ", {})}
+
+
+class Unsupported(Exception):
+    """A field of the serializer can't be read from values"""
+
+
+def _converter(field: drf_fields.Field) -> Optional[Callable[[Any], Any]]:
+    """Return the conversion of a non null database value, None for identity"""
+    if type(field) in IDENTITY_FIELDS:
+        return None
+    if type(field) is drf_fields.DecimalField:
+        coerce = getattr(field, "coerce_to_string", None)
+        if coerce is None:
+            coerce = drf_fields.api_settings.COERCE_DECIMAL_TO_STRING
+        if not coerce and field.decimal_places is not None:
+            # DecimalField.quantize, with its arguments computed once
+            context = decimal.getcontext().copy()
+            if field.max_digits is not None:
+                context.prec = field.max_digits
+            exponent = decimal.Decimal(".1") ** field.decimal_places
+            return functools.partial(
+                decimal.Decimal.quantize,
+                exp=exponent,
+                rounding=field.rounding,
+                context=context,
+            )
+    return field.to_representation
+
+
+def _model_field(model: type[Model], field: drf_fields.Field) -> Any:
+    """Return the model field read by a serializer field"""
+    if len(field.source_attrs) != 1:
+        raise Unsupported(field.field_name)
+    try:
+        return model._meta.get_field(field.source)  # pylint: disable=protected-access
+    except FieldDoesNotExist as exc:
+        raise Unsupported(field.field_name) from exc
+
+
+class ValuesPlan:
+    """Read path of a model serializer over values_list() rows
+
+    The representation of each field is compiled once into a getter of the
+    row tuple, and relations are loaded in bulk for all the rows, so rows
+    are serialized without model instances nor the per field machinery of
+    `Serializer.to_representation`. The output is the serializer's.
+    """
+
+    def __init__(self, serializer: serializers.ModelSerializer) -> None:
+        self.model = serializer.Meta.model
+        self.meta = self.model._meta  # pylint: disable=protected-access
+        self.columns: list[str] = [self.meta.pk.name]
+        self.getters: list[tuple[str, Getter]] = []
+        # Loaders of relations: name -> (rows, pks) -> values by key
+        self.loaders: dict[str, Callable[[Sequence[tuple], list], dict]] = {}
+        # Attributes of the object passed to method fields: name -> (index, wrap)
+        self.attributes: dict[str, tuple[int, Optional[Callable]]] = {}
+        sources = getattr(serializer.Meta, "field_sources", {})
+        for name, field in serializer.fields.items():
+            if not field.write_only:
+                self.getters.append((name, self._compile(serializer, field, sources)))
+
+    def column(self, name: str) -> int:
+        """Return the index of a column in the rows, adding it if needed"""
+        if name not in self.columns:
+            self.columns.append(name)
+        return self.columns.index(name)
+
+    def _compile(self, serializer: Any, field: Any, sources: dict) -> Getter:
+        """Return the getter of a field"""
+        name = field.field_name
+        if isinstance(field, drf_fields.SerializerMethodField):
+            if name not in sources:
+                raise Unsupported(name)
+            for source in sources[name]:
+                model_field = self.meta.get_field(source)
+                wrap = None
+                if isinstance(model_field, FileField):
+                    wrap = functools.partial(model_field.attr_class, None, model_field)
+                self.attributes[source] = (self.column(source), wrap)
+            method = getattr(serializer, field.method_name)
+            return lambda row, obj, loaded: method(obj)
+
+        if isinstance(field, (relations.ManyRelatedField, serializers.ListSerializer)):
+            return self._compile_many(field)
+        if isinstance(field, serializers.ModelSerializer):
+            return self._compile_one(field)
+        if isinstance(field, (serializers.BaseSerializer, relations.RelatedField)):
+            if type(field) is not relations.PrimaryKeyRelatedField or field.pk_field:
+                raise Unsupported(name)
+
+        model_field = _model_field(self.model, field)
+        if not model_field.concrete or model_field.many_to_many:
+            raise Unsupported(name)
+        index = self.column(model_field.name)
+        convert = _converter(field)
+        if convert is None:
+            return lambda row, obj, loaded: row[index]
+        return lambda row, obj, loaded: (
+            None if row[index] is None else convert(row[index])
+        )
+
+    def _compile_many(self, field: Any) -> Getter:
+        """Return the getter of a many relation, loaded in bulk"""
+        name = field.field_name
+        model_field = _model_field(self.model, field)
+        if model_field.many_to_many and not model_field.auto_created:
+            lookup = model_field.related_query_name()
+        elif model_field.one_to_many:
+            lookup = model_field.field.name
+        else:
+            raise Unsupported(name)
+        manager = model_field.related_model._default_manager
+
+        def related(pks: list) -> Any:
+            # Filtered before annotating to join the relation once
+            return manager.filter(**{f"{lookup}__in": pks}).annotate(_parent=F(lookup))
+
+        if isinstance(field, serializers.ListSerializer):
+            plan = compile_plan(field.child)
+            if plan is None:
+                raise Unsupported(name)
+
+            def load(rows: Sequence[tuple], pks: list) -> dict:
+                # pylint: disable=unused-argument
+                children = list(related(pks).values_list(*plan.columns, "_parent"))
+                grouped = defaultdict(list)
+                for child, data in zip(children, plan.serialize(children)):
+                    grouped[child[-1]].append(data)
+                return grouped
+
+        else:
+            represent = field.child_relation.to_representation
+
+            def load(rows: Sequence[tuple], pks: list) -> dict:
+                # pylint: disable=unused-argument
+                grouped = defaultdict(list)
+                for obj in related(pks):
+                    grouped[obj._parent].append(  # pylint: disable=protected-access
+                        represent(obj)
+                    )
+                return grouped
+
+        self.loaders[name] = load
+        return lambda row, obj, loaded: loaded[name].get(row[0], [])
+
+    def _compile_one(self, field: Any) -> Getter:
+        """Return the getter of a nested object of a foreign key"""
+        name = field.field_name
+        model_field = _model_field(self.model, field)
+        if not model_field.many_to_one:
+            raise Unsupported(name)
+        plan = compile_plan(field)
+        if plan is None:
+            raise Unsupported(name)
+        index = self.column(model_field.name)
+        manager = model_field.related_model._default_manager
+
+        def load(rows: Sequence[tuple], pks: list) -> dict:
+            keys = {row[index] for row in rows if row[index] is not None}
+            children = list(manager.filter(pk__in=keys).values_list(*plan.columns))
+            return {
+                child[0]: data
+                for child, data in zip(children, plan.serialize(children))
+            }
+
+        self.loaders[name] = load
+        return lambda row, obj, loaded: (
+            None if row[index] is None else loaded[name][row[index]]
+        )
+
+    def _object(self, row: tuple) -> SimpleNamespace:
+        """Return the attributes read by the method fields of a row"""
+        return SimpleNamespace(
+            **{
+                attribute: row[index] if wrap is None else wrap(row[index])
+                for attribute, (index, wrap) in self.attributes.items()
+            }
+        )
+
+    def serialize(self, rows: Sequence[tuple]) -> list[dict]:
+        """Return the representation of rows of `columns`"""
+        with timed("serialize"):
+            pks = [row[0] for row in rows]
+            loaded = {name: load(rows, pks) for name, load in self.loaders.items()}
+            getters = self.getters
+            make_object = self._object if self.attributes else None
+            data = []
+            for row in rows:
+                obj = make_object(row) if make_object else None
+                data.append({name: get(row, obj, loaded) for name, get in getters})
+            return data
+
+
+def compile_plan(serializer: Any) -> Optional[ValuesPlan]:
+    """Return the values read path of a serializer, None if unsupported"""
+    if not isinstance(serializer, serializers.ModelSerializer):
+        return None
+    try:
+        return ValuesPlan(serializer)
+    except Unsupported:
+        return None
+
+
+class FastReadListMixin:
+    """List action reading values_list() rows instead of model instances
+
+    To be placed right before `ListModelMixin`. Serializers with fields the
+    read path doesn't support are listed as usual.
+    """
+
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """List objects from values when the serializer allows it"""
+        plan = None
+        if fast_read_settings()["ENABLED"]:
+            plan = compile_plan(self.get_serializer())
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        # The paginator reads the ordering fields of the boundary rows
+        for field in getattr(self.paginator, "ordering", ()):
+            plan.column(field.lstrip("-"))
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.select_related(None).prefetch_related(None)
+        rows = rows.values_list(*plan.columns, named=True)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(plan.serialize(page))
+        return Response(plan.serialize(list(rows)))
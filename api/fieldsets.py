@@ -0,0 +1,53 @@
+from typing import Any, Optional
+
+from django.db.models import QuerySet
+from rest_framework.permissions import SAFE_METHODS
+
+
+def _paths(value: Optional[str]) -> Optional[set[str]]:
+    """Return the comma separated field paths of a query parameter"""
+    if value is None:
+        return None
+    return {path.strip() for path in value.split(",") if path.strip()}
+
+
+class SparseFieldsetMixin:
+    """Select fields with ?fields= and expand relations with ?expand=
+
+    Both take comma separated, possibly dotted, field names of the viewset's
+    serializer (see `api.serializers.SparseFieldsMixin`). The queryset is
+    narrowed to the columns and prefetches of the selection. Unsafe requests
+    ignore them, their serializers validate every field.
+    """
+
+    fields_query_param = "fields"
+    expand_query_param = "expand"
+
+    def get_field_selection(self) -> dict[str, set[str]]:
+        """Return the fields and expand arguments of the serializer"""
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return {}
+        selection = {
+            "fields": _paths(request.query_params.get(self.fields_query_param)),
+            "expand": _paths(request.query_params.get(self.expand_query_param)),
+        }
+        return {name: paths for name, paths in selection.items() if paths is not None}
+
+    def get_serializer(self, *args: Any, **kwargs: Any) -> Any:
+        """Return the serializer of the selected fields"""
+        return super().get_serializer(*args, **self.get_field_selection(), **kwargs)
+
+    def filter_queryset(self, queryset: QuerySet) -> QuerySet:
+        """Narrow the queryset to what the selected fields read"""
+        queryset = super().filter_queryset(queryset)
+        selection = self.get_field_selection()
+        if not selection:
+            return queryset
+        serializer = self.get_serializer_class()(
+            context=self.get_serializer_context(), **selection
+        )
+        ordering = getattr(self.paginator, "ordering", ())
+        return serializer.narrow_queryset(
+            queryset, [field.lstrip("-") for field in ordering]
+        )
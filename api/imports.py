@@ -0,0 +1,207 @@
+import itertools
+import json
+import logging
+import shutil
+import tempfile
+from typing import IO, Any, Callable, Iterable, Iterator, Optional
+
+from django.db import DatabaseError, transaction
+
+from core.models import Orders, OrderItem, Products
+from api.serializers import OrderImportSerializer
+
+IMPORT_CHUNK_SIZE = 1000
+# Bodies kept in memory up to this size while spooled, on disk past it
+IMPORT_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+SAVE_ERROR = {"non_field_errors": ["The order could not be saved."]}
+
+logger = logging.getLogger(__name__)
+
+
+def _error(line: int, errors: Any) -> dict[str, Any]:
+    """Return the result of a rejected record"""
+    return {"line": line, "status": "error", "errors": errors}
+
+
+def _build_item(
+    order: Orders, product: Products, item: dict, calculate_total: Callable[..., Any]
+) -> OrderItem:
+    """Return a priced, unsaved item of an order"""
+    return OrderItem(
+        order=order,
+        product=product,
+        quantity=item["quantity"],
+        item_price=product.price,
+        discount=product.discount,
+        total_price=calculate_total(product.price, product.discount, item["quantity"]),
+    )
+
+
+def _save_orders(orders: list[tuple[int, Orders, list[OrderItem]]]) -> None:
+    """Write orders and their items with one `bulk_create` each"""
+    with transaction.atomic():
+        Orders.objects.bulk_create([order for _, order, _ in orders])
+        OrderItem.objects.bulk_create(
+            [item for _, _, items in orders for item in items]
+        )
+
+
+def _save_orders_one_by_one(
+    orders: list[tuple[int, Orders, list[OrderItem]]], results: dict[int, dict]
+) -> list[tuple[int, Orders, list[OrderItem]]]:
+    """Write orders in their own transaction, recording those that fail"""
+    saved = []
+    for line, order, items in orders:
+        # Undo what the failed bulk write assigned
+        order.pk = None
+        order._state.adding = True  # pylint: disable=protected-access
+        try:
+            with transaction.atomic():
+                order.save()
+                for item in items:
+                    item.pk = None
+                    item.order = order
+                OrderItem.objects.bulk_create(items)
+        except DatabaseError:
+            logger.warning("Imported order on line %s not saved", line, exc_info=True)
+            results[line] = _error(line, SAVE_ERROR)
+            continue
+        saved.append((line, order, items))
+    return saved
+
+
+def _parse_chunk(
+    chunk: Iterable[tuple[int, bytes]], results: dict[int, dict]
+) -> list[tuple[int, dict]]:
+    """Decode and validate the records of a chunk, recording failures"""
+    valid = []
+    for line, raw in chunk:
+        if not raw.strip():
+            continue
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            results[line] = _error(line, {"non_field_errors": ["Invalid JSON."]})
+            continue
+        serializer = OrderImportSerializer(data=data)
+        if not serializer.is_valid():
+            results[line] = _error(line, serializer.errors)
+            continue
+        valid.append((line, serializer.validated_data))
+    return valid
+
+
+def _import_chunk(
+    chunk: Iterable[tuple[int, bytes]],
+    user: Any,
+    calculate_total: Callable[..., Any],
+) -> list[dict[str, Any]]:
+    """Validate, price and save the orders of a chunk
+
+    Products and existing tracking numbers are looked up with one query each
+    for the whole chunk, and orders and items are written with one
+    `bulk_create` each in a single transaction. If that write fails (e.g. a
+    tracking number taken concurrently), the orders are saved one by one so
+    only the failing ones are rejected.
+    """
+    results: dict[int, dict] = {}
+    valid = _parse_chunk(chunk, results)
+
+    product_ids = {item["product"] for _, data in valid for item in data["order_items"]}
+    products = Products.objects.in_bulk(product_ids)
+    tracking_numbers = {
+        data["tracking_number"] for _, data in valid if "tracking_number" in data
+    }
+    taken = set(
+        Orders.objects.filter(tracking_number__in=tracking_numbers).values_list(
+            "tracking_number", flat=True
+        )
+    )
+
+    orders: list[tuple[int, Orders, list[OrderItem]]] = []
+    for line, data in valid:
+        missing = sorted(
+            {item["product"] for item in data["order_items"]} - products.keys()
+        )
+        if missing:
+            results[line] = _error(
+                line, {"order_items": [f"Invalid product id {pk}." for pk in missing]}
+            )
+            continue
+        tracking_number = data.get("tracking_number")
+        if tracking_number in taken:
+            results[line] = _error(
+                line, {"tracking_number": ["Order with this tracking number exists."]}
+            )
+            continue
+        if tracking_number:
+            taken.add(tracking_number)
+
+        items = data.pop("order_items")
+        order = Orders(user=user, **data)
+        new_items = [
+            _build_item(order, products[item["product"]], item, calculate_total)
+            for item in items
+        ]
+        order.order_total = sum(order_item.total_price for order_item in new_items)
+        orders.append((line, order, new_items))
+
+    try:
+        _save_orders(orders)
+    except DatabaseError:
+        logger.warning("Bulk write of imported orders failed", exc_info=True)
+        orders = _save_orders_one_by_one(orders, results)
+
+    for line, order, _ in orders:
+        results[line] = {"line": line, "status": "created", "id": order.pk}
+    return [results[line] for line in sorted(results)]
+
+
+def spool_body(stream: Optional[IO[bytes]]) -> IO[bytes]:
+    """Read a request body to a temporary file, rewound for reading
+
+    The results of an import are streamed as its chunks are written, so the
+    body is read beforehand: a client sending its whole body before reading
+    the response would otherwise block on full socket buffers, and the WSGI
+    input is not guaranteed to be readable once the response started.
+    """
+    body = tempfile.SpooledTemporaryFile(  # pylint: disable=consider-using-with
+        max_size=IMPORT_SPOOL_MAX_MEMORY
+    )
+    if stream is not None:
+        shutil.copyfileobj(stream, body)
+    body.seek(0)
+    return body
+
+
+def import_orders(
+    lines: Iterable[bytes],
+    user: Any,
+    calculate_total: Callable[..., Any],
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> Iterator[dict[str, Any]]:
+    """Import NDJSON orders for a user, yielding one result per record
+
+    Lines are consumed lazily and each chunk is committed on its own, so a
+    failure part way only loses the chunk being written. The results are
+    streamed after the response started, so database errors are reported as
+    errors of the chunk's records rather than raised.
+    """
+    numbered = enumerate(lines, start=1)
+    created = failed = 0
+    while True:
+        chunk = list(itertools.islice(numbered, chunk_size))
+        if not chunk:
+            break
+        try:
+            results = _import_chunk(chunk, user, calculate_total)
+        except DatabaseError:
+            logger.exception("Import of lines %s-%s failed", chunk[0][0], chunk[-1][0])
+            results = [_error(line, SAVE_ERROR) for line, raw in chunk if raw.strip()]
+        for result in results:
+            if result["status"] == "created":
+                created += 1
+            else:
+                failed += 1
+            yield result
+    yield {"summary": {"created": created, "failed": failed}}
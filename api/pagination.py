@@ -0,0 +1,221 @@
+import base64
+import binascii
+import json
+from typing import Any, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import NotFound
+from rest_framework.fields import BooleanField
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _positive_int(value: str, cutoff: Optional[int] = None) -> int:
+    """Cast a query parameter to a strictly positive integer"""
+    number = int(value)
+    if number <= 0:
+        raise ValueError()
+    if cutoff:
+        return min(number, cutoff)
+    return number
+
+
+def _estimate_count(queryset: QuerySet) -> int:
+    """Return the planner's row estimate for a queryset (PostgreSQL only)"""
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination over a composite, unique ordering
+
+    Unlike DRF's `CursorPagination`, which positions on the first ordering
+    field plus an offset, the cursor here stores the values of every ordering
+    field of the boundary row and the next page is fetched with a filter on
+    them, `a < x OR (a = x AND b < y) ...`, so the cost of a page doesn't
+    depend on how deep it is.
+    The last ordering field must be unique (usually `id`).
+    """
+
+    ordering: tuple[str, ...] = ("-id",)
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    count_query_param = "count"
+    # Exact counts are used up to this many rows, above it the planner's
+    # estimate is returned instead (when the database can provide one).
+    exact_count_limit = 10000
+    invalid_cursor_message = "Invalid cursor"
+
+    def __init__(self) -> None:
+        self.base_url = ""
+        self.page: list[Model] = []
+        self.has_next = False
+        self.has_previous = False
+        self.count: Optional[int] = None
+        self.count_estimated = False
+
+    def get_page_size(self, request: Request) -> int:
+        """Return the page size requested by the client, bounded by the max"""
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def count_requested(self, request: Request) -> bool:
+        """Return whether the client asked for the total, e.g. `?count=true`"""
+        value = request.query_params.get(self.count_query_param, "")
+        return value.strip().lower() in BooleanField.TRUE_VALUES
+
+    def decode_cursor(self, request: Request) -> tuple[Optional[list], bool]:
+        """Return the position and direction stored in the request cursor"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            position, reverse = data["p"], bool(data["r"])
+        except (binascii.Error, ValueError, TypeError, KeyError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+        if not isinstance(position, list) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def clean_position(self, model: type[Model], position: list) -> list:
+        """Convert the cursor values to the types of the ordering fields"""
+        meta = model._meta  # pylint: disable=protected-access
+        cleaned = []
+        try:
+            for field, value in zip(self.ordering, position):
+                value = meta.get_field(field.lstrip("-")).to_python(value)
+                if value is None:
+                    raise ValueError("Null cursor value")
+                cleaned.append(value)
+        except (ValidationError, ValueError, TypeError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+        return cleaned
+
+    def encode_cursor(self, obj: Model, reverse: bool) -> str:
+        """Return a url pointing at the page after (or before) `obj`"""
+        position = [getattr(obj, field.lstrip("-")) for field in self.ordering]
+        data = json.dumps({"p": position, "r": int(reverse)}, default=str)
+        encoded = base64.urlsafe_b64encode(data.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    @staticmethod
+    def _keyset_filter(ordering: tuple[str, ...], position: list) -> Q:
+        """Match the rows after a position, `a > x OR (a = x AND b > y) ...`
+
+        Each field is compared in its own direction, so mixed orderings work.
+        """
+        condition = Q()
+        for index, field in enumerate(ordering):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            term = Q(**{f"{name}__{lookup}": position[index]})
+            for previous, value in zip(ordering[:index], position):
+                term &= Q(**{previous.lstrip("-"): value})
+            condition |= term
+        return condition
+
+    def _get_count(self, queryset: QuerySet) -> tuple[int, bool]:
+        """Count the rows with a bounded query, estimating beyond the limit"""
+        queryset = queryset.order_by()
+        count = queryset[: self.exact_count_limit + 1].count()
+        if (
+            count > self.exact_count_limit
+            and connections[queryset.db].vendor == "postgresql"
+        ):
+            return max(_estimate_count(queryset), count), True
+        return count, count > self.exact_count_limit
+
+    def paginate_queryset(
+        self, queryset: QuerySet, request: Request, view: Any = None
+    ) -> list[Model]:
+        """Return a single page of results for the request cursor"""
+        page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        position, reverse = self.decode_cursor(request)
+        if position is not None:
+            position = self.clean_position(queryset.model, position)
+
+        if self.count_requested(request):
+            self.count, self.count_estimated = self._get_count(queryset)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                field[1:] if field.startswith("-") else f"-{field}"
+                for field in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._keyset_filter(ordering, position))
+
+        results = list(queryset[: page_size + 1])
+        has_more = len(results) > page_size
+        self.page = results[:page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def get_next_link(self) -> Optional[str]:
+        """Return the url of the next page, if any"""
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self) -> Optional[str]:
+        """Return the url of the previous page, if any"""
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data: Any) -> Response:
+        """Wrap a page of serialized data with its navigation links"""
+        payload: dict[str, Any] = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+        }
+        if self.count is not None:
+            payload["count"] = self.count
+            payload["count_estimated"] = self.count_estimated
+        payload["results"] = data
+        return Response(payload)
+
+
+class ProductsPagination(KeysetPagination):
+    """Keyset pagination for products, newest first"""
+
+    ordering = ("-id",)
+
+
+class OrderPagination(KeysetPagination):
+    """Keyset pagination for orders, most recent order date first"""
+
+    ordering = ("-order_date", "-id")
+
+
+class OrderItemPagination(KeysetPagination):
+    """Keyset pagination for order items, newest first"""
+
+    ordering = ("-id",)
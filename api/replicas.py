@@ -0,0 +1,62 @@
+from typing import Any, Iterator
+
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.request import Request
+
+from core.db_routers import (
+    choose_replica,
+    mark_written,
+    reset_read_alias,
+    set_read_alias,
+)
+
+
+class ReplicaReadMixin:
+    """Serve the reads of safe requests from a replica
+
+    Authentication and permission checks read from the primary. A successful
+    unsafe request keeps its user on the primary for the sticky window, so
+    they read their own writes.
+    """
+
+    def dispatch(self, request: HttpRequest, *args: Any, **kwargs: Any):
+        """Scope the read routing to the request"""
+        token = set_read_alias(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            # The routing is reset before a streamed body is consumed, such
+            # bodies pin their queryset to the replica themselves
+            reset_read_alias(token)
+
+    def initial(self, request: Request, *args: Any, **kwargs: Any) -> None:
+        """Route the reads of a safe request once it is authorized"""
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            set_read_alias(choose_replica(request.user))
+
+    def finalize_response(
+        self, request: Request, response: HttpResponseBase, *args: Any, **kwargs: Any
+    ) -> HttpResponseBase:
+        """Keep the user on the primary after a successful write
+
+        A streamed body (e.g. the bulk import) writes while it is sent, the
+        user is then kept on the primary again once it is consumed.
+        """
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            mark_written(request.user)
+            if getattr(response, "streaming", False):
+                response.streaming_content = _mark_written_after(
+                    response.streaming_content, request.user
+                )
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+def _mark_written_after(content: Iterator[bytes], user: Any) -> Iterator[bytes]:
+    """Yield a streamed body, keeping the user on the primary at its end"""
+    try:
+        yield from content
+    finally:
+        mark_written(user)
@@ -1,18 +1,139 @@
-from typing import Union
+from collections import defaultdict
+from typing import Any, Iterable, Optional, Union
 
-from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch, QuerySet
 from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
 
-from core.models import Categories, Products, Orders, OrderItem
+from core.images import image_is_current
+from core.instrumentation import timed
+from core.media import media_url
+from core.models import Categories, Products, Orders, OrderItem, ORDER_STATUS_CHOICES
 
 
-def _product_image_url(filename: object):
-    if settings.DEBUG:
-        return f"http://localhost/media/{filename}"
-    return f"https://{settings.ALLOWED_HOSTS[0]}/media/{filename}"
+class TimedSerializerMixin:
+    """Count the representation of objects as serialization time"""
 
+    def to_representation(self, instance: Any) -> Any:
+        """Serialize an object inside the "serialize" timing phase"""
+        with timed("serialize"):
+            return super().to_representation(instance)
 
-class CategoriesSerializer(serializers.ModelSerializer):
+
+def _split_paths(paths: Iterable[str]) -> tuple[set[str], dict[str, set[str]]]:
+    """Split dotted field paths into their first names and the rest by name"""
+    names: set[str] = set()
+    nested: dict[str, set[str]] = defaultdict(set)
+    for path in paths:
+        name, _, rest = path.partition(".")
+        names.add(name)
+        if rest:
+            nested[name].add(rest)
+    return names, nested
+
+
+def _nested(field: Any) -> Any:
+    """Return the serializer of a nested field, the child of a list one"""
+    return getattr(field, "child", field)
+
+
+class SparseFieldsMixin:
+    """Serialize the selected fields only, expanding relations on demand
+
+    `fields` and `expand` are sets of field names, dotted to reach those of a
+    nested serializer ("order_items.product"). `Meta.expandable_fields` maps
+    the relations that can be expanded to the serializer (and its arguments)
+    replacing them, `Meta.field_sources` the method fields to the model fields
+    they read.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        fields: Optional[set[str]] = None,
+        expand: Optional[set[str]] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(*args, **kwargs)
+        self.selected_fields = fields
+        self.expanded_fields = expand or set()
+
+    def get_fields(self) -> dict[str, Any]:
+        """Return the selected fields, with the expanded relations"""
+        fields = super().get_fields()
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        expand, nested_expand = _split_paths(self.expanded_fields)
+        for name in sorted(expand):
+            if name in expandable:
+                serializer_class, kwargs = expandable[name]
+                fields[name] = serializer_class(**kwargs)
+            elif not isinstance(_nested(fields.get(name)), SparseFieldsMixin):
+                raise ValidationError({"expand": [f"Cannot expand {name!r}."]})
+
+        nested_fields: dict[str, set[str]] = {}
+        if self.selected_fields is not None:
+            selected, nested_fields = _split_paths(self.selected_fields)
+            unknown = selected - fields.keys()
+            if unknown:
+                raise ValidationError(
+                    {"fields": [f"Unknown field {name!r}." for name in sorted(unknown)]}
+                )
+            fields = {name: field for name, field in fields.items() if name in selected}
+
+        for name, field in fields.items():
+            child = _nested(field)
+            if isinstance(child, SparseFieldsMixin):
+                child.selected_fields = nested_fields.get(name)
+                child.expanded_fields = nested_expand.get(name, set())
+        return fields
+
+    def narrow_queryset(
+        self, queryset: QuerySet, columns: Iterable[str] = ()
+    ) -> QuerySet:
+        """Load only the columns and the relations the fields read
+
+        columns are loaded as well, e.g. the ordering of a paginated list.
+        """
+        meta = queryset.model._meta  # pylint: disable=protected-access
+        sources = getattr(self.Meta, "field_sources", {})
+        names = {meta.pk.name, *columns}
+        prefetches = []
+        for name, field in self.fields.items():
+            for source in sources.get(name, (field.source,)):
+                attribute = source.split(".")[0]
+                try:
+                    model_field = meta.get_field(attribute)
+                except FieldDoesNotExist:
+                    continue
+                if model_field.concrete and not model_field.many_to_many:
+                    names.add(model_field.name)
+                child = _nested(field)
+                if model_field.many_to_many or model_field.one_to_many:
+                    prefetches.append(self._prefetch(attribute, model_field, child))
+                elif model_field.is_relation and isinstance(child, SparseFieldsMixin):
+                    prefetches.append(self._prefetch(attribute, model_field, child))
+        return (
+            queryset.select_related(None)
+            .prefetch_related(None)
+            .only(*names)
+            .prefetch_related(*prefetches)
+        )
+
+    @staticmethod
+    def _prefetch(attribute: str, model_field: Any, child: Any) -> Prefetch:
+        """Return the prefetch of a relation, narrowed to its serializer"""
+        related = model_field.related_model._default_manager.all()
+        if isinstance(child, SparseFieldsMixin):
+            # Reverse foreign keys are matched to their objects by the key
+            remote = [model_field.field.name] if model_field.one_to_many else []
+            related = child.narrow_queryset(related, remote)
+        return Prefetch(attribute, queryset=related)
+
+
+class CategoriesSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     """Serializer for categories object"""
 
     class Meta:
@@ -23,25 +144,84 @@ class CategoriesSerializer(serializers.ModelSerializer):
         read_only_fields = ("id",)
 
 
-class ProductsSerializer(serializers.ModelSerializer):
+class ProductsSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     """Serializer for products object"""
 
     category = serializers.StringRelatedField(many=True)
     image = serializers.SerializerMethodField()
+    image_variants = serializers.SerializerMethodField()
 
     class Meta:
         """Meta class for products serializer"""
 
         model = Products
-        fields = "__all__"
+        exclude = ("updated_date", "image_derivatives")
         read_only_fields = ("id", "category", "image")
+        expandable_fields = {
+            "category": (CategoriesSerializer, {"many": True, "read_only": True})
+        }
+        field_sources = {
+            "image": ("image",),
+            "image_variants": ("image", "image_derivatives"),
+        }
 
     def get_image(self, obj: Products) -> Union[str, None]:
         """Return the image url for the product"""
         if obj.image:
-            return _product_image_url(obj.image)
+            return media_url(obj.image, self.context.get("request"))
         return None
 
+    def get_image_variants(self, obj: Products) -> Union[dict, None]:
+        """Return the resized copies of the image with srcset strings"""
+        if not image_is_current(obj):
+            return None
+        variants = obj.image_derivatives["variants"]
+        request = self.context.get("request")
+        return {
+            "sizes": [
+                {
+                    "width": variant["width"],
+                    "height": variant["height"],
+                    "webp": media_url(variant["webp"], request),
+                    "jpeg": media_url(variant["jpeg"], request),
+                }
+                for variant in variants
+            ],
+            "srcset": {
+                image_format: ", ".join(
+                    f"{media_url(variant[image_format], request)} {variant['width']}w"
+                    for variant in variants
+                )
+                for image_format in ("webp", "jpeg")
+            },
+        }
+
+
+class ProductImageSerializer(serializers.ModelSerializer):
+    """Serializer for uploading the image of a product
+
+    The upload is checked by `api.uploads.ImageUploadHandler` as it streams
+    in, so the file is not decoded again here.
+    """
+
+    image = serializers.FileField()
+
+    class Meta:
+        """Meta class for product image serializer"""
+
+        model = Products
+        fields = ("id", "image")
+        read_only_fields = ("id",)
+
+    def to_representation(self, instance: Products) -> dict:
+        """Return the image url like the products serializer"""
+        return {
+            "id": instance.id,
+            "image": media_url(instance.image, self.context.get("request")),
+        }
+
 
 class ProductDetailSerializer(ProductsSerializer):
     """Serializer for product details"""
@@ -50,7 +230,9 @@ class ProductDetailSerializer(ProductsSerializer):
     category = CategoriesSerializer(many=True, read_only=True)
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     """Serializer for the orders items object"""
 
     class Meta:
@@ -59,9 +241,12 @@ class OrderItemSerializer(serializers.ModelSerializer):
         model = OrderItem
         fields = "__all__"
         read_only_fields = ("id",)
+        expandable_fields = {"product": (ProductsSerializer, {"read_only": True})}
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(
+    SparseFieldsMixin, TimedSerializerMixin, serializers.ModelSerializer
+):
     """Serializer for the orders object"""
 
     order_items = OrderItemSerializer(many=True)
@@ -72,3 +257,29 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Orders
         fields = "__all__"
         read_only_fields = ("id",)
+
+
+class OrderItemImportSerializer(serializers.Serializer):
+    """Serializer for the items of a created or imported order"""
+
+    # pylint: disable=abstract-method
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class OrderImportSerializer(serializers.Serializer):
+    """Serializer for an order created with its items or bulk imported
+
+    Products are validated as plain ids and resolved in bulk by the views,
+    instead of one query per item.
+    """
+
+    # pylint: disable=abstract-method
+    payment_mode = serializers.CharField(max_length=255)
+    order_status = serializers.ChoiceField(
+        choices=ORDER_STATUS_CHOICES, default="Created"
+    )
+    is_paid = serializers.BooleanField(default=False)
+    tracking_number = serializers.CharField(max_length=150, required=False)
+    shipped_date = serializers.DateTimeField(required=False, allow_null=True)
+    order_items = OrderItemImportSerializer(many=True, allow_empty=False)
@@ -0,0 +1,24 @@
+from typing import Any
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import Categories, Products
+from api.cache import catalog_cache
+
+
+@receiver(post_save, sender=Products)
+@receiver(post_delete, sender=Products)
+@receiver(post_save, sender=Categories)
+@receiver(post_delete, sender=Categories)
+def invalidate_catalog(**kwargs: Any) -> None:  # pylint: disable=unused-argument
+    """Invalidate the catalog cache when a product or category changes"""
+    catalog_cache.invalidate()
+
+
+@receiver(m2m_changed, sender=Products.category.through)
+def invalidate_catalog_categories(action: str, **kwargs: Any) -> None:
+    """Invalidate the catalog cache when product categories change"""
+    # pylint: disable=unused-argument
+    if action.startswith("post_"):
+        catalog_cache.invalidate()
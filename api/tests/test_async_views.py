@@ -0,0 +1,100 @@
+import pytest
+
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+# The async views query from the database thread pool, outside the test
+# transaction, so these tests commit their data
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def catalog(sample_user, sample_category, sample_product, sample_order):
+    """Create a user's token, product, category and order with one item"""
+    user = sample_user()
+    category = sample_category(user=user)
+    product = sample_product(user=user)
+    product.category.add(category)
+    order = sample_order(user)
+    order.order_items.create(product=product, quantity=2, item_price=15, total_price=30)
+    return {"token": Token.objects.create(user=user), "product": product}
+
+
+def _async_get(url, token=None, headers=None):
+    """GET url through the ASGI handler"""
+    headers = dict(headers or {})
+    if token is not None:
+        headers["Authorization"] = f"Token {token}"
+
+    async def get():
+        return await AsyncClient().get(url, **headers)
+
+    return async_to_sync(get)()
+
+
+@pytest.mark.parametrize(
+    "sync_name, async_name, detail",
+    [
+        ("categories-list", "async-categories-list", False),
+        ("products-list", "async-products-list", False),
+        ("products-detail", "async-products-detail", True),
+        ("orders-list", "async-orders-list", False),
+        ("orderitem-list", "async-orderitem-list", False),
+    ],
+)
+def test_async_matches_sync(catalog, sync_name, async_name, detail):
+    """Test the async views return the same data as the viewsets"""
+    args = [catalog["product"].id] if detail else []
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {catalog['token'].key}")
+
+    expected = client.get(reverse(f"api:{sync_name}", args=args))
+    res = _async_get(reverse(f"api:{async_name}", args=args), catalog["token"].key)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res["Content-Type"] == "application/json"
+    assert res.json() == expected.json()
+
+
+def test_async_conditional_and_cached(catalog):
+    """Test the async views answer conditional requests from their ETag"""
+    url = reverse("api:async-products-list")
+    key = catalog["token"].key
+
+    first = _async_get(url, key)
+    second = _async_get(url, key, {"If-None-Match": first["ETag"]})
+    third = _async_get(url, key)
+
+    assert first["X-Cache"] == "MISS"
+    assert second.status_code == status.HTTP_304_NOT_MODIFIED
+    assert third["X-Cache"] == "HIT"
+
+
+def test_async_authentication(catalog, sample_user):
+    """Test the async views require a valid token and scope data to it"""
+    other = Token.objects.create(user=sample_user(email="other@bodegonasusalud.com"))
+    url = reverse("api:async-products-detail", args=[catalog["product"].id])
+
+    missing = _async_get(url)
+    invalid = _async_get(url, "0" * 40)
+
+    assert missing.status_code == status.HTTP_401_UNAUTHORIZED
+    assert missing["WWW-Authenticate"] == "Token"
+    assert invalid.status_code == status.HTTP_401_UNAUTHORIZED
+    assert _async_get(url, other.key).status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_async_queries_instrumented(settings, catalog):
+    """Test queries run in database threads are timed"""
+    settings.REQUEST_TIMING = {"SAMPLE_RATE": 1.0, "LOG": False}
+
+    res = _async_get(reverse("api:async-orders-list"), catalog["token"].key)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert "db;dur=" in res["Server-Timing"]
+    assert "auth;dur=" in res["Server-Timing"]
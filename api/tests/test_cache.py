@@ -0,0 +1,105 @@
+import pytest
+
+from django.urls import reverse
+
+from rest_framework import status
+
+from api.cache import LocalLRUBackend, catalog_cache
+
+PRODUCTS_URL = reverse("api:products-list")
+CATEGORIES_URL = reverse("api:categories-list")
+
+
+def test_local_backend_evicts_least_recently_used():
+    """Test that the local backend stays under its size limit"""
+    backend = LocalLRUBackend(max_bytes=10)
+
+    backend.set("a", b"1234")
+    backend.set("b", b"1234")
+    backend.get("a")
+    backend.set("c", b"1234")
+
+    assert backend.get("a") == b"1234"
+    assert backend.get("b") is None
+    assert backend.get("c") == b"1234"
+    assert backend.stats()["bytes"] == 8
+
+
+def test_local_backend_expires_entries():
+    """Test that entries are dropped once their timeout has passed"""
+    backend = LocalLRUBackend()
+
+    backend.set("a", b"1234", timeout=0)
+
+    assert backend.get("a") is None
+    assert backend.stats()["bytes"] == 0
+
+
+@pytest.mark.django_db
+def test_products_served_from_cache(
+    api_client, sample_product, django_assert_num_queries
+):
+    """Test that a repeated product list only queries its validators"""
+
+    client, user = api_client
+    sample_product(user=user)
+
+    first = client.get(PRODUCTS_URL)
+    with django_assert_num_queries(1):
+        second = client.get(PRODUCTS_URL)
+
+    assert first["X-Cache"] == "MISS"
+    assert second["X-Cache"] == "HIT"
+    assert second.data == first.data
+    assert catalog_cache.stats()["hits"] == 1
+
+
+@pytest.mark.django_db
+def test_cache_keyed_per_filter(api_client, sample_product, sample_category):
+    """Test that each category filter gets its own cache entry"""
+
+    client, user = api_client
+    product = sample_product(user=user)
+    product.category.add(sample_category(user=user, name="Vinos"))
+
+    client.get(PRODUCTS_URL)
+    res = client.get(PRODUCTS_URL, {"category": "rones"})
+
+    assert res["X-Cache"] == "MISS"
+    assert res.data["results"] == []
+
+
+@pytest.mark.django_db
+def test_cache_invalidated_on_catalog_change(
+    api_client, sample_product, sample_category
+):
+    """Test that saving products or changing their categories refreshes the cache"""
+
+    client, user = api_client
+    product = sample_product(user=user)
+    client.get(PRODUCTS_URL)
+
+    product.name = "Ron Cacique"
+    product.save()
+    res = client.get(PRODUCTS_URL)
+    assert res["X-Cache"] == "MISS"
+    assert res.data["results"][0]["name"] == "Ron Cacique"
+
+    product.category.add(sample_category(user=user, name="Rones"))
+    res = client.get(PRODUCTS_URL)
+    assert res["X-Cache"] == "MISS"
+    assert res.data["results"][0]["category"] == ["Rones"]
+
+
+@pytest.mark.django_db
+def test_cache_keyed_per_user(custom_api_client, sample_user, sample_category):
+    """Test that users don't share cached responses"""
+
+    user2 = sample_user(email="user2@bodegonasusalud.com")
+    sample_category(user=user2)
+
+    custom_api_client(user=user2)["client"].get(CATEGORIES_URL)
+    res = custom_api_client()["client"].get(CATEGORIES_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res["X-Cache"] == "MISS"
@@ -0,0 +1,138 @@
+from types import SimpleNamespace
+
+import pytest
+
+from django.urls import reverse
+
+from rest_framework import status
+
+from core import media
+from core.models import OrderItem, Products
+
+PRODUCTS_URL = reverse("api:products-list")
+CATEGORIES_URL = reverse("api:categories-list")
+
+
+def detail_orders_url(order_id):
+    """Return orders detail Url"""
+    return reverse("api:orders-detail", args=[order_id])
+
+
+@pytest.mark.django_db
+def test_products_not_modified(api_client, sample_product, django_assert_num_queries):
+    """Test that a matching ETag short-circuits to 304 after one query"""
+
+    client, user = api_client
+    sample_product(user=user)
+
+    res = client.get(PRODUCTS_URL)
+    with django_assert_num_queries(1):
+        cached = client.get(PRODUCTS_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+    assert res.status_code == status.HTTP_200_OK
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+    assert cached["ETag"] == res["ETag"]
+    assert not cached.content
+
+
+@pytest.mark.django_db
+def test_products_modified_after_category_change(
+    api_client, sample_product, sample_category
+):
+    """Test that adding a category to a product changes the ETag"""
+
+    client, user = api_client
+    product = sample_product(user=user)
+
+    etag = client.get(PRODUCTS_URL)["ETag"]
+    product.category.add(sample_category(user=user))
+    res = client.get(PRODUCTS_URL, HTTP_IF_NONE_MATCH=etag)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res["ETag"] != etag
+
+
+@pytest.mark.django_db
+def test_product_detail_if_modified_since(api_client, sample_product):
+    """Test that Last-Modified can be used to revalidate a product"""
+
+    client, user = api_client
+    product = sample_product(user=user)
+    url = reverse("api:products-detail", args=[product.id])
+
+    res = client.get(url)
+    cached = client.get(url, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"])
+
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_categories_not_modified(api_client, sample_category):
+    """Test that the category list can be revalidated with its ETag"""
+
+    client, user = api_client
+    sample_category(user=user)
+
+    res = client.get(CATEGORIES_URL)
+    cached = client.get(CATEGORIES_URL, HTTP_IF_NONE_MATCH=res["ETag"])
+
+    assert "Last-Modified" not in res
+    assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+
+
+@pytest.mark.django_db
+def test_order_modified_after_item_change(api_client, sample_product, sample_order):
+    """Test that changing an order item changes the order ETag"""
+
+    client, user = api_client
+    product = sample_product(user=user)
+    order = sample_order(user=user)
+    url = detail_orders_url(order.id)
+
+    etag = client.get(url)["ETag"]
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    OrderItem.objects.create(
+        order=order, product=product, quantity=1, item_price=15, total_price=15
+    )
+    res = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert len(res.data["order_items"]) == 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", ["api:products-detail", "api:orders-detail"])
+def test_detail_malformed_pk_not_found(api_client, name):
+    """Test that a malformed pk is a 404, not an error of the ETag query"""
+
+    client, _ = api_client
+
+    res = client.get(reverse(name, args=["abc"]))
+
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_signed_urls_expire_validators(
+    settings, api_client, sample_product, monkeypatch
+):
+    """Test the validators change with the window of the signed media URLs"""
+    client, user = api_client
+    product = sample_product(user=user)
+    Products.objects.filter(pk=product.pk).update(image="products/a.jpg")
+    url = reverse("api:products-detail", args=[product.id])
+    settings.MEDIA_DELIVERY = {"SIGNED_URLS": True, "SIGNED_URL_TTL": 60}
+    clock = SimpleNamespace(time=lambda: 1_900_000_000.0)
+    monkeypatch.setattr(media, "time", clock)
+
+    res = client.get(url)
+    same_window = client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+    clock.time = lambda: 1_900_000_000.0 + 60
+    by_etag = client.get(url, HTTP_IF_NONE_MATCH=res["ETag"])
+    by_date = client.get(url, HTTP_IF_MODIFIED_SINCE=res["Last-Modified"])
+
+    assert same_window.status_code == status.HTTP_304_NOT_MODIFIED
+    assert by_etag.status_code == by_date.status_code == status.HTTP_200_OK
+    assert by_etag.data["image"] != res.data["image"]
+    assert by_etag["ETag"] != res["ETag"]
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+
+import pytest
+
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Orders, OrderItem
+
+EXPORT_URL = reverse("api:orders-export")
+
+
+def _read(response):
+    """Return the full body of a streaming response"""
+    return b"".join(response.streaming_content).decode()
+
+
+@pytest.fixture
+def order_history(api_client, sample_product, sample_order, sample_user):
+    """Create two orders with items for the user and one for another user"""
+    client, user = api_client
+    product = sample_product(user=user)
+
+    shipped = sample_order(user=user, order_status="Shipped", order_total=30)
+    for quantity in (1, 1):
+        OrderItem.objects.create(
+            order=shipped,
+            product=product,
+            quantity=quantity,
+            item_price=15,
+            total_price=15,
+        )
+    sample_order(user=user)
+    sample_order(user=sample_user(email="other@bodegonasusalud.com"))
+    return client, shipped
+
+
+@pytest.mark.django_db
+def test_export_ndjson(order_history):
+    """Test exporting orders as NDJSON with their items nested"""
+    client, shipped = order_history
+
+    res = client.get(EXPORT_URL)
+    orders = [json.loads(line) for line in _read(res).splitlines()]
+
+    assert res.status_code == status.HTTP_200_OK
+    assert res["Content-Type"] == "application/x-ndjson"
+    assert len(orders) == 2
+    assert orders[0]["id"] == shipped.id
+    assert orders[0]["order_total"] == 30
+    assert [item["quantity"] for item in orders[0]["order_items"]] == [1, 1]
+    assert orders[1]["order_items"] == []
+
+
+@pytest.mark.django_db
+def test_export_csv_filtered_by_status(order_history):
+    """Test exporting the items of shipped orders as CSV"""
+    client, shipped = order_history
+
+    res = client.get(EXPORT_URL, {"output": "csv", "status": "Shipped"})
+    rows = list(csv.DictReader(io.StringIO(_read(res))))
+
+    assert res["Content-Disposition"] == 'attachment; filename="orders.csv"'
+    assert len(rows) == 2
+    assert {row["order_id"] for row in rows} == {str(shipped.id)}
+    assert rows[0]["item_total_price"] == "15.00"
+
+
+@pytest.mark.django_db
+def test_export_filtered_by_date(order_history):
+    """Test that the date range filters on the order date"""
+    client, _ = order_history
+    Orders.objects.update(order_date="2020-01-01")
+
+    res = client.get(EXPORT_URL, {"date_from": "2021-01-01"})
+
+    assert _read(res) == ""
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params",
+    [
+        {"output": "xml"},
+        {"status": "Lost"},
+        {"date_to": "yesterday"},
+        {"date_from": "2021-13-45"},
+    ],
+)
+def test_export_invalid_params(api_client, params):
+    """Test that invalid export parameters are rejected"""
+    client, _ = api_client
+
+    res = client.get(EXPORT_URL, params)
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
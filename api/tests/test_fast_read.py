@@ -0,0 +1,115 @@
+import pytest
+from django.urls import reverse
+
+from rest_framework import status
+
+from api.cache import catalog_cache
+from api.fast_read import compile_plan
+from api.serializers import OrderSerializer, ProductDetailSerializer, ProductsSerializer
+from core.models import Products
+
+PRODUCTS_URL = reverse("api:products-list")
+ORDERS_URL = reverse("api:orders-list")
+ITEMS_URL = reverse("api:orderitem-list")
+
+
+@pytest.fixture
+def catalog(api_client, sample_product, sample_category, sample_order):
+    """Create products with categories and an image, and orders of them"""
+    _, user = api_client
+    wines = sample_category(user=user)
+    gifts = sample_category(user=user, name="Regalos")
+    products = []
+    for index in range(3):
+        product = sample_product(user=user, name=f"Vino {index}", price=10.5 + index)
+        product.category.add(wines, *([gifts] if index else []))
+        products.append(product)
+    variant = {"width": 320, "height": 240, "webp": "v.webp", "jpeg": "v.jpg"}
+    Products.objects.filter(id=products[0].id).update(
+        image="uploads/product/a.jpg",
+        discount="1.5",
+        image_derivatives={"source": "uploads/product/a.jpg", "variants": [variant]},
+    )
+    Products.objects.filter(id=products[1].id).update(image="uploads/product/b.jpg")
+
+    for index, product in enumerate(products):
+        order = sample_order(user, order_total=index * 3.333, is_paid=bool(index))
+        order.order_items.create(
+            product=product, quantity=2, item_price=10, total_price=20
+        )
+        order.order_items.create(
+            product=products[0], quantity=1, item_price=3, total_price=3, discount=1
+        )
+    sample_order(user)
+
+
+def _both(client, settings, url, params):
+    """GET url with the fast read path and with the serializers"""
+    fast = client.get(url, params)
+    catalog_cache.reset()
+    settings.FAST_READ = {"ENABLED": False}
+    slow = client.get(url, params)
+    settings.FAST_READ = {"ENABLED": True}
+    return fast, slow
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url,params",
+    [
+        (PRODUCTS_URL, {}),
+        (PRODUCTS_URL, {"page_size": 2}),
+        (PRODUCTS_URL, {"fields": "id,category,image", "expand": "category"}),
+        (ORDERS_URL, {}),
+        (ORDERS_URL, {"page_size": 2, "count": "true"}),
+        (ORDERS_URL, {"expand": "order_items.product"}),
+        (ITEMS_URL, {}),
+        (ITEMS_URL, {"fields": "id,product", "expand": "product"}),
+    ],
+)
+def test_lists_match_serializers(
+    api_client, catalog, settings, url, params
+):  # pylint: disable=unused-argument
+    """Test the fast read path returns what the serializers return"""
+    client, _ = api_client
+
+    fast, slow = _both(client, settings, url, params)
+
+    assert fast.status_code == status.HTTP_200_OK
+    assert fast.json() == slow.json()
+    assert fast.json()["results"]
+
+
+@pytest.mark.django_db
+def test_next_page_matches_serializers(
+    api_client, catalog, settings
+):  # pylint: disable=unused-argument
+    """Test the cursor of a fast read page leads to the same next page"""
+    client, _ = api_client
+    first = client.get(ORDERS_URL, {"page_size": 2})
+
+    fast, slow = _both(client, settings, first.json()["next"], {})
+
+    assert fast.json() == slow.json()
+    assert len(fast.json()["results"]) == 2
+
+
+@pytest.mark.django_db
+def test_constant_queries(
+    api_client, catalog, django_assert_num_queries
+):  # pylint: disable=unused-argument
+    """Test the rows and each relation are read with one query"""
+    client, _ = api_client
+
+    # Last-Modified, the orders, their items, the products and their categories
+    with django_assert_num_queries(5):
+        res = client.get(ORDERS_URL, {"expand": "order_items.product"})
+
+    assert len(res.data["results"]) == 4
+
+
+def test_unsupported_serializers():
+    """Test serializers with fields not read from values have no plan"""
+    assert compile_plan(ProductsSerializer()) is not None
+    assert compile_plan(OrderSerializer(fields={"id", "order_items"})) is not None
+    assert compile_plan(ProductDetailSerializer()) is None
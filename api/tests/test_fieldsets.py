@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+
+PRODUCTS_URL = reverse("api:products-list")
+ORDERS_URL = reverse("api:orders-list")
+ITEMS_URL = reverse("api:orderitem-list")
+
+
+@pytest.fixture
+def orders(api_client, sample_product, sample_category, sample_order):
+    """Create orders of the client's user, with one item per product"""
+
+    def create_orders(count):
+        _, user = api_client
+        category = sample_category(user=user)
+        for index in range(count):
+            product = sample_product(user=user, name=f"Vino {index}")
+            product.category.add(category)
+            order = sample_order(user)
+            order.order_items.create(
+                product=product, quantity=index + 1, item_price=10, total_price=10
+            )
+
+    return create_orders
+
+
+def _get(client, url, **params):
+    """GET url, returning the response and the SQL of its queries"""
+    with CaptureQueriesContext(connection) as queries:
+        res = client.get(url, params)
+    return res, [query["sql"] for query in queries]
+
+
+@pytest.mark.django_db
+def test_fields_narrow_rows_and_columns(api_client, orders):
+    """Test ?fields= selects the fields, the columns and the prefetches"""
+    client, _ = api_client
+    orders(2)
+
+    res, queries = _get(client, PRODUCTS_URL, fields="id,name")
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [set(row) for row in res.data["results"]] == [{"id", "name"}] * 2
+    assert not any('"description"' in sql for sql in queries)
+    assert not any("core_products_category" in sql for sql in queries)
+
+
+@pytest.mark.django_db
+def test_expand_relations(api_client, orders):
+    """Test ?expand= replaces relations by their serialized objects"""
+    client, _ = api_client
+    orders(1)
+
+    products, _ = _get(client, PRODUCTS_URL, fields="id,category", expand="category")
+    items, _ = _get(client, ITEMS_URL, expand="product")
+
+    assert products.data["results"][0]["category"][0]["name"] == "Vinos"
+    assert items.data["results"][0]["product"]["name"] == "Vino 0"
+    assert items.data["results"][0]["product"]["category"] == ["Vinos"]
+
+
+@pytest.mark.django_db
+def test_nested_selection_has_constant_queries(api_client, orders):
+    """Test dotted paths reach nested serializers without per row queries"""
+    client, _ = api_client
+    params = {
+        "fields": "id,order_items.quantity,order_items.product",
+        "expand": "order_items.product",
+    }
+    orders(1)
+    _, few = _get(client, ORDERS_URL, **params)
+    orders(4)
+
+    res, many = _get(client, ORDERS_URL, **params)
+    bare, bare_queries = _get(client, ORDERS_URL, fields="id,order_total")
+
+    items = [item for order in res.data["results"] for item in order["order_items"]]
+    assert len(items) == 5
+    assert set(items[0]) == {"quantity", "product"}
+    assert set(items[0]["product"]) >= {"id", "name", "category"}
+    assert len(many) == len(few)
+    assert set(bare.data["results"][0]) == {"id", "order_total"}
+    assert len(bare_queries) < len(many)
+    assert not any("core_orderitem" in sql for sql in bare_queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "params",
+    [{"fields": "id,secret"}, {"expand": "price"}, {"expand": "category.user"}],
+)
+def test_invalid_selection(api_client, params):
+    """Test unknown fields and relations that can't be expanded are rejected"""
+    client, _ = api_client
+
+    res = client.get(PRODUCTS_URL, params)
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_writes_ignore_selection(api_client, sample_product):
+    """Test a write is validated and answered with every field"""
+    client, user = api_client
+    product = sample_product(user=user)
+    payload = {
+        "payment_mode": "Credit Card",
+        "order_items": [{"product": product.id, "quantity": 1}],
+    }
+
+    res = client.post(f"{ORDERS_URL}?fields=id", payload, format="json")
+    listed = client.get(ORDERS_URL, {"fields": "payment_mode"})
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert listed.data["results"] == [{"payment_mode": "Credit Card"}]
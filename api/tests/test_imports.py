@@ -0,0 +1,220 @@
+import json
+
+import pytest
+
+from django.db import DatabaseError
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.models import Orders, OrderItem, Products
+
+from api import imports
+from api.imports import import_orders
+from api.views import OrderViewSet
+
+IMPORT_URL = reverse("api:orders-bulk-import")
+
+
+def _ndjson(*records):
+    """Encode records as NDJSON, passing strings through untouched"""
+    return "\n".join(
+        record if isinstance(record, str) else json.dumps(record) for record in records
+    ).encode()
+
+
+def _post(client, body):
+    """Post an NDJSON body and return the decoded results"""
+    res = client.post(IMPORT_URL, body, content_type="application/x-ndjson")
+    assert res.status_code == status.HTTP_200_OK
+    content = b"".join(res.streaming_content).decode()
+    return [json.loads(line) for line in content.splitlines()]
+
+
+@pytest.mark.django_db
+def test_import_orders(api_client, sample_product):
+    """Test importing valid orders prices and saves them with their items"""
+    client, user = api_client
+    product = sample_product(user=user, price=10)
+
+    results = _post(
+        client,
+        _ndjson(
+            {
+                "payment_mode": "Cash",
+                "order_items": [{"product": product.id, "quantity": 3}],
+            },
+            {
+                "payment_mode": "Credit Card",
+                "order_status": "Completed",
+                "is_paid": True,
+                "tracking_number": "MKT-1",
+                "order_items": [
+                    {"product": product.id, "quantity": 1},
+                    {"product": product.id, "quantity": 2},
+                ],
+            },
+        ),
+    )
+
+    assert [result["status"] for result in results[:2]] == ["created", "created"]
+    assert results[2] == {"summary": {"created": 2, "failed": 0}}
+    order = Orders.objects.get(id=results[1]["id"])
+    assert order.user == user
+    assert order.tracking_number == "MKT-1"
+    assert order.order_total == 30
+    assert OrderItem.objects.filter(order__user=user).count() == 3
+
+
+@pytest.mark.django_db
+def test_import_reports_invalid_records(api_client, sample_product, sample_order):
+    """Test that invalid records are reported without blocking the others"""
+    client, user = api_client
+    product = sample_product(user=user)
+    sample_order(user=user, tracking_number="TAKEN")
+    item = {"product": product.id, "quantity": 1}
+
+    results = _post(
+        client,
+        _ndjson(
+            "{not json",
+            {"order_items": [item]},
+            {"payment_mode": "Cash", "order_items": [{"product": 999, "quantity": 1}]},
+            {"payment_mode": "Cash", "tracking_number": "TAKEN", "order_items": [item]},
+            {"payment_mode": "Cash", "order_items": [item]},
+        ),
+    )
+
+    assert [result.get("status") for result in results] == [
+        "error",
+        "error",
+        "error",
+        "error",
+        "created",
+        None,
+    ]
+    assert "payment_mode" in results[1]["errors"]
+    assert "order_items" in results[2]["errors"]
+    assert "tracking_number" in results[3]["errors"]
+    assert results[5] == {"summary": {"created": 1, "failed": 4}}
+
+
+@pytest.mark.django_db
+def test_import_queries_per_chunk(
+    sample_user, sample_product, django_assert_num_queries
+):
+    """Test that a chunk costs the same number of queries whatever its size"""
+    user = sample_user()
+    product = sample_product(user=user)
+    record = {
+        "payment_mode": "Cash",
+        "order_items": [{"product": product.id, "quantity": 1}],
+    }
+
+    def run(count):
+        lines = _ndjson(*[record] * count).splitlines()
+        calculate_total = (
+            OrderViewSet._calculate_total  # pylint: disable=protected-access
+        )
+        return list(import_orders(lines, user, calculate_total, chunk_size=count))
+
+    with django_assert_num_queries(5):
+        run(1)
+    with django_assert_num_queries(5):
+        results = run(50)
+
+    assert results[-1] == {"summary": {"created": 50, "failed": 0}}
+
+
+@pytest.mark.django_db
+def test_import_concurrent_tracking_number(
+    api_client, sample_product, sample_order, monkeypatch
+):
+    """Test a tracking number taken during the import only rejects its record"""
+    client, user = api_client
+    product = sample_product(user=user)
+    item = {"product": product.id, "quantity": 1}
+    save_orders = imports._save_orders  # pylint: disable=protected-access
+
+    def save_after_concurrent_order(orders):
+        sample_order(user=user, tracking_number="RACE")
+        save_orders(orders)
+
+    monkeypatch.setattr(imports, "_save_orders", save_after_concurrent_order)
+    results = _post(
+        client,
+        _ndjson(
+            {"payment_mode": "Cash", "order_items": [item]},
+            {"payment_mode": "Cash", "tracking_number": "RACE", "order_items": [item]},
+            {"payment_mode": "Cash", "order_items": [item, item]},
+        ),
+    )
+
+    assert [result.get("status") for result in results] == [
+        "created",
+        "error",
+        "created",
+        None,
+    ]
+    assert results[1]["errors"] == imports.SAVE_ERROR
+    assert results[3] == {"summary": {"created": 2, "failed": 1}}
+    assert OrderItem.objects.filter(order__user=user).count() == 3
+
+
+@pytest.mark.django_db
+def test_import_database_error(api_client, sample_product, monkeypatch):
+    """Test a database error fails the chunk's records without breaking the stream"""
+    client, user = api_client
+    product = sample_product(user=user)
+    record = {
+        "payment_mode": "Cash",
+        "order_items": [{"product": product.id, "quantity": 1}],
+    }
+
+    def fail(*args, **kwargs):
+        raise DatabaseError("connection lost")
+
+    monkeypatch.setattr(Products.objects, "in_bulk", fail)
+    results = _post(client, _ndjson(record, "", record))
+
+    assert [result.get("line") for result in results[:2]] == [1, 3]
+    assert all(result["errors"] == imports.SAVE_ERROR for result in results[:2])
+    assert results[2] == {"summary": {"created": 0, "failed": 2}}
+    assert not Orders.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+def test_import_body_read_before_response(api_client, sample_product, monkeypatch):
+    """Test the whole body is spooled before the results start streaming"""
+    client, user = api_client
+    product = sample_product(user=user)
+    record = {
+        "payment_mode": "Cash",
+        "order_items": [{"product": product.id, "quantity": 1}],
+    }
+    monkeypatch.setattr(imports, "IMPORT_SPOOL_MAX_MEMORY", 16)
+
+    res = client.post(
+        IMPORT_URL, _ndjson(record, record), content_type="application/x-ndjson"
+    )
+    unread = res.wsgi_request._stream.remaining  # pylint: disable=protected-access
+    content = b"".join(res.streaming_content).decode()
+
+    assert unread == 0
+    assert json.loads(content.splitlines()[-1]) == {
+        "summary": {"created": 2, "failed": 0}
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("content_type", ["application/json", "text/plain"])
+def test_import_unsupported_media_type(api_client, content_type):
+    """Test bodies other than NDJSON are rejected"""
+    client, user = api_client
+
+    res = client.post(
+        IMPORT_URL, b'{"payment_mode": "Cash"}', content_type=content_type
+    )
+
+    assert res.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+    assert not Orders.objects.filter(user=user).exists()
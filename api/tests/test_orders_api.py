@@ -1,5 +1,10 @@
+import base64
+import json
+
 import pytest
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
@@ -12,6 +17,7 @@ from api.serializers import OrderSerializer
 from api.views import OrderViewSet
 
 ORDERS_URL = reverse("api:orders-list")
+ITEMS_URL = reverse("api:orderitem-list")
 
 
 def detail_orders_url(order_id):
@@ -39,12 +45,10 @@ def test_retrieve_orders(api_client, sample_product, sample_order):
     client, user = api_client
 
     item = {
-        "product": 1,
+        "product": sample_product(user=user).id,
         "quantity": 2,
     }
 
-    sample_product(user=user)
-
     product_selected = Products.objects.get(id=item["product"])
 
     total_price = OrderViewSet._calculate_total(  # pylint: disable=protected-access
@@ -67,9 +71,9 @@ def test_retrieve_orders(api_client, sample_product, sample_order):
     orders = Orders.objects.all().order_by("-id")
     serializer = OrderSerializer(orders, many=True)
 
-    assert len(res.data[0]["order_items"]) == 1
+    assert len(res.data["results"][0]["order_items"]) == 1
     assert res.status_code == status.HTTP_200_OK
-    assert res.data == serializer.data
+    assert res.data["results"] == serializer.data
 
 
 @pytest.mark.django_db
@@ -90,8 +94,8 @@ def test_orders_limited_to_user(custom_api_client, sample_user, sample_order):
     serializer = OrderSerializer(orders, many=True)
 
     assert res.status_code == status.HTTP_200_OK
-    assert len(res.data) == 1
-    assert res.data == serializer.data
+    assert len(res.data["results"]) == 1
+    assert res.data["results"] == serializer.data
 
 
 @pytest.mark.django_db
@@ -158,3 +162,241 @@ def test_view_order_items_detail(api_client, sample_product):
     assert len(res.data) == 7
     assert res.status_code == status.HTTP_200_OK
     assert response.status_code == status.HTTP_201_CREATED
+
+
+@pytest.mark.django_db
+def test_create_order_calculates_total(api_client, sample_product):
+    """Test creating an order prices every item and stores the order total"""
+
+    client, user = api_client
+
+    wine = sample_product(user=user, price=10)
+    rum = sample_product(user=user, name="Ron Cacique", price=20)
+    Products.objects.filter(id=rum.id).update(discount=50)
+
+    payload = {
+        "payment_mode": "Credit Card",
+        "order_items": [
+            {"product": wine.id, "quantity": 2},
+            {"product": rum.id, "quantity": 1},
+        ],
+    }
+    res = client.post(ORDERS_URL, payload, format="json")
+
+    order = Orders.objects.get(user=user)
+    items = OrderItem.objects.filter(order=order).order_by("id")
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert order.order_total == 30
+    assert [item.total_price for item in items] == [20, 10]
+
+
+@pytest.mark.django_db
+def test_create_order_invalid_product(api_client):
+    """Test that an order with an unknown product is rejected and not saved"""
+
+    client, user = api_client
+
+    payload = {
+        "payment_mode": "Credit Card",
+        "order_items": [{"product": 999, "quantity": 1}],
+    }
+    res = client.post(ORDERS_URL, payload, format="json")
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Orders.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "payload",
+    [
+        lambda pk: {"payment_mode": "Credit Card"},
+        lambda pk: {"payment_mode": "Credit Card", "order_items": "1"},
+        lambda pk: {"payment_mode": "Credit Card", "order_items": []},
+        lambda pk: {"payment_mode": "Credit Card", "order_items": [{"quantity": 1}]},
+        lambda pk: {
+            "payment_mode": "Credit Card",
+            "order_items": [{"product": "abc", "quantity": 1}],
+        },
+        lambda pk: {"payment_mode": "Credit Card", "order_items": [{"product": pk}]},
+        lambda pk: {"order_items": [{"product": pk, "quantity": 1}]},
+    ],
+)
+def test_create_order_malformed_payload(api_client, sample_product, payload):
+    """Test malformed orders are rejected with a 400 and not saved"""
+
+    client, user = api_client
+    product = sample_product(user=user)
+
+    res = client.post(ORDERS_URL, payload(product.id), format="json")
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert not Orders.objects.filter(user=user).exists()
+
+
+@pytest.mark.django_db
+def test_create_order_ignores_unknown_fields(api_client, sample_product):
+    """Test only the order fields of the payload are written"""
+
+    client, user = api_client
+    product = sample_product(user=user, price=10)
+
+    payload = {
+        "payment_mode": "Credit Card",
+        "order_total": 1,
+        "user": 999,
+        "order_items": [{"product": product.id, "quantity": 1}],
+    }
+    res = client.post(ORDERS_URL, payload, format="json")
+
+    assert res.status_code == status.HTTP_201_CREATED
+    assert Orders.objects.get(user=user).order_total == 10
+
+
+@pytest.mark.django_db
+def test_create_order_constant_queries(api_client, sample_product):
+    """Test that the number of queries doesn't grow with the basket size"""
+
+    client, user = api_client
+
+    products = [sample_product(user=user, name=f"Vino {i}") for i in range(40)]
+
+    def post_basket(basket):
+        payload = {
+            "payment_mode": "Credit Card",
+            "order_items": [{"product": p.id, "quantity": 1} for p in basket],
+        }
+        with CaptureQueriesContext(connection) as context:
+            res = client.post(ORDERS_URL, payload, format="json")
+        assert res.status_code == status.HTTP_201_CREATED
+        return len(context.captured_queries)
+
+    assert post_basket(products[:1]) == post_basket(products)
+
+
+def _create_orders_with_items(user, product, count):
+    """Bulk create `count` orders for the user, each with a single item"""
+    orders = Orders.objects.bulk_create(
+        [Orders(user=user, payment_mode="Credit Card") for _ in range(count)]
+    )
+    OrderItem.objects.bulk_create(
+        [
+            OrderItem(
+                order=order,
+                product=product,
+                quantity=1,
+                item_price=product.price,
+                total_price=product.price,
+            )
+            for order in orders
+        ]
+    )
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", [1, 100, 1000])
+def test_list_orders_constant_queries(
+    api_client, sample_product, django_assert_num_queries, count
+):
+    """Test listing orders loads their items with a single extra query"""
+
+    client, user = api_client
+    _create_orders_with_items(user, sample_product(user=user), count)
+
+    with django_assert_num_queries(3):
+        res = client.get(ORDERS_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert len(res.data["results"]) == min(count, 100)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", [1, 100, 1000])
+def test_list_order_items_constant_queries(
+    api_client, sample_product, django_assert_num_queries, count
+):
+    """Test listing order items runs a single query"""
+
+    client, user = api_client
+    _create_orders_with_items(user, sample_product(user=user), count)
+
+    with django_assert_num_queries(1):
+        res = client.get(ITEMS_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert len(res.data["results"]) == min(count, 100)
+
+
+@pytest.mark.django_db
+def test_list_orders_cursor_pagination(api_client, sample_order):
+    """Test walking the order list forward and back with cursor links"""
+
+    client, user = api_client
+
+    order_ids = sorted((sample_order(user=user).id for _ in range(5)), reverse=True)
+
+    res = client.get(ORDERS_URL, {"page_size": 2, "count": "true"})
+    assert res.data["count"] == 5
+    assert res.data["count_estimated"] is False
+    assert res.data["previous"] is None
+
+    seen, pages = [], []
+    url = res.data["next"]
+    seen += [order["id"] for order in res.data["results"]]
+    while url:
+        res = client.get(url)
+        pages.append(res.data)
+        seen += [order["id"] for order in res.data["results"]]
+        url = res.data["next"]
+
+    assert seen == order_ids
+
+    res = client.get(pages[0]["previous"])
+    assert [order["id"] for order in res.data["results"]] == order_ids[:2]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "value, counted",
+    [("true", True), ("1", True), ("Yes", True), ("false", False), ("0", False)],
+)
+def test_list_orders_count_param(api_client, sample_order, value, counted):
+    """Test the total is only counted when `count` is a true value"""
+
+    client, user = api_client
+    sample_order(user=user)
+
+    res = client.get(ORDERS_URL, {"count": value})
+
+    assert ("count" in res.data) is counted
+
+
+@pytest.mark.django_db
+def test_list_orders_invalid_cursor(api_client):
+    """Test that a malformed cursor is rejected"""
+
+    client, _ = api_client
+
+    res = client.get(ORDERS_URL, {"cursor": "not-a-cursor"})
+
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "position",
+    [["notadate", 1], ["2022-01-01", "abc"], ["2022-01-01", None], [{}, [1]]],
+)
+def test_list_orders_cursor_wrong_types(api_client, sample_order, position):
+    """Test that a cursor holding values of the wrong types is rejected"""
+
+    client, user = api_client
+    sample_order(user=user)
+    cursor = base64.urlsafe_b64encode(
+        json.dumps({"p": position, "r": 0}).encode("ascii")
+    ).decode("ascii")
+
+    res = client.get(ORDERS_URL, {"cursor": cursor})
+
+    assert res.status_code == status.HTTP_404_NOT_FOUND
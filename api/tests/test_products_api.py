@@ -1,6 +1,10 @@
+import io
+
 import pytest
 
+from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from PIL import Image
 
 from rest_framework.test import APIClient
 from rest_framework import status
@@ -46,7 +50,7 @@ def test_retrieve_products(api_client, sample_category, sample_product):
     serializer = ProductsSerializer(products, many=True)
 
     assert res.status_code == status.HTTP_200_OK
-    assert res.data == serializer.data
+    assert res.data["results"] == serializer.data
 
 
 @pytest.mark.django_db
@@ -65,8 +69,8 @@ def test_products_limited_to_user(api_client, sample_user, sample_product):
     serializer = ProductsSerializer(products, many=True)
 
     assert res.status_code == status.HTTP_200_OK
-    assert len(res.data) == 1
-    assert res.data == serializer.data
+    assert len(res.data["results"]) == 1
+    assert res.data["results"] == serializer.data
 
 
 @pytest.mark.django_db
@@ -84,3 +88,145 @@ def test_view_product_detail(api_client, sample_product, sample_category):
     serializer = ProductDetailSerializer(product)
 
     assert res.data == serializer.data
+
+
+@pytest.mark.django_db
+def test_filter_products_by_category(api_client, sample_product, sample_category):
+    """Test filtering products by category returns each product once"""
+
+    client, user = api_client
+
+    wine = sample_product(user=user)
+    rum = sample_product(user=user, name="Ron Cacique")
+    wine.category.add(
+        sample_category(user=user, name="Vinos"),
+        sample_category(user=user, name="Vinos"),
+    )
+    rum.category.add(sample_category(user=user, name="Rones"))
+
+    res = client.get(PRODUCTS_URL, {"category": "vinos"})
+
+    assert res.status_code == status.HTTP_200_OK
+    assert [product["id"] for product in res.data["results"]] == [wine.id]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", [1, 100])
+def test_list_products_constant_queries(
+    api_client, sample_category, django_assert_num_queries, count
+):
+    """Test listing products loads all categories with a single extra query"""
+
+    client, user = api_client
+
+    category = sample_category(user=user)
+    products = Products.objects.bulk_create(
+        [
+            Products(user=user, name=f"Vino {i}", price=10, weight="1", units="l")
+            for i in range(count)
+        ]
+    )
+    category.products_set.add(*products)
+
+    with django_assert_num_queries(3):
+        res = client.get(PRODUCTS_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert all(product["category"] == ["Vinos"] for product in res.data["results"])
+
+
+@pytest.fixture
+def image_settings(settings, tmp_path):
+    """Store uploads in a temporary directory with small upload limits"""
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.PRODUCT_IMAGES = {
+        "ASYNC": False,
+        "MAX_UPLOAD_BYTES": 100 * 1024,
+        "MAX_SIDE": 1000,
+        "MAX_PIXELS": 500_000,
+        "FORMATS": ("JPEG", "PNG"),
+    }
+    return tmp_path
+
+
+def _image_file(size=(100, 100), image_format="PNG", name="photo.png"):
+    """Return an uploaded image file"""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, "blue").save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@pytest.mark.django_db
+def test_upload_image(api_client, sample_product, image_settings):
+    """Test uploading an image streams it to the product's storage"""
+    client, user = api_client
+    product = sample_product(user=user)
+
+    res = client.post(
+        image_upload_url(product.id), {"image": _image_file()}, format="multipart"
+    )
+
+    product.refresh_from_db()
+    assert res.status_code == status.HTTP_200_OK
+    assert res.data["id"] == product.id
+    assert res.data["image"].endswith(product.image.name)
+    assert (image_settings / product.image.name).exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "upload, status_code",
+    [
+        (SimpleUploadedFile("photo.png", b"not an image"), 400),
+        (_image_file(image_format="GIF", name="photo.gif"), 400),
+        (_image_file(size=(1200, 10)), 413),
+        (_image_file(size=(800, 800)), 413),
+        (SimpleUploadedFile("photo.png", b"x" * 200 * 1024), 413),
+        (
+            SimpleUploadedFile("photo.png", _image_file().read() + b"\0" * 130 * 1024),
+            413,
+        ),
+    ],
+    ids=["invalid", "format", "side", "pixels", "content-length", "streamed"],
+)
+def test_upload_image_rejected(
+    api_client, sample_product, image_settings, upload, status_code
+):  # pylint: disable=unused-argument
+    """Test invalid, unsupported or oversized uploads are refused"""
+    client, user = api_client
+    product = sample_product(user=user)
+
+    res = client.post(
+        image_upload_url(product.id), {"image": upload}, format="multipart"
+    )
+
+    product.refresh_from_db()
+    assert res.status_code == status_code
+    assert "image" in res.data
+    assert not product.image
+    assert not list(image_settings.iterdir())
+
+
+@pytest.mark.django_db
+def test_upload_image_other_user(
+    api_client, sample_product, sample_user, image_settings
+):
+    """Test the image of another user's product can't be replaced"""
+    client, _ = api_client
+    product = sample_product(user=sample_user(email="other@bodegonasusalud.com"))
+
+    res = client.post(
+        image_upload_url(product.id), {"image": _image_file()}, format="multipart"
+    )
+
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_products_are_read_only(api_client):
+    """Test products can't be created through the list endpoint"""
+    client, _ = api_client
+
+    res = client.post(PRODUCTS_URL, {"name": "Vino"}, format="json")
+
+    assert res.status_code == status.HTTP_405_METHOD_NOT_ALLOWED
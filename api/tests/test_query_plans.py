@@ -0,0 +1,198 @@
+import json
+import random
+
+import pytest
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Categories, OrderItem, Orders, Products
+
+# EXPLAIN output is only comparable on the production database engine
+pytestmark = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="query plans require PostgreSQL"
+)
+
+USERS = 20
+PRODUCTS_PER_USER = 1000
+CATEGORIES_PER_USER = 10
+ORDERS_PER_USER = 1000
+ITEMS_PER_ORDER = 2
+
+# Tables that grow with the business: a per-user query must never scan them
+LARGE_TABLES = {
+    "core_products",
+    "core_products_category",
+    "core_orders",
+    "core_orderitem",
+}
+
+
+def _seed():
+    """Seed a dataset with realistic per-user selectivity and analyze it"""
+    rng = random.Random(0)
+    password = make_password("password123")
+    users = get_user_model().objects.bulk_create(
+        [
+            get_user_model()(email=f"user{i}@bodegonasusalud.com", password=password)
+            for i in range(USERS)
+        ]
+    )
+    categories = Categories.objects.bulk_create(
+        [
+            Categories(user=user, name=f"Category {i}")
+            for user in users
+            for i in range(CATEGORIES_PER_USER)
+        ]
+    )
+    products = Products.objects.bulk_create(
+        [
+            Products(
+                user=user,
+                name=f"Product {i}",
+                description="",
+                price=10,
+                weight="1",
+                units="l",
+                featured=i % 10 == 0,
+            )
+            for user in users
+            for i in range(PRODUCTS_PER_USER)
+        ]
+    )
+    Products.category.through.objects.bulk_create(
+        [
+            Products.category.through(
+                products_id=product.id, categories_id=rng.choice(categories).id
+            )
+            for product in products
+        ]
+    )
+    orders = Orders.objects.bulk_create(
+        [
+            Orders(user=user, payment_mode="Cash", order_total=20)
+            for user in users
+            for _ in range(ORDERS_PER_USER)
+        ]
+    )
+    OrderItem.objects.bulk_create(
+        [
+            OrderItem(
+                order=order,
+                product=rng.choice(products),
+                quantity=1,
+                item_price=10,
+                total_price=10,
+            )
+            for order in orders
+            for _ in range(ITEMS_PER_ORDER)
+        ]
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    return users[0]
+
+
+def _plan_nodes(plan):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan"""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _plan(sql):
+    """Return the large tables a query scans sequentially and its indexes
+
+    Sequential scans are disabled while planning: on a test sized dataset they
+    are often the cheapest plan, so one only shows up when no index can
+    serve the query at all.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+        plan = cursor.fetchone()[0]
+        cursor.execute("RESET enable_seqscan")
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = list(_plan_nodes(plan[0]["Plan"]))
+    scanned = {
+        node["Relation Name"]
+        for node in nodes
+        if node["Node Type"] == "Seq Scan" and node["Relation Name"] in LARGE_TABLES
+    }
+    return scanned, {node["Index Name"] for node in nodes if "Index Name" in node}
+
+
+@pytest.mark.django_db
+def test_viewset_queries_use_indexes():
+    """Test the viewset queries read their per-user indexes, not sequential scans"""
+    user = _seed()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    product = Products.objects.filter(user=user).first()
+    category = Categories.objects.filter(user=user).first()
+    orders = list(Orders.objects.filter(user=user).values_list("id", flat=True)[:3])
+    order_ids = ",".join(str(order_id) for order_id in orders)
+
+    # Request, and the indexes of core/migrations/0004 its queries must read
+    requests = [
+        (reverse("api:categories-list"), {}, set()),
+        (
+            reverse("api:products-list"),
+            {},
+            {"products_user_id_idx", "products_user_updated_idx"},
+        ),
+        (
+            reverse("api:products-list"),
+            {"category": category.name},
+            {"categories_name_idx"},
+        ),
+        (reverse("api:products-detail", args=[product.id]), {}, set()),
+        (
+            reverse("api:orders-list"),
+            {},
+            {
+                "orders_user_date_idx",
+                "orders_user_updated_idx",
+                "orderitem_order_product_idx",
+            },
+        ),
+        (reverse("api:orders-list"), {"order": order_ids, "count": "true"}, set()),
+        (reverse("api:orders-detail", args=[orders[0]]), {}, set()),
+        (reverse("api:orders-export"), {"status": "Created"}, set()),
+        (reverse("api:orderitem-list"), {}, set()),
+        (
+            reverse("api:orderitem-list"),
+            {"order": order_ids},
+            {"orderitem_order_product_idx"},
+        ),
+    ]
+
+    regressions = {}
+    missing = {}
+    for url, params, expected in requests:
+        read = set()
+        with CaptureQueriesContext(connection) as context:
+            res = client.get(url, params)
+            if res.streaming:
+                b"".join(res.streaming_content)
+        for query in context.captured_queries:
+            if not query["sql"].lstrip().upper().startswith("SELECT"):
+                continue
+            scanned, indexes = _plan(query["sql"])
+            read |= indexes
+            if scanned:
+                regressions[f"{url} {params}: {query['sql']}"] = scanned
+        if expected - read:
+            missing[f"{url} {params}"] = sorted(expected - read)
+
+    assert not regressions, json.dumps(
+        {query: sorted(tables) for query, tables in regressions.items()}, indent=2
+    )
+    assert not missing, json.dumps(missing, indent=2)
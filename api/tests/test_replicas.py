@@ -0,0 +1,174 @@
+import json
+
+import pytest
+
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+
+from core.db_routers import (
+    ReplicaRouter,
+    check_replica_cache,
+    reset_read_alias,
+    set_read_alias,
+)
+from core.models import Orders
+
+# The "replica" alias mirrors the test database through its own connection,
+# which only sees committed data
+pytestmark = pytest.mark.django_db(
+    transaction=True, databases=[DEFAULT_DB_ALIAS, "replica"]
+)
+
+ORDERS_URL = reverse("api:orders-list")
+IMPORT_URL = reverse("api:orders-bulk-import")
+
+
+@pytest.fixture
+def replicas(settings):
+    """Route the safe api requests to the "replica" alias"""
+    settings.REPLICA_ROUTING = {"REPLICAS": ["replica"], "STICKY_SECONDS": 60}
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def _queries(client, method, url, **kwargs):
+    """Return the response and the queries run on each database"""
+    with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary:
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            res = getattr(client, method)(url, **kwargs)
+    return res, len(primary), len(replica)
+
+
+def _order_payload(product):
+    """Return the payload of an order of one product"""
+    return {
+        "payment_mode": "Credit Card",
+        "order_items": [{"product": product.id, "quantity": 1}],
+    }
+
+
+def test_safe_requests_read_from_replica(replicas, api_client, sample_order):
+    """Test the list and retrieve actions only query the replica"""
+    client, user = api_client
+    order = sample_order(user)
+
+    listed, list_primary, list_replica = _queries(client, "get", ORDERS_URL)
+    retrieved, retrieve_primary, retrieve_replica = _queries(
+        client, "get", reverse("api:orders-detail", args=[order.id])
+    )
+
+    assert listed.status_code == status.HTTP_200_OK
+    assert listed.data["results"][0]["id"] == order.id
+    assert retrieved.status_code == status.HTTP_200_OK
+    assert list_primary == retrieve_primary == 0
+    assert list_replica > 0 and retrieve_replica > 0
+
+
+def test_writes_go_to_primary_and_stick(replicas, api_client, sample_product):
+    """Test a user who wrote reads from the primary until the window ends"""
+    client, user = api_client
+    product = sample_product(user=user)
+
+    created, create_primary, create_replica = _queries(
+        client, "post", ORDERS_URL, data=_order_payload(product), format="json"
+    )
+    sticky, sticky_primary, sticky_replica = _queries(client, "get", ORDERS_URL)
+    cache.clear()
+    _, later_primary, later_replica = _queries(client, "get", ORDERS_URL)
+
+    assert created.status_code == status.HTTP_201_CREATED
+    assert create_primary > 0 and create_replica == 0
+    assert len(sticky.data["results"]) == 1
+    assert sticky_primary > 0 and sticky_replica == 0
+    assert later_primary == 0 and later_replica > 0
+
+
+def test_streamed_import_sticks_after_writes(replicas, api_client, sample_product):
+    """Test the user is kept on the primary once the import stream is written"""
+    client, user = api_client
+    product = sample_product(user=user)
+    body = json.dumps(_order_payload(product)).encode()
+
+    res = client.post(IMPORT_URL, body, content_type="application/x-ndjson")
+    # Past the window opened by the response, before the orders are written
+    cache.clear()
+    b"".join(res.streaming_content)
+    sticky, primary, replica = _queries(client, "get", ORDERS_URL)
+
+    assert len(sticky.data["results"]) == 1
+    assert primary > 0 and replica == 0
+
+
+def test_failed_writes_do_not_stick(replicas, api_client):
+    """Test a rejected write leaves the user on the replica"""
+    client, _ = api_client
+    payload = {"payment_mode": "Credit Card", "order_items": [{"product": 999}]}
+
+    res = client.post(ORDERS_URL, payload, format="json")
+    _, primary, replica = _queries(client, "get", ORDERS_URL)
+
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert primary == 0 and replica > 0
+
+
+def test_no_replicas_read_from_primary(api_client):
+    """Test the reads stay on the primary without configured replicas"""
+    client, _ = api_client
+
+    res, primary, replica = _queries(client, "get", ORDERS_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert primary > 0 and replica == 0
+
+
+def test_router_scopes(replicas, sample_user):
+    """Test the router reads from the scope's replica and writes to primary"""
+    router = ReplicaRouter()
+    token = set_read_alias("replica")
+    try:
+        order = Orders.objects.create(user=sample_user(), payment_mode="Cash")
+        read = Orders.objects.get(pk=order.pk)
+        assert router.db_for_read(Orders) == "replica"
+    finally:
+        reset_read_alias(token)
+
+    assert read._state.db == "replica"  # pylint: disable=protected-access
+    assert order._state.db == DEFAULT_DB_ALIAS  # pylint: disable=protected-access
+    assert router.db_for_read(Orders) is None
+    assert router.db_for_write(Orders) == DEFAULT_DB_ALIAS
+    assert router.allow_relation(order, read)
+    assert router.allow_migrate("replica", "core") is False
+    assert router.allow_migrate(DEFAULT_DB_ALIAS, "core") is None
+
+
+@pytest.mark.parametrize(
+    "cache_alias,shared", [("default", False), ("missing", False), ("shared", True)]
+)
+def test_replicas_require_shared_cache(settings, cache_alias, shared):
+    """Test replicas can't be configured with a cache local to each worker"""
+    settings.REPLICA_ROUTING = {"REPLICAS": ["replica"], "CACHE": cache_alias}
+
+    if shared:
+        check_replica_cache()
+    else:
+        with pytest.raises(ImproperlyConfigured):
+            check_replica_cache()
+
+    settings.REPLICA_ROUTING = {"REPLICAS": [], "CACHE": "default"}
+    check_replica_cache()
+
+
+def test_database_cache_read_from_primary(replicas):
+    """Test the database cache entries are read where they are written"""
+    cache_model = caches["shared"].cache_model_class
+    token = set_read_alias("replica")
+    try:
+        assert ReplicaRouter().db_for_read(cache_model) == DEFAULT_DB_ALIAS
+    finally:
+        reset_read_alias(token)
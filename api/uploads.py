@@ -0,0 +1,113 @@
+import io
+from typing import Any, Optional
+
+from django.core.files.uploadhandler import StopUpload, TemporaryFileUploadHandler
+from django.http import HttpRequest, QueryDict
+from django.utils.datastructures import MultiValueDict
+from PIL import Image
+
+from core.images import image_settings
+
+# Images whose dimensions are not known after this many bytes are rejected
+MAX_HEADER_BYTES = 512 * 1024
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class ImageUploadError(Exception):
+    """Reason an image upload was stopped, with its HTTP status"""
+
+    def __init__(self, message: str, status_code: int) -> None:
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Stream an image upload to a temporary file, checking it as it arrives
+
+    The request is refused from its Content-Length, and the upload stopped
+    without reading the rest of the body as soon as it grows past the size
+    limit or its header shows an unsupported format or oversized dimensions.
+    Only the image header is decoded. The reason is left in
+    `request.upload_error`.
+    """
+
+    def __init__(self, request: HttpRequest, field_name: str = "image") -> None:
+        super().__init__(request)
+        config = image_settings()
+        self.field_name = field_name
+        self.max_bytes = config["MAX_UPLOAD_BYTES"]
+        self.max_side = config["MAX_SIDE"]
+        self.max_pixels = config["MAX_PIXELS"]
+        self.formats = tuple(config["FORMATS"])
+        self.received = 0
+        self.header: Optional[bytearray] = None
+        self.size: Optional[tuple[int, int]] = None
+
+    def abort(self, message: str, status_code: int = 400) -> None:
+        """Drop the temporary file and stop reading the request body"""
+        self.request.upload_error = ImageUploadError(message, status_code)
+        if getattr(self, "file", None) is not None:
+            self.file.close()
+        raise StopUpload(connection_reset=True)
+
+    def handle_raw_input(
+        self,
+        input_data: Any,
+        META: dict,  # pylint: disable=invalid-name
+        content_length: int,
+        boundary: bytes,
+        encoding: Optional[str] = None,
+    ) -> Optional[tuple[QueryDict, MultiValueDict]]:
+        """Refuse bodies that announce more than the size limit, unread"""
+        super().handle_raw_input(input_data, META, content_length, boundary, encoding)
+        if content_length > self.max_bytes + MULTIPART_OVERHEAD:
+            self.request.upload_error = ImageUploadError("The image is too large.", 413)
+            return QueryDict(), MultiValueDict()
+        return None
+
+    def new_file(self, field_name: str, *args: Any, **kwargs: Any) -> None:
+        """Start a temporary file for the image field only"""
+        if field_name != self.field_name or self.header is not None:
+            self.abort(f"Upload a single file in the {self.field_name} field.")
+        self.header = bytearray()
+        super().new_file(field_name, *args, **kwargs)
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> Optional[bytes]:
+        """Write a chunk to disk, checking the size and the image header"""
+        self.received += len(raw_data)
+        if self.received > self.max_bytes:
+            self.abort("The image is too large.", 413)
+        if self.size is None:
+            self._check_header(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size: int) -> Any:
+        """Return the temporary file if its header was read"""
+        if self.size is None:
+            self._check_header(b"", complete=True)
+        return super().file_complete(file_size)
+
+    def _check_header(self, data: bytes, complete: bool = False) -> None:
+        """Read the format and dimensions once enough of the header arrived"""
+        assert self.header is not None
+        self.header += data
+        try:
+            # Opening only parses the header, pixels are decoded on load()
+            with Image.open(io.BytesIO(self.header), formats=self.formats) as image:
+                width, height = image.size
+        except Image.DecompressionBombError:
+            self.abort("The image dimensions are too large.", 413)
+        except (OSError, SyntaxError, ValueError):
+            if complete or len(self.header) > MAX_HEADER_BYTES:
+                self.abort(
+                    "Upload a valid image. Supported formats: "
+                    + ", ".join(self.formats)
+                    + "."
+                )
+            return
+        if max(width, height) > self.max_side or width * height > self.max_pixels:
+            self.abort("The image dimensions are too large.", 413)
+        self.size = (width, height)
+        self.header = bytearray()
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from api import views
+from api import async_views, views
 
 router = DefaultRouter()
 router.register("categories", views.CategoriesViewSet)
@@ -9,8 +9,18 @@ router.register("products", views.ProductsViewSet)
 router.register("orders", views.OrderViewSet)
 router.register("items", views.OrderItemViewSet)
 
+# Async variants of the read-only actions, for ASGI deployments
+async_urlpatterns = [
+    path("categories/", async_views.categories_list, name="async-categories-list"),
+    path("products/", async_views.products_list, name="async-products-list"),
+    path("products/<pk>/", async_views.products_detail, name="async-products-detail"),
+    path("orders/", async_views.orders_list, name="async-orders-list"),
+    path("items/", async_views.items_list, name="async-orderitem-list"),
+]
+
 app_name = "api"  # pylint: disable=invalid-name
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("async/", include(async_urlpatterns)),
 ]
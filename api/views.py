@@ -1,31 +1,71 @@
 from typing import Union, Any
+from django.db import transaction
+from django.http import HttpRequest, StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from rest_framework.decorators import action
+from rest_framework.exceptions import UnsupportedMediaType, ValidationError
+from rest_framework.parsers import MultiPartParser
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
-from core.models import Categories, Products, Orders, OrderItem
-from api import serializers
+from core.models import Categories, Products, Orders, OrderItem, ORDER_STATUS_CHOICES
+from api import pagination, serializers
+from api.exports import EXPORT_FORMATS
+from api.imports import import_orders, spool_body
+from api.uploads import ImageUploadHandler
+from api.cache import CachedListMixin, CachedRetrieveMixin
+from api.conditional import ConditionalListMixin, ConditionalRetrieveMixin
+from api.fast_read import FastReadListMixin
+from api.fieldsets import SparseFieldsetMixin
+from api.replicas import ReplicaReadMixin
+from core.db_routers import read_alias
+from user.authentication import CachedTokenAuthentication
 
 
-class CategoriesViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
+class CategoriesViewSet(
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    ConditionalListMixin,
+    CachedListMixin,
+    viewsets.GenericViewSet,
+    mixins.ListModelMixin,
+):
     """Manage Categories in the database"""
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     queryset = Categories.objects.all()
     serializer_class = serializers.CategoriesSerializer
 
 
-class ProductsViewSet(viewsets.ModelViewSet):
+class ProductsViewSet(
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    CachedListMixin,
+    CachedRetrieveMixin,
+    FastReadListMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """Manage Products in the database"""
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
-    queryset = Products.objects.all()
+    queryset = Products.objects.prefetch_related("category")
     serializer_class = serializers.ProductsSerializer
-    http_method_names = ["get"]
+    pagination_class = pagination.ProductsPagination
+    http_method_names = ["get", "post"]
+
+    def initialize_request(self, request: HttpRequest, *args: Any, **kwargs: Any):
+        """Stream image uploads through the checking upload handler"""
+        drf_request = super().initialize_request(request, *args, **kwargs)
+        if self.action == "upload_image":
+            request.upload_handlers = [ImageUploadHandler(request)]
+        return drf_request
 
     def get_queryset(self):
         """Retrieve products for the authenticated user"""
@@ -33,7 +73,12 @@ class ProductsViewSet(viewsets.ModelViewSet):
         queryset = self.queryset
 
         if category:
-            queryset = queryset.filter(category__name__in=[category.title()])
+            # Filter through a subquery on the M2M table rather than a join, so
+            # a product is never returned twice for the same category name.
+            product_ids = Products.category.through.objects.filter(
+                categories__name__in=[category.title()]
+            ).values("products_id")
+            queryset = queryset.filter(id__in=product_ids)
 
         return queryset.filter(user=self.request.user)
 
@@ -41,18 +86,46 @@ class ProductsViewSet(viewsets.ModelViewSet):
         """Return appropriate serializer class"""
         if self.action == "retrieve":  # pylint: disable=no-else-return
             return serializers.ProductDetailSerializer
-        elif self.action == "upload-image":
-            pass
+        elif self.action == "upload_image":
+            return serializers.ProductImageSerializer
         return self.serializer_class
 
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path="upload-image",
+        parser_classes=[MultiPartParser],
+    )
+    def upload_image(self, request: Request, pk: Any = None) -> Response:
+        """Upload an image to a product"""
+        # pylint: disable=unused-argument
+        product = self.get_object()
+        serializer = self.get_serializer(product, data=request.data)
+        error = getattr(
+            request._request, "upload_error", None  # pylint: disable=protected-access
+        )
+        if error is not None:
+            return Response({"image": [error.message]}, status=error.status_code)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(
+    ReplicaReadMixin,
+    SparseFieldsetMixin,
+    ConditionalListMixin,
+    ConditionalRetrieveMixin,
+    FastReadListMixin,
+    viewsets.ModelViewSet,
+):
     """Manage orders in the database"""
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
-    queryset = Orders.objects.all()
+    queryset = Orders.objects.prefetch_related("order_items")
     serializer_class = serializers.OrderSerializer
+    pagination_class = pagination.OrderPagination
 
     @staticmethod
     def _params_to_ints(qs: list[str]) -> list[int]:
@@ -70,6 +143,66 @@ class OrderViewSet(viewsets.ModelViewSet):
 
         return queryset.filter(user=self.request.user)
 
+    def _filter_export(self, queryset):
+        """Apply the date range and status filters of an export"""
+        params = self.request.query_params
+        for param, lookup in (("date_from", "gte"), ("date_to", "lte")):
+            value = params.get(param)
+            if value is None:
+                continue
+            try:
+                date = parse_date(value)
+            except ValueError:
+                date = None
+            if date is None:
+                raise ValidationError({param: ["Enter a date as YYYY-MM-DD."]})
+            queryset = queryset.filter(**{f"order_date__{lookup}": date})
+
+        order_status = params.get("status")
+        if order_status is not None:
+            if order_status not in dict(ORDER_STATUS_CHOICES):
+                raise ValidationError({"status": ["Invalid order status."]})
+            queryset = queryset.filter(order_status=order_status)
+        return queryset
+
+    @action(detail=False, methods=["get"])
+    def export(self, request: Request) -> StreamingHttpResponse:
+        """Stream the user's orders and their items as NDJSON or CSV"""
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            raise ValidationError(
+                {"output": [f"Choose one of {list(EXPORT_FORMATS)}."]}
+            )
+        stream, content_type = EXPORT_FORMATS[output]
+
+        # The rows are read while the body streams, after the request's read
+        # routing is reset, so the queryset is pinned to its database now
+        queryset = self._filter_export(
+            Orders.objects.using(read_alias()).filter(user=request.user)
+        )
+        response = StreamingHttpResponse(stream(queryset), content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="orders.{output}"'
+        return response
+
+    @action(detail=False, methods=["post"], url_path="import")
+    def bulk_import(self, request: Request) -> StreamingHttpResponse:
+        """Import NDJSON orders, streaming back one NDJSON result per record"""
+        media_type = request.content_type.split(";")[0].strip().lower()
+        if media_type != "application/x-ndjson":
+            raise UnsupportedMediaType(media_type)
+        body = spool_body(request.stream)
+        encoder = JSONEncoder()
+
+        def lines():
+            try:
+                results = import_orders(body, request.user, self._calculate_total)
+                for result in results:
+                    yield encoder.encode(result) + "\n"
+            finally:
+                body.close()
+
+        return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
+
     @staticmethod
     def _calculate_total(
         price: Union[int, float], discount: float, quantity: int
@@ -83,41 +216,69 @@ class OrderViewSet(viewsets.ModelViewSet):
 
     # pylint: disable=unused-argument
     def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        """Create a new order"""
-        order_total = []
-        orders_data = request.data.pop("order_items")
-        order = Orders.objects.create(user=request.user, **request.data)
-        order.save()
-        for order_data in orders_data:
-            order_product_id = order_data.get("product")
-            product = Products.objects.get(id=order_product_id)
-            total_price = self._calculate_total(
-                product.price, product.discount, order_data.get("quantity")
-            )
-            order_total.append(total_price)
-            order_item = OrderItem.objects.create(
-                order=order,
-                product=product,
-                quantity=order_data.get("quantity"),
-                item_price=product.price,
-                discount=product.discount,
-                total_price=total_price,
-            )
-            order_item.save()
-        order_total = sum(order_total)
-        Orders.objects.filter(id=order.id).update(order_total=order_total)
+        """Create a new order and its items in a single transaction"""
+        serializer = serializers.OrderImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = dict(serializer.validated_data)
+        orders_data = data.pop("order_items")
+        product_ids = {order_data["product"] for order_data in orders_data}
+
+        with transaction.atomic():
+            products = Products.objects.in_bulk(product_ids)
+            missing_ids = product_ids - products.keys()
+            if missing_ids:
+                raise ValidationError(
+                    {
+                        "order_items": [
+                            f"Invalid product id {pk}." for pk in sorted(missing_ids)
+                        ]
+                    }
+                )
+            tracking_number = data.get("tracking_number")
+            if (
+                tracking_number
+                and Orders.objects.filter(tracking_number=tracking_number).exists()
+            ):
+                raise ValidationError(
+                    {"tracking_number": ["Order with this tracking number exists."]}
+                )
+
+            order = Orders(user=request.user, **data)
+            order_items = []
+            for order_data in orders_data:
+                product = products[order_data["product"]]
+                total_price = self._calculate_total(
+                    product.price, product.discount, order_data["quantity"]
+                )
+                order_items.append(
+                    OrderItem(
+                        order=order,
+                        product=product,
+                        quantity=order_data["quantity"],
+                        item_price=product.price,
+                        discount=product.discount,
+                        total_price=total_price,
+                    )
+                )
+            order.order_total = sum(item.total_price for item in order_items)
+            order.save()
+            OrderItem.objects.bulk_create(order_items)
+
         return Response(
             {"message": "Order created successfully."}, status.HTTP_201_CREATED
         )
 
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+class OrderItemViewSet(
+    ReplicaReadMixin, SparseFieldsetMixin, FastReadListMixin, viewsets.ModelViewSet
+):
     """Manage order items for a specific order"""
 
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
-    queryset = OrderItem.objects.all()
+    queryset = OrderItem.objects.select_related("order", "product")
     serializer_class = serializers.OrderItemSerializer
+    pagination_class = pagination.OrderItemPagination
 
     @staticmethod
     def _params_to_ints(qs: list[str]) -> list[int]:
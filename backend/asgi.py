@@ -2,6 +2,9 @@
 ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve it with ``uvicorn backend.asgi:application`` (or gunicorn with
+``-k uvicorn.workers.UvicornWorker``); the async read views live under
+``/api/async/``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
@@ -43,9 +43,13 @@ INSTALLED_APPS = [
     "django_extensions",
     "core",
     "user",
+    "api",
 ]
 
 MIDDLEWARE = [
+    "core.instrumentation.RequestTimingMiddleware",
+    "core.metrics.MetricsMiddleware",
+    "core.slow_queries.SlowQueryMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -55,6 +59,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
+    "core.profiling.RequestProfilingMiddleware",
 ]
 
 ROOT_URLCONF = "backend.urls"
@@ -81,6 +86,116 @@ REST_FRAMEWORK = {
     "COERCE_DECIMAL_TO_STRING": False,
 }
 
+# "default" is local to each process. "shared" is seen by every worker and
+# node, in the table created by `python manage.py createcachetable`.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+    },
+}
+
+# Cache for the catalog (products and categories) GET responses. The local
+# backend is per process, so TIMEOUT bounds how long other workers may serve a
+# stale catalog. Use "api.cache.SharedBackend" with OPTIONS
+# {"alias": "<CACHES alias>"} to share entries and invalidation between nodes.
+CATALOG_CACHE = {
+    "BACKEND": "api.cache.LocalLRUBackend",
+    "OPTIONS": {"max_bytes": 32 * 1024 * 1024},
+    "TIMEOUT": 60,
+}
+
+# Per-process cache of api token -> user lookups. TIMEOUT bounds how long
+# other workers may keep accepting a deleted token or a deactivated user.
+TOKEN_AUTH_CACHE = {
+    "MAX_ENTRIES": 10000,
+    "TIMEOUT": 60,
+}
+
+# The product, order and order item lists are serialized from values_list()
+# rows by precompiled field getters (see api.fast_read) instead of model
+# instances, with the same output. Disable to list through the serializers.
+FAST_READ = {
+    "ENABLED": os.environ.get("DJANGO_FAST_READ", "1") == "1",
+}
+
+# Per-request query count and db/auth/serialize/view/render timings, sent as a
+# Server-Timing header and logged as JSON on the "core.instrumentation" logger
+# for a SAMPLE_RATE fraction of the requests. Requests slower than
+# SLOW_REQUEST_MS are always logged, with their total time only.
+REQUEST_TIMING = {
+    "SAMPLE_RATE": float(os.environ.get("DJANGO_REQUEST_TIMING_SAMPLE_RATE", 0.05)),
+    "SERVER_TIMING_HEADER": True,
+    "LOG": True,
+    "SLOW_REQUEST_MS": 1000,
+}
+
+# On-demand cProfile of requests carrying "X-Profile: <HEADER_TOKEN>", or of a
+# sample of a route's requests, e.g. ROUTES {"OrderViewSet.create": 0.01}.
+REQUEST_PROFILING = {
+    "HEADER_TOKEN": os.environ.get("DJANGO_PROFILING_TOKEN", ""),
+    "ROUTES": {},
+    "DIRECTORY": os.environ.get("DJANGO_PROFILING_DIR", BASE_DIR / "profiles"),
+    "FORMAT": "pstats",
+    "MAX_BYTES": 100 * 1024 * 1024,
+}
+
+# Request counters and latency histograms per view or viewset action, served at
+# /metrics. Every worker writes its values to a file in DIRECTORY, which must
+# be shared by the workers of a server and emptied when it starts. Scrapes need
+# the bearer TOKEN, without one they are denied unless ALLOW_ANONYMOUS is set.
+METRICS = {
+    "DIRECTORY": os.environ.get("DJANGO_METRICS_DIR", ""),
+    "TOKEN": os.environ.get("DJANGO_METRICS_TOKEN", ""),
+    "ALLOW_ANONYMOUS": os.environ.get("DJANGO_METRICS_ALLOW_ANONYMOUS") == "1",
+}
+
+# Statements slower than THRESHOLD_MS are logged with their view or viewset
+# action and saved with a trimmed stack and the plan of SELECTs (see the
+# slow_queries command and the admin). Only the newest CAPACITY are kept.
+# STORE_PARAMS also saves their bound parameters, with strings redacted.
+SLOW_QUERY_LOG = {
+    "THRESHOLD_MS": int(os.environ.get("DJANGO_SLOW_QUERY_MS", 200)),
+    "CAPACITY": 500,
+    "EXPLAIN": True,
+    "ASYNC": True,
+    "STACK_DEPTH": 8,
+    "STORE_PARAMS": False,
+}
+
+# Resized WebP/JPEG copies of product images, built in a process pool after
+# each upload (and by the build_image_derivatives command for existing ones),
+# and the limits checked while an upload streams in.
+PRODUCT_IMAGES = {
+    "WIDTHS": (200, 400, 800, 1600),
+    "QUALITY": 80,
+    "WORKERS": int(os.environ.get("DJANGO_IMAGE_WORKERS", 2)),
+    "ASYNC": True,
+    "MAX_UPLOAD_BYTES": 20 * 1024 * 1024,
+    "MAX_SIDE": 8000,
+    "MAX_PIXELS": 40_000_000,
+    "FORMATS": ("JPEG", "PNG", "WEBP"),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "core.instrumentation": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "core.slow_queries": {
+            "handlers": ["console"],
+            "level": "WARNING",
+            "propagate": False,
+        },
+    },
+}
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:80",
     "http://backend:8000",
@@ -96,19 +211,70 @@ CORS_ALLOWED_ORIGINS = [
 # Database
 # https://docs.djangoproject.com/en/4.0/ref/settings/#databases
 
+TESTING = any("test" in arg or "pytest" in arg for arg in sys.argv)
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "core.backends.postgresql",
         "NAME": "postgres",
         "USER": "postgres",
         "PASSWORD": "postgres",
-        "HOST": "db"
-        if not any("test" in arg or "pytest" in arg for arg in sys.argv)
-        else "localhost",
+        "HOST": "db" if not TESTING else "localhost",
         "PORT": 5432,
     }
 }
 
+# Read replicas of the default database, one "replica<n>" alias per host of
+# the comma-separated DJANGO_DB_REPLICA_HOSTS, with the default's credentials.
+# In tests a "replica" alias mirrors the default, so the routing can be
+# exercised against a single database.
+REPLICA_HOSTS = [
+    host.strip()
+    for host in os.environ.get("DJANGO_DB_REPLICA_HOSTS", "").split(",")
+    if host.strip()
+]
+for index, replica_host in enumerate(REPLICA_HOSTS, start=1):
+    DATABASES[f"replica{index}"] = {
+        **DATABASES["default"],
+        "HOST": replica_host,
+        "TEST": {"MIRROR": "default"},
+    }
+if TESTING:
+    DATABASES["replica"] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+
+# Connections of the PostgreSQL databases come from a pool per process (see
+# core.backends.postgresql), returned to it at the end of each request. A
+# server needs up to (SIZE + MAX_OVERFLOW) x databases x workers connections,
+# which must fit in Postgres' max_connections. The db_pool_* metrics report
+# checkouts, their wait time, overflow and timeouts.
+DB_POOL = {
+    "SIZE": int(os.environ.get("DJANGO_DB_POOL_SIZE", 5)),
+    "MAX_OVERFLOW": int(os.environ.get("DJANGO_DB_POOL_MAX_OVERFLOW", 5)),
+    "TIMEOUT": 10,
+    "MAX_LIFETIME": 30 * 60,
+    "IDLE_TIMEOUT": 5 * 60,
+    "HEALTH_CHECK": True,
+}
+
+DATABASE_ROUTERS = ["core.db_routers.ReplicaRouter"]
+
+# Safe requests of the api viewsets read from a random replica of REPLICAS
+# (see core.db_routers), none by default. After a successful write a user
+# reads from the primary for STICKY_SECONDS, recorded in the CACHE alias. It
+# must be shared by the workers: startup fails with replicas and a local cache.
+REPLICA_ROUTING = {
+    "REPLICAS": [f"replica{index}" for index in range(1, len(REPLICA_HOSTS) + 1)],
+    "STICKY_SECONDS": int(os.environ.get("DJANGO_REPLICA_STICKY_SECONDS", 5)),
+    "CACHE": "shared",
+}
+
+# Threads per process running the queries of the async (ASGI) read views under
+# /api/async/. Each keeps its own connection, so THREADS times the number of
+# ASGI workers must fit within the database's max_connections.
+ASYNC_DB = {
+    "THREADS": int(os.environ.get("DJANGO_ASYNC_DB_THREADS", 8)),
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.0/ref/settings/#auth-password-validators
 
@@ -147,6 +313,22 @@ STATIC_ROOT = BASE_DIR / "static"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = os.environ.get("DJANGO_MEDIA_ROOT", "media")
 
+# How media files are delivered: "django" streams them (development),
+# "x-accel-redirect" (nginx, with an internal location aliased to MEDIA_ROOT
+# at INTERNAL_PREFIX) and "x-sendfile" only authorize the request and let the
+# front proxy send the file. BASE_URL points media URLs at a CDN, and
+# SIGNED_URLS makes them expire after SIGNED_URL_TTL to 2 * SIGNED_URL_TTL.
+# Without DEBUG, Django only serves media when SIGNED_URLS is on.
+MEDIA_DELIVERY = {
+    "MODE": os.environ.get("DJANGO_MEDIA_DELIVERY", "django"),
+    "INTERNAL_PREFIX": "/protected-media/",
+    "BASE_URL": os.environ.get("DJANGO_MEDIA_BASE_URL", ""),
+    "SIGNED_URLS": os.environ.get("DJANGO_MEDIA_SIGNED_URLS") == "1",
+    "SIGNED_URL_TTL": 3600,
+    "IMMUTABLE_MAX_AGE": 365 * 24 * 3600,
+    "MAX_AGE": 3600,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.0/ref/settings/#default-auto-field
 
@@ -0,0 +1,28 @@
+"""
+Production settings for backend project.
+
+The development settings without the apps only used in development, and
+with DEBUG, the secret key and the allowed hosts taken from the environment.
+gunicorn.conf.py selects them unless DJANGO_SETTINGS_MODULE is set.
+"""
+
+# pylint: disable=wildcard-import,unused-wildcard-import
+from django.core.exceptions import ImproperlyConfigured
+
+from backend.settings import *
+
+# Apps only needed by management commands in development
+DEV_APPS = ("django_extensions",)
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEV_APPS]
+
+DEBUG = os.environ.get("DJANGO_DEBUG") == "1"
+
+# Never the development key committed in backend.settings
+SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "")
+if not SECRET_KEY:
+    raise ImproperlyConfigured("DJANGO_SECRET_KEY must be set in production.")
+
+ALLOWED_HOSTS = os.environ.get("DJANGO_ALLOWED_HOSTS", ",".join(ALLOWED_HOSTS)).split(
+    ","
+)
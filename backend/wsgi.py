@@ -2,6 +2,8 @@
 WSGI config for backend project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+In production serve it with ``gunicorn`` from the project directory, which
+reads gunicorn.conf.py.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/wsgi/
@@ -10,7 +12,13 @@ https://docs.djangoproject.com/en/4.0/howto/deployment/wsgi/
 import os
 
 from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Import the URLconf, with the views and serializers, and build its reverse
+# lookups while loading rather than on the first request of each worker:
+# preloaded gunicorn workers share them with the master
+get_resolver().reverse_dict  # pylint: disable=pointless-statement
@@ -0,0 +1,196 @@
+import asyncio
+import io
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from benchmarks.conftest import CONCURRENCY, CONCURRENCY_RESULTS
+from benchmarks.seed import BENCH_EMAIL
+
+
+class ThreadSampler:
+    """Record the peak number of threads while in use"""
+
+    def __init__(self, interval: float = 0.002) -> None:
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, threading.active_count())
+
+    def __enter__(self) -> "ThreadSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        # Not counting the sampler itself
+        self.peak -= 1
+
+
+def _environ(path, token):
+    """Return the WSGI environ of an authenticated GET"""
+    return {
+        "REQUEST_METHOD": "GET",
+        "SCRIPT_NAME": "",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "HTTP_HOST": "testserver",
+        "HTTP_AUTHORIZATION": f"Token {token}",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+
+def _wsgi_run(path, token, clients, delay, threads):
+    """Serve the clients from a WSGI worker with a fixed number of threads
+
+    A thread writes the response to its client itself, so it is held until
+    the slow client has read every chunk.
+    """
+    application = WSGIHandler()
+    start = time.perf_counter()
+
+    def serve():
+        statuses = []
+        body = application(
+            _environ(path, token), lambda status, headers: statuses.append(status)
+        )
+        chunks = []
+        try:
+            for chunk in body:
+                chunks.append(chunk)
+                time.sleep(delay)
+        finally:
+            body.close()
+        return int(statuses[0].split()[0]), b"".join(chunks), time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        futures = [pool.submit(serve) for _ in range(clients)]
+        responses = [future.result() for future in futures]
+    return start, responses
+
+
+async def _asgi_request(application, path, token, delay):
+    """Send one request to an ASGI application as a slow client"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"host", b"testserver"),
+            (b"authorization", f"Token {token}".encode()),
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    requested = asyncio.Event()
+    response = {"status": None, "chunks": []}
+
+    async def receive():
+        if requested.is_set():
+            # The client stays connected
+            await asyncio.Event().wait()
+        requested.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["chunks"].append(message.get("body", b""))
+            await asyncio.sleep(delay)
+
+    await application(scope, receive, send)
+    return response["status"], b"".join(response["chunks"]), time.perf_counter()
+
+
+def _asgi_run(path, token, clients, delay):
+    """Serve the clients concurrently from a single ASGI event loop"""
+    application = ASGIHandler()
+
+    async def run():
+        return await asyncio.gather(
+            *(_asgi_request(application, path, token, delay) for _ in range(clients))
+        )
+
+    start = time.perf_counter()
+    return start, asyncio.run(run())
+
+
+# Each run serves the same list action through (server, url name)
+RUNS = {
+    "products-list wsgi": ("wsgi", "api:products-list"),
+    "products-list asgi": ("asgi", "api:products-list"),
+    "products-list asgi async view": ("asgi", "api:async-products-list"),
+    "orders-list wsgi": ("wsgi", "api:orders-list"),
+    "orders-list asgi": ("asgi", "api:orders-list"),
+    "orders-list asgi async view": ("asgi", "api:async-orders-list"),
+}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", RUNS)
+def test_concurrent_slow_clients(name):
+    """Serve concurrent slow clients through WSGI threads or an ASGI loop"""
+    server, url_name = RUNS[name]
+    token = Token.objects.get(user__email=BENCH_EMAIL).key
+    path = reverse(url_name)
+    clients = CONCURRENCY["clients"]
+    delay = CONCURRENCY["client_delay_ms"] / 1000
+
+    with ThreadSampler() as sampler:
+        if server == "wsgi":
+            start, responses = _wsgi_run(
+                path, token, clients, delay, CONCURRENCY["wsgi_threads"]
+            )
+        else:
+            start, responses = _asgi_run(path, token, clients, delay)
+
+    # Errors are counted rather than failing the run: running out of database
+    # connections under load is one of the outcomes being compared
+    pages = {
+        json.dumps(json.loads(body)["results"])
+        for status, body, _ in responses
+        if status == 200
+    }
+    assert len(pages) <= 1, name
+    latencies = sorted((end - start) * 1000 for _, _, end in responses)
+    wall_ms = latencies[-1]
+    CONCURRENCY_RESULTS[name] = {
+        "errors": sum(status != 200 for status, _, _ in responses),
+        "wall_ms": wall_ms,
+        "rps": clients / wall_ms * 1000,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": statistics.quantiles(latencies, n=20, method="inclusive")[18],
+        "peak_threads": sampler.peak,
+    }
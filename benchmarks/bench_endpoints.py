@@ -0,0 +1,224 @@
+import itertools
+import json
+import statistics
+import time
+
+import pytest
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import Categories, OrderItem, Orders, Products
+
+from benchmarks.conftest import (
+    RESULTS,
+    ROUNDS,
+    SLACK_MS,
+    TIMING_BUDGETS,
+    TOLERANCE,
+    UPDATE_BASELINES,
+)
+from benchmarks.seed import BENCH_EMAIL, BENCH_PASSWORD
+
+_counter = itertools.count()
+
+
+def _new_order(ctx):
+    """Create an order with one item for actions that consume one"""
+    order = Orders.objects.create(user=ctx["user"], payment_mode="Cash")
+    item = OrderItem.objects.create(
+        order=order,
+        product=ctx["product"],
+        quantity=1,
+        item_price=ctx["product"].price,
+        total_price=ctx["product"].price,
+    )
+    return order, item
+
+
+def _basket(ctx, size=40):
+    """Return an order payload with `size` items"""
+    return {
+        "payment_mode": "Credit Card",
+        "order_items": [
+            {"product": product_id, "quantity": 1}
+            for product_id in itertools.islice(itertools.cycle(ctx["products"]), size)
+        ],
+    }
+
+
+def _import_body(ctx, size=100):
+    """Return an NDJSON body of `size` orders"""
+    record = json.dumps(_basket(ctx, size=3))
+    return "\n".join([record] * size)
+
+
+# Each case returns (method, url, payload) for one round, the "ndjson" method
+# posts the payload as an NDJSON body
+CASES = {
+    "categories-list": lambda ctx: ("get", reverse("api:categories-list"), None),
+    "products-list": lambda ctx: ("get", reverse("api:products-list"), None),
+    "products-list-category": lambda ctx: (
+        "get",
+        reverse("api:products-list"),
+        {"category": ctx["category"].name},
+    ),
+    "products-retrieve": lambda ctx: (
+        "get",
+        reverse("api:products-detail", args=[ctx["product"].id]),
+        None,
+    ),
+    "orders-list": lambda ctx: ("get", reverse("api:orders-list"), None),
+    "orders-retrieve": lambda ctx: (
+        "get",
+        reverse("api:orders-detail", args=[ctx["order"].id]),
+        None,
+    ),
+    "orders-create": lambda ctx: ("post", reverse("api:orders-list"), _basket(ctx)),
+    "orders-partial-update": lambda ctx: (
+        "patch",
+        reverse("api:orders-detail", args=[ctx["order"].id]),
+        {"is_paid": True},
+    ),
+    "orders-destroy": lambda ctx: (
+        "delete",
+        reverse("api:orders-detail", args=[_new_order(ctx)[0].id]),
+        None,
+    ),
+    "orders-export": lambda ctx: ("get", reverse("api:orders-export"), None),
+    "orders-import": lambda ctx: (
+        "ndjson",
+        reverse("api:orders-bulk-import"),
+        _import_body(ctx),
+    ),
+    "items-list": lambda ctx: ("get", reverse("api:orderitem-list"), None),
+    "items-retrieve": lambda ctx: (
+        "get",
+        reverse("api:orderitem-detail", args=[ctx["item"].id]),
+        None,
+    ),
+    "items-create": lambda ctx: (
+        "post",
+        reverse("api:orderitem-list"),
+        {
+            "order": ctx["order"].id,
+            "product": ctx["product"].id,
+            "quantity": 1,
+            "item_price": "10.00",
+            "total_price": "10.00",
+        },
+    ),
+    "items-partial-update": lambda ctx: (
+        "patch",
+        reverse("api:orderitem-detail", args=[ctx["item"].id]),
+        {"quantity": 2},
+    ),
+    "items-destroy": lambda ctx: (
+        "delete",
+        reverse("api:orderitem-detail", args=[_new_order(ctx)[1].id]),
+        None,
+    ),
+    "user-create": lambda ctx: (
+        "post",
+        reverse("user:create"),
+        {
+            "email": f"bench{next(_counter)}@bodegonasusalud.com",
+            "password": BENCH_PASSWORD,
+            "name": "Bench",
+        },
+    ),
+    "user-api-token": lambda ctx: (
+        "post",
+        reverse("user:api_token"),
+        {"email": BENCH_EMAIL, "password": BENCH_PASSWORD},
+    ),
+    "user-me": lambda ctx: ("get", reverse("user:me"), None),
+    "user-me-update": lambda ctx: ("patch", reverse("user:me"), {"name": "Bench"}),
+}
+
+
+@pytest.fixture
+def bench_context():
+    """Return an authenticated client and the benchmark user's objects"""
+    token = Token.objects.select_related("user").get(user__email=BENCH_EMAIL)
+    user = token.user
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    order = Orders.objects.filter(user=user).first()
+    return {
+        "client": client,
+        "user": user,
+        "category": Categories.objects.filter(user=user).first(),
+        "product": Products.objects.filter(user=user).first(),
+        "products": list(
+            Products.objects.filter(user=user).values_list("id", flat=True)[:40]
+        ),
+        "order": order,
+        "item": OrderItem.objects.filter(order=order).first(),
+    }
+
+
+def _request(client, method, url, payload):
+    """Send a request and consume its body, returning the response"""
+    if method == "ndjson":
+        response = client.post(url, payload, content_type="application/x-ndjson")
+    elif method == "get":
+        response = client.get(url, payload)
+    else:
+        response = getattr(client, method)(url, payload, format="json")
+    if response.streaming:
+        b"".join(response.streaming_content)
+    assert response.status_code < 400, (url, response.status_code)
+    return response
+
+
+def _measure(case, ctx):
+    """Run a case ROUNDS times, returning its latency percentiles and queries
+
+    A first, untimed round warms up caches and counts the queries.
+    """
+    method, url, payload = case(ctx)
+    with CaptureQueriesContext(connection) as context:
+        _request(ctx["client"], method, url, payload)
+    queries = len(context.captured_queries)
+
+    timings = []
+    for _ in range(ROUNDS):
+        method, url, payload = case(ctx)
+        start = time.perf_counter()
+        _request(ctx["client"], method, url, payload)
+        timings.append((time.perf_counter() - start) * 1000)
+    cuts = statistics.quantiles(timings, n=20, method="inclusive")
+    return {
+        "p50_ms": round(statistics.median(timings), 3),
+        "p95_ms": round(cuts[18], 3),
+        "queries": queries,
+    }
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", CASES)
+def test_endpoint_budget(name, bench_context, baselines):
+    """Benchmark an action and compare it with its baseline budget"""
+    result = _measure(CASES[name], bench_context)
+    RESULTS[name] = result
+
+    if UPDATE_BASELINES:
+        return
+    if baselines is None or name not in baselines:
+        pytest.skip(f"no baseline recorded for {name} at this scale and database")
+    baseline = baselines[name]
+    assert (
+        result["queries"] <= baseline["queries"]
+    ), f"{name} ran {result['queries']} queries, budget is {baseline['queries']}"
+    if not TIMING_BUDGETS:
+        return
+    for percentile in ("p50_ms", "p95_ms"):
+        budget = baseline[percentile] * (1 + TOLERANCE) + SLACK_MS
+        assert (
+            result[percentile] <= budget
+        ), f"{name} {percentile} is {result[percentile]}, budget is {budget:.3f}"
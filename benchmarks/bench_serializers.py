@@ -0,0 +1,83 @@
+import statistics
+import time
+
+import pytest
+
+from api.fast_read import compile_plan
+from api.serializers import OrderItemSerializer, OrderSerializer, ProductsSerializer
+from core.models import OrderItem, Orders, Products
+
+from benchmarks.conftest import ROUNDS, SERIALIZER_RESULTS
+from benchmarks.seed import BENCH_EMAIL
+
+# Each case returns the serializer class, its arguments and the queryset of
+# the list, read up to ROWS rows of the benchmark user
+CASES = {
+    "products": lambda: (
+        ProductsSerializer,
+        {},
+        Products.objects.prefetch_related("category"),
+    ),
+    "orders": lambda: (
+        OrderSerializer,
+        {},
+        Orders.objects.prefetch_related("order_items"),
+    ),
+    "items": lambda: (
+        OrderItemSerializer,
+        {},
+        OrderItem.objects.filter(order__user__email=BENCH_EMAIL),
+    ),
+    "items-expand-product": lambda: (
+        OrderItemSerializer,
+        {"expand": {"product"}},
+        OrderItem.objects.filter(order__user__email=BENCH_EMAIL).prefetch_related(
+            "product__category"
+        ),
+    ),
+}
+ROWS = 1000
+
+
+def _user_rows(queryset):
+    """Return the queryset limited to the benchmark user's first ROWS rows"""
+    if queryset.model is not OrderItem:
+        queryset = queryset.filter(user__email=BENCH_EMAIL)
+    return queryset.order_by("-id")[:ROWS]
+
+
+def _timings(serialize):
+    """Return the ms of ROUNDS calls of serialize, after a warm up call"""
+    data = serialize()
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        serialize()
+        timings.append((time.perf_counter() - start) * 1000)
+    return data, timings
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("name", CASES)
+def test_fast_read_speedup(name):
+    """Compare reading and serializing rows with and without the fast path"""
+    serializer_class, kwargs, queryset = CASES[name]()
+    queryset = _user_rows(queryset)
+    plan = compile_plan(serializer_class(**kwargs))
+    assert plan is not None, f"{name} has no fast read plan"
+    rows = queryset.select_related(None).prefetch_related(None)
+
+    slow, slow_ms = _timings(
+        lambda: serializer_class(queryset.all(), many=True, **kwargs).data
+    )
+    fast, fast_ms = _timings(
+        lambda: plan.serialize(list(rows.values_list(*plan.columns)))
+    )
+
+    assert fast == slow
+    per_row = 1000 / len(slow)
+    SERIALIZER_RESULTS[name] = {
+        "rows": len(slow),
+        "serializer_ms": round(statistics.median(slow_ms) * per_row, 3),
+        "fast_read_ms": round(statistics.median(fast_ms) * per_row, 3),
+    }
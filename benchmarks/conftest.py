@@ -0,0 +1,154 @@
+import json
+import os
+import statistics
+import time
+from pathlib import Path
+
+import pytest
+from django.db import connection
+
+from benchmarks.seed import seed
+
+BASELINES_PATH = Path(__file__).resolve().parent / "baselines.json"
+
+# Rows per user, and number of users, of the seeded dataset
+SCALE = {
+    "users": int(os.environ.get("BENCH_USERS", 20)),
+    "products": int(os.environ.get("BENCH_PRODUCTS", 200)),
+    "categories": int(os.environ.get("BENCH_CATEGORIES", 10)),
+    "orders": int(os.environ.get("BENCH_ORDERS", 500)),
+    "items": int(os.environ.get("BENCH_ITEMS", 3)),
+}
+ROUNDS = int(os.environ.get("BENCH_ROUNDS", 20))
+# Allowed slowdown over the baseline latencies: a relative tolerance plus an
+# absolute slack, so that noise on fast actions doesn't fail the run
+TOLERANCE = float(os.environ.get("BENCH_TOLERANCE", 1.0))
+SLACK_MS = float(os.environ.get("BENCH_SLACK_MS", 5))
+UPDATE_BASELINES = os.environ.get("BENCH_UPDATE_BASELINES") == "1"
+# Query budgets always gate the run. Latencies depend on the machine: they are
+# only checked when enabled, against the baselines scaled by the speed of
+# this machine relative to the one that recorded them (see `calibrate`).
+TIMING_BUDGETS = os.environ.get("BENCH_TIMING_BUDGETS") == "1"
+
+# Concurrent slow clients of the WSGI/ASGI comparison: each client takes
+# CLIENT_DELAY_MS to read every response chunk, and the WSGI server has
+# WSGI_THREADS threads (like a gunicorn gthread worker)
+CONCURRENCY = {
+    "clients": int(os.environ.get("BENCH_CLIENTS", 100)),
+    "client_delay_ms": float(os.environ.get("BENCH_CLIENT_DELAY_MS", 200)),
+    "wsgi_threads": int(os.environ.get("BENCH_WSGI_THREADS", 8)),
+}
+
+RESULTS: dict[str, dict] = {}
+CONCURRENCY_RESULTS: dict[str, dict] = {}
+SERIALIZER_RESULTS: dict[str, dict] = {}
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(django_db_setup, django_db_blocker):
+    """Seed the test database once for the whole benchmark session"""
+    # pylint: disable=redefined-outer-name,unused-argument
+    with django_db_blocker.unblock():
+        seed(**SCALE)
+
+
+def calibrate() -> float:
+    """Return the median ms of a fixed CPU bound workload on this machine"""
+    rows = [{"id": i, "name": f"Vino {i}", "price": str(i * 1.5)} for i in range(5000)]
+    timings = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        json.loads(json.dumps(sorted(rows, key=lambda row: row["name"])))
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+@pytest.fixture(scope="session")
+def calibration_ms():
+    """Return the calibration time of this machine"""
+    return calibrate()
+
+
+@pytest.fixture(scope="session")
+def baselines(calibration_ms):  # pylint: disable=redefined-outer-name
+    """Return the stored baselines per action, saving the results when updating
+
+    Baselines are only comparable at the scale and on the database engine
+    (PostgreSQL for the committed ones) they were recorded with, otherwise no
+    budget is enforced. Their latencies are scaled to this machine by the
+    ratio of its calibration time to the recorded one.
+    """
+    recorded_on = {"scale": SCALE, "vendor": connection.vendor}
+    stored = {**recorded_on, "actions": {}}
+    if BASELINES_PATH.exists():
+        stored = json.loads(BASELINES_PATH.read_text())
+    comparable = all(stored.get(key) == value for key, value in recorded_on.items())
+    if not comparable:
+        yield None
+    else:
+        factor = calibration_ms / stored.get("calibration_ms", calibration_ms)
+        yield {
+            name: {
+                **baseline,
+                "p50_ms": baseline["p50_ms"] * factor,
+                "p95_ms": baseline["p95_ms"] * factor,
+            }
+            for name, baseline in stored["actions"].items()
+        }
+    if UPDATE_BASELINES:
+        if not comparable:
+            stored = {**recorded_on, "actions": {}}
+        stored["calibration_ms"] = round(calibration_ms, 3)
+        stored["actions"].update(RESULTS)
+        BASELINES_PATH.write_text(json.dumps(stored, indent=2, sort_keys=True) + "\n")
+
+
+def pytest_terminal_summary(terminalreporter):
+    """Print the measured latencies and query counts"""
+    if CONCURRENCY_RESULTS:
+        _concurrency_summary(terminalreporter)
+    if SERIALIZER_RESULTS:
+        _serializer_summary(terminalreporter)
+    if not RESULTS:
+        return
+    terminalreporter.section("benchmarks")
+    terminalreporter.write_line(f"scale: {SCALE}, rounds: {ROUNDS}")
+    terminalreporter.write_line(
+        f"{'action':<28}{'p50 ms':>10}{'p95 ms':>10}{'queries':>10}"
+    )
+    for name, result in sorted(RESULTS.items()):
+        terminalreporter.write_line(
+            f"{name:<28}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}"
+            f"{result['queries']:>10}"
+        )
+
+
+def _concurrency_summary(terminalreporter):
+    """Print the results of the concurrent slow clients runs"""
+    terminalreporter.section("concurrency")
+    terminalreporter.write_line(f"{CONCURRENCY}")
+    terminalreporter.write_line(
+        f"{'run':<36}{'wall ms':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+        f"{'threads':>10}{'errors':>10}"
+    )
+    for name, result in sorted(CONCURRENCY_RESULTS.items()):
+        terminalreporter.write_line(
+            f"{name:<36}{result['wall_ms']:>10.1f}{result['rps']:>10.1f}"
+            f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+            f"{result['peak_threads']:>10}{result['errors']:>10}"
+        )
+
+
+def _serializer_summary(terminalreporter):
+    """Print the serialization times with and without the fast read path"""
+    terminalreporter.section("fast read")
+    terminalreporter.write_line(f"ms per 1,000 rows, rounds: {ROUNDS}")
+    terminalreporter.write_line(
+        f"{'list':<28}{'rows':>8}{'serializer':>12}{'fast read':>12}{'speedup':>10}"
+    )
+    for name, result in sorted(SERIALIZER_RESULTS.items()):
+        speedup = result["serializer_ms"] / result["fast_read_ms"]
+        terminalreporter.write_line(
+            f"{name:<28}{result['rows']:>8}{result['serializer_ms']:>12.2f}"
+            f"{result['fast_read_ms']:>12.2f}{speedup:>9.1f}x"
+        )
@@ -0,0 +1,88 @@
+import random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from rest_framework.authtoken.models import Token
+
+from core.models import Categories, OrderItem, Orders, Products
+
+BENCH_EMAIL = "bench@bodegonasusalud.com"
+BENCH_PASSWORD = "password123"
+
+
+def seed(users, products, categories, orders, items, random_seed=0):
+    """Bulk create a reproducible dataset and return the benchmark user
+
+    Counts are per user. The first user is the one the benchmarks
+    authenticate as, the others only make per-user filtering realistic.
+    """
+    rng = random.Random(random_seed)
+    password = make_password(BENCH_PASSWORD)
+    user_model = get_user_model()
+    all_users = user_model.objects.bulk_create(
+        [
+            user_model(
+                email=BENCH_EMAIL if i == 0 else f"user{i}@bodegonasusalud.com",
+                password=password,
+            )
+            for i in range(users)
+        ]
+    )
+    all_categories = Categories.objects.bulk_create(
+        [
+            Categories(user=user, name=f"Category {i}")
+            for user in all_users
+            for i in range(categories)
+        ]
+    )
+    all_products = Products.objects.bulk_create(
+        [
+            Products(
+                user=user,
+                name=f"Product {i}",
+                description="Lorem ipsum dolor sit amet. " * 10,
+                price=rng.randint(100, 10000) / 100,
+                weight="0.75",
+                units="l",
+                featured=i % 10 == 0,
+                discount=rng.choice([None, 5, 10]),
+            )
+            for user in all_users
+            for i in range(products)
+        ]
+    )
+    Products.category.through.objects.bulk_create(
+        [
+            Products.category.through(
+                products_id=product.id,
+                categories_id=rng.choice(all_categories).id,
+            )
+            for product in all_products
+        ]
+    )
+    all_orders = Orders.objects.bulk_create(
+        [
+            Orders(user=user, payment_mode="Credit Card", order_total=0)
+            for user in all_users
+            for _ in range(orders)
+        ]
+    )
+    OrderItem.objects.bulk_create(
+        [
+            OrderItem(
+                order=order,
+                product=product,
+                quantity=1,
+                item_price=product.price,
+                discount=product.discount,
+                total_price=product.price,
+            )
+            for index, order in enumerate(all_orders)
+            for product in rng.sample(
+                all_products[index // orders * products :][:products],
+                min(items, products),
+            )
+        ]
+    )
+    Token.objects.create(user=all_users[0])
+    return all_users[0]
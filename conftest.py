@@ -3,4 +3,5 @@ pytest_plugins = (
     "fixtures.product",
     "fixtures.orders",
     "fixtures.api_client",
+    "fixtures.cache",
 )
@@ -37,8 +37,33 @@ class UserAdmin(BaseUserAdmin):
     )
 
 
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Read only view of the slow query log"""
+
+    list_display = ["created", "duration_ms", "route", "database", "sql"]
+    list_filter = ["route", "database"]
+    search_fields = ["sql", "route"]
+    readonly_fields = [
+        "created",
+        "duration_ms",
+        "database",
+        "route",
+        "sql",
+        "params",
+        "stack",
+        "plan",
+    ]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 admin.site.register(models.User, UserAdmin)
 admin.site.register(models.Categories)
 admin.site.register(models.Products)
 admin.site.register(models.Orders)
 admin.site.register(models.OrderItem)
+admin.site.register(models.SlowQuery, SlowQueryAdmin)
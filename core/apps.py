@@ -6,3 +6,11 @@ class CoreConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "core"
+
+    def ready(self):
+        """Connect the change tracking signals and check the replica routing"""
+        # pylint: disable=import-outside-toplevel,unused-import
+        from core import signals  # noqa: F401
+        from core.db_routers import check_replica_cache
+
+        check_replica_cache()
@@ -0,0 +1,59 @@
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+DEFAULT_ASYNC_DB = {
+    # Threads running the database work of async views, per process. Each
+    # holds its own connection, so this bounds the connections of a worker.
+    "THREADS": 8,
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def async_db_settings() -> dict[str, Any]:
+    """Return the async database settings merged over the defaults"""
+    return {**DEFAULT_ASYNC_DB, **getattr(settings, "ASYNC_DB", {})}
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the database thread pool of this process"""
+    global _executor, _executor_pid  # pylint: disable=global-statement
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=async_db_settings()["THREADS"],
+                thread_name_prefix="async-db",
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Call func, closing the connections that outlived their CONN_MAX_AGE"""
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_in_db_thread(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run sync (ORM) code from an async view in the database thread pool
+
+    Django 4.0 has no async ORM: queries block, so they run in a bounded
+    pool shared by every request rather than a thread per connection. The
+    context variables of the request are visible to func.
+    """
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, _run, func, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), call)
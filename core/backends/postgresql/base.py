@@ -0,0 +1,62 @@
+from typing import Any, Optional
+
+import psycopg2
+import psycopg2.extras
+from django.db.backends.postgresql import base, creation
+from django.utils.asyncio import async_unsafe
+
+from core.backends.postgresql.pool import ConnectionPool, get_pool, pools
+from core.instrumentation import timed
+
+
+def _connect(conn_params: dict[str, Any], isolation_level: Optional[int]) -> Any:
+    """Open a connection set up like Django's PostgreSQL backend does"""
+    connection = psycopg2.connect(**conn_params)
+    if isolation_level is not None and isolation_level != connection.isolation_level:
+        connection.set_session(isolation_level=isolation_level)
+    # Skip the round trip from psycopg2's decode to json.dumps() to
+    # json.loads() of JSONField
+    psycopg2.extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+    return connection
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Creation of the test database, closing the pooled connections first"""
+
+    def _destroy_test_db(self, test_database_name: str, verbosity: int) -> None:
+        for pool in pools():
+            pool.close_idle()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL backend drawing its connections from a per-process pool
+
+    Closing a connection, which Django does at the end of every request with
+    the default CONN_MAX_AGE of 0, returns it to the pool: requests skip the
+    connection setup while the process holds a bounded number of them.
+    """
+
+    creation_class = DatabaseCreation
+    pool: Optional[ConnectionPool] = None
+
+    @async_unsafe
+    def get_new_connection(self, conn_params: dict[str, Any]) -> Any:
+        options = self.settings_dict["OPTIONS"]
+        isolation_level = options.get("isolation_level")
+        self.pool = get_pool(
+            self.alias,
+            conn_params,
+            lambda: _connect(conn_params, isolation_level),
+        )
+        with timed("db_connect"):
+            connection = self.pool.checkout()
+        self.isolation_level = (
+            connection.isolation_level if isolation_level is None else isolation_level
+        )
+        return connection
+
+    def _close(self) -> None:
+        if self.connection is not None and self.pool is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
@@ -0,0 +1,322 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import OperationalError
+from psycopg2 import extensions
+
+from core.metrics import registry
+
+DEFAULT_DB_POOL = {
+    # Connections kept open per process and database
+    "SIZE": 5,
+    # Connections opened on top of SIZE when they are all in use, closed as
+    # soon as they are returned
+    "MAX_OVERFLOW": 5,
+    # Seconds a checkout waits for a connection once SIZE + MAX_OVERFLOW are
+    # in use, before failing
+    "TIMEOUT": 10,
+    # Connections are closed once this old, 0 to keep them
+    "MAX_LIFETIME": 30 * 60,
+    # Connections unused for this long are closed, 0 to keep them
+    "IDLE_TIMEOUT": 5 * 60,
+    # Check a connection with a round trip before handing it out
+    "HEALTH_CHECK": True,
+}
+
+CHECKOUTS = registry.counter(
+    "db_pool_checkouts", "Connections handed out by the pools", ("database",)
+)
+CONNECTS = registry.counter(
+    "db_pool_connects", "Connections opened by the pools", ("database", "overflow")
+)
+CLOSES = registry.counter(
+    "db_pool_closes", "Connections closed by the pools", ("database", "reason")
+)
+TIMEOUTS = registry.counter(
+    "db_pool_timeouts", "Checkouts failed waiting for a connection", ("database",)
+)
+CHECKOUT_TIME = registry.histogram(
+    "db_pool_checkout_seconds",
+    "Time to obtain a connection, waiting, connecting and checking included",
+    ("database",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1, 5),
+)
+
+_pools: dict[tuple, "ConnectionPool"] = {}
+_pools_lock = threading.Lock()
+# Pools inherited through a fork: their sockets belong to the parent, which
+# closing them (even by garbage collection) would disconnect
+_inherited: list["ConnectionPool"] = []
+
+
+def pool_settings() -> dict[str, Any]:
+    """Return the connection pool settings merged over the defaults"""
+    return {**DEFAULT_DB_POOL, **getattr(settings, "DB_POOL", {})}
+
+
+def _forget_pools() -> None:
+    """Leave the pools of the parent process alone in a forked child"""
+    _inherited.extend(_pools.values())
+    _pools.clear()
+
+
+os.register_at_fork(after_in_child=_forget_pools)
+
+
+class PoolTimeout(OperationalError):
+    """No connection became available within the pool's TIMEOUT"""
+
+
+def ping(connection: Any) -> bool:
+    """Return whether a connection is usable, never raising"""
+    if connection.closed:
+        return False
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except Exception:  # pylint: disable=broad-except
+        return False
+    return True
+
+
+def _close(connection: Any) -> None:
+    """Close a connection, ignoring the errors of a broken one"""
+    try:
+        connection.close()
+    except Exception:  # pylint: disable=broad-except
+        pass
+
+
+class ConnectionPool:
+    """Bounded pool of the connections of a process to one database
+
+    Idle connections are reused most recent first, so the oldest ones go idle
+    and are evicted when the load drops. The counters of `stats` are also
+    exported as metrics: the open connections of every worker are the
+    connects minus the closes.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    def __init__(
+        self, alias: str, connect: Callable[[], Any], config: dict[str, Any]
+    ) -> None:
+        self.alias = alias
+        self.connect = connect
+        self.size = config["SIZE"]
+        self.max_overflow = config["MAX_OVERFLOW"]
+        self.timeout = config["TIMEOUT"]
+        self.max_lifetime = config["MAX_LIFETIME"]
+        self.idle_timeout = config["IDLE_TIMEOUT"]
+        self.health_check = config["HEALTH_CHECK"]
+        # (connection, opened at, returned at), most recently returned last
+        self._idle: deque[tuple[Any, float, float]] = deque()
+        self._opened_at: dict[int, float] = {}
+        self._open = 0
+        self._condition = threading.Condition()
+        self.counters = {
+            "checkouts": 0,
+            "connects": 0,
+            "overflow": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "timeouts": 0,
+            "health_check_failures": 0,
+            "closed_lifetime": 0,
+            "closed_idle": 0,
+            "closed_broken": 0,
+            "closed_overflow": 0,
+        }
+
+    def _expired(self, opened_at: float, now: float) -> bool:
+        """Return whether a connection outlived MAX_LIFETIME"""
+        return bool(self.max_lifetime) and now - opened_at >= self.max_lifetime
+
+    def _discard(self, connection: Any, reason: str) -> None:
+        """Forget a connection and free its slot, the lock being held"""
+        self._opened_at.pop(id(connection), None)
+        self._open -= 1
+        self.counters[f"closed_{reason}"] += 1
+        CLOSES.inc(database=self.alias, reason=reason)
+        self._condition.notify()
+
+    def _evict_idle(self, now: float) -> list[Any]:
+        """Remove the idle connections past IDLE_TIMEOUT, the lock being held"""
+        evicted = []
+        while self._idle and self.idle_timeout:
+            connection, _, returned_at = self._idle[0]
+            if now - returned_at < self.idle_timeout:
+                break
+            self._idle.popleft()
+            self._discard(connection, "idle")
+            evicted.append(connection)
+        return evicted
+
+    def _reserve(self, deadline: float) -> tuple[Optional[Any], list[Any]]:
+        """Take an idle connection, or a slot to open one (returning None)
+
+        Returns the connections to close as well, outside the lock.
+        """
+        to_close: list[Any] = []
+        waited_from = None
+        with self._condition:
+            try:
+                while True:
+                    now = time.monotonic()
+                    to_close.extend(self._evict_idle(now))
+                    while self._idle:
+                        connection, opened_at, _ = self._idle.pop()
+                        if not self._expired(opened_at, now):
+                            return connection, to_close
+                        self._discard(connection, "lifetime")
+                        to_close.append(connection)
+                    if self._open < self.size + self.max_overflow:
+                        self._open += 1
+                        return None, to_close
+                    if waited_from is None:
+                        waited_from = now
+                        self.counters["waits"] += 1
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self.counters["timeouts"] += 1
+                        TIMEOUTS.inc(database=self.alias)
+                        raise PoolTimeout(
+                            f"No connection to {self.alias!r} available within "
+                            f"{self.timeout}s ({self._open} in use)"
+                        )
+                    self._condition.wait(remaining)
+            finally:
+                if waited_from is not None:
+                    waited = time.monotonic() - waited_from
+                    self.counters["wait_seconds"] += waited
+                    self.counters["max_wait_seconds"] = max(
+                        self.counters["max_wait_seconds"], waited
+                    )
+
+    def _open_connection(self) -> Any:
+        """Open a connection in a reserved slot"""
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self._condition:
+                self._open -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._opened_at[id(connection)] = time.monotonic()
+            self.counters["connects"] += 1
+            overflow = self._open > self.size
+            if overflow:
+                self.counters["overflow"] += 1
+        CONNECTS.inc(database=self.alias, overflow=str(overflow).lower())
+        return connection
+
+    def checkout(self) -> Any:
+        """Return a healthy connection, waiting up to TIMEOUT for one"""
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            connection, to_close = self._reserve(deadline)
+            for stale in to_close:
+                _close(stale)
+            if connection is None:
+                connection = self._open_connection()
+                break
+            if not self.health_check or ping(connection):
+                break
+            with self._condition:
+                self.counters["health_check_failures"] += 1
+                self._discard(connection, "broken")
+            _close(connection)
+        with self._condition:
+            self.counters["checkouts"] += 1
+        CHECKOUTS.inc(database=self.alias)
+        CHECKOUT_TIME.observe(time.monotonic() - start, database=self.alias)
+        return connection
+
+    def release(self, connection: Any) -> None:
+        """Return a connection, rolling back its open transaction"""
+        status = extensions.TRANSACTION_STATUS_UNKNOWN
+        if not connection.closed:
+            status = connection.get_transaction_status()
+        if status in (
+            extensions.TRANSACTION_STATUS_INTRANS,
+            extensions.TRANSACTION_STATUS_INERROR,
+        ):
+            try:
+                connection.rollback()
+                status = connection.get_transaction_status()
+            except Exception:  # pylint: disable=broad-except
+                status = extensions.TRANSACTION_STATUS_UNKNOWN
+
+        now = time.monotonic()
+        with self._condition:
+            opened_at = self._opened_at.get(id(connection), now)
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                reason = "broken"
+            elif self._open > self.size:
+                reason = "overflow"
+            elif self._expired(opened_at, now):
+                reason = "lifetime"
+            else:
+                self._idle.append((connection, opened_at, now))
+                self._condition.notify()
+                return
+            self._discard(connection, reason)
+        _close(connection)
+
+    def close_idle(self) -> None:
+        """Close every idle connection, e.g. before dropping the database"""
+        with self._condition:
+            idle = [connection for connection, _, _ in self._idle]
+            self._idle.clear()
+            for connection in idle:
+                self._discard(connection, "idle")
+        for connection in idle:
+            _close(connection)
+
+    def stats(self) -> dict[str, Any]:
+        """Return the counters and current usage of the pool"""
+        with self._condition:
+            return {
+                "database": self.alias,
+                "size": self.size,
+                "max_overflow": self.max_overflow,
+                "open": self._open,
+                "idle": len(self._idle),
+                "in_use": self._open - len(self._idle),
+                **self.counters,
+            }
+
+
+def get_pool(
+    alias: str, conn_params: dict[str, Any], connect: Callable
+) -> ConnectionPool:
+    """Return the pool of this process for a database and connection params"""
+    key = (
+        alias,
+        tuple(sorted((name, str(value)) for name, value in conn_params.items())),
+    )
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = ConnectionPool(alias, connect, pool_settings())
+    return pool
+
+
+def pools() -> list[ConnectionPool]:
+    """Return the pools of this process"""
+    with _pools_lock:
+        return list(_pools.values())
+
+
+def pool_stats() -> list[dict[str, Any]]:
+    """Return the statistics of the pools of this process"""
+    return [pool.stats() for pool in pools()]
@@ -0,0 +1,127 @@
+import random
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS
+
+DEFAULT_REPLICA_ROUTING = {
+    # Aliases in DATABASES of the read replicas of the default database
+    "REPLICAS": [],
+    # Users read from the primary for this long after a write
+    "STICKY_SECONDS": 5,
+    # Cache holding the last writes, which must be shared by the workers
+    "CACHE": "default",
+}
+# Cache backends only seen by their own process
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+# Models of the database cache backend, kept on the primary
+CACHE_APP_LABEL = "django_cache"
+
+# Database serving the reads of the current scope, None for the default
+# routing (the primary, or the database of the related instance)
+_read_alias: ContextVar[Optional[str]] = ContextVar("read_alias", default=None)
+
+
+def replica_settings() -> dict[str, Any]:
+    """Return the replica routing settings merged over the defaults"""
+    return {**DEFAULT_REPLICA_ROUTING, **getattr(settings, "REPLICA_ROUTING", {})}
+
+
+def check_replica_cache() -> None:
+    """Refuse to start with replicas and a cache the workers don't share
+
+    With a process local cache, the write of a user is only recorded by the
+    worker that served it and the others keep reading from a lagging replica.
+    """
+    config = replica_settings()
+    if not config["REPLICAS"]:
+        return
+    backend = settings.CACHES.get(config["CACHE"], {}).get("BACKEND")
+    if backend is None or backend in PROCESS_LOCAL_CACHES:
+        raise ImproperlyConfigured(
+            f"REPLICA_ROUTING CACHE {config['CACHE']!r} must be a cache shared "
+            "by the workers (database, Redis, Memcached...) when REPLICAS are set."
+        )
+
+
+def read_alias() -> Optional[str]:
+    """Return the database serving the reads of the current scope"""
+    return _read_alias.get()
+
+
+def set_read_alias(alias: Optional[str]) -> Any:
+    """Route the reads of the current scope to alias, returning a reset token"""
+    return _read_alias.set(alias)
+
+
+def reset_read_alias(token: Any) -> None:
+    """Restore the read routing in place before `set_read_alias`"""
+    _read_alias.reset(token)
+
+
+def _sticky_key(user: Any) -> str:
+    """Return the cache key recording the last write of a user"""
+    return f"replica-sticky:{user.pk}"
+
+
+def choose_replica(user: Any) -> Optional[str]:
+    """Return a replica for the reads of a user, None to use the primary
+
+    Users who wrote within STICKY_SECONDS read from the primary so that they
+    see their own writes whatever the replication lag.
+    """
+    config = replica_settings()
+    if not config["REPLICAS"]:
+        return None
+    if user.is_authenticated and caches[config["CACHE"]].get(_sticky_key(user)):
+        return None
+    return random.choice(config["REPLICAS"])
+
+
+def mark_written(user: Any) -> None:
+    """Keep a user on the primary for STICKY_SECONDS after a write"""
+    config = replica_settings()
+    if config["REPLICAS"] and config["STICKY_SECONDS"] > 0 and user.is_authenticated:
+        caches[config["CACHE"]].set(_sticky_key(user), 1, config["STICKY_SECONDS"])
+
+
+class ReplicaRouter:
+    """Send writes to the primary, and reads to the replica of their scope
+
+    Reads outside a replica scope keep Django's default routing. Replicas are
+    never migrated, they receive the schema through replication.
+    """
+
+    def db_for_read(self, model: Any, **hints: Any) -> Optional[str]:
+        """Return the replica chosen for the current scope, if any"""
+        # pylint: disable=unused-argument
+        if model._meta.app_label == CACHE_APP_LABEL:  # pylint: disable=protected-access
+            # The database cache records the writes, it is read where written
+            return DEFAULT_DB_ALIAS
+        return _read_alias.get()
+
+    def db_for_write(self, model: Any, **hints: Any) -> str:
+        """Return the primary, even for instances read from a replica"""
+        # pylint: disable=unused-argument
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> Optional[bool]:
+        """Allow relations between the primary and its replicas"""
+        # pylint: disable=unused-argument
+        databases = {DEFAULT_DB_ALIAS, *replica_settings()["REPLICAS"]}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, **hints: Any) -> Optional[bool]:
+        """Never migrate the replicas"""
+        # pylint: disable=unused-argument
+        if db in replica_settings()["REPLICAS"]:
+            return False
+        return None
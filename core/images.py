@@ -0,0 +1,221 @@
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import PurePosixPath
+from typing import Any, Optional
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PRODUCT_IMAGES = {
+    # Widths of the derivatives, never larger than the original
+    "WIDTHS": (200, 400, 800, 1600),
+    "QUALITY": 80,
+    # Size of the process pool building derivatives
+    "WORKERS": 2,
+    # Build derivatives in the process pool, or inline when False
+    "ASYNC": True,
+    # Limits of the upload-image action
+    "MAX_UPLOAD_BYTES": 20 * 1024 * 1024,
+    "MAX_SIDE": 8000,
+    "MAX_PIXELS": 40_000_000,
+    "FORMATS": ("JPEG", "PNG", "WEBP"),
+}
+DERIVATIVES_DIR = "product/derivatives"
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+# (product id, image name) of the builds submitted and not stored yet
+_pending: set[tuple[int, str]] = set()
+_pending_lock = threading.Lock()
+
+
+def image_settings() -> dict[str, Any]:
+    """Return the product image settings merged over the defaults"""
+    return {**DEFAULT_PRODUCT_IMAGES, **getattr(settings, "PRODUCT_IMAGES", {})}
+
+
+def _save(stem: str, image: Image.Image, image_format: str, **options: Any) -> str:
+    """Encode an image and write it under a name ending with its content hash
+
+    The name changes whenever the content does, so the files can be served
+    with immutable cache headers.
+    """
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    content = buffer.getvalue()
+    extension = "jpg" if image_format == "JPEG" else image_format.lower()
+    name = f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}.{extension}"
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, ContentFile(content))
+
+
+def build_derivatives(name: str, widths: tuple, quality: int) -> dict[str, Any]:
+    """Write resized WebP and JPEG copies of an image and describe them
+
+    Widths are built from the largest down, each one resized from the
+    previous so every pass works on a smaller image, and JPEG originals are
+    decoded straight at the largest size needed.
+    """
+    directory = f"{DERIVATIVES_DIR}/{PurePosixPath(name).stem}"
+    with default_storage.open(name, "rb") as file, Image.open(file) as original:
+        largest = max(widths)
+        # JPEG only: decode at the smallest scale still covering every width
+        original.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        width, height = image.size
+        targets = sorted({min(target, width) for target in widths}, reverse=True)
+
+        variants = []
+        for target in targets:
+            size = (target, max(1, round(height * target / width)))
+            if image.size != size:
+                image = image.resize(size, Image.LANCZOS, reducing_gap=3.0)
+            webp = _save(
+                f"{directory}/{target}w", image, "WEBP", quality=quality, method=4
+            )
+            jpeg = _save(
+                f"{directory}/{target}w",
+                image.convert("RGB"),
+                "JPEG",
+                quality=quality,
+                optimize=True,
+                progressive=True,
+            )
+            variants.append(
+                {"width": size[0], "height": size[1], "webp": webp, "jpeg": jpeg}
+            )
+    return {
+        "source": name,
+        "variants": sorted(variants, key=lambda variant: variant["width"]),
+    }
+
+
+def init_worker() -> None:
+    """Set Django up in a new pool process"""
+    if not apps.ready:
+        import django  # pylint: disable=import-outside-toplevel
+
+        django.setup()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """Return the process pool of this process, created on first use
+
+    Its processes are not forked from the (threaded) server worker, whose
+    locks held by other threads (logging, database pool, metrics) would stay
+    locked in the copy, but from a single threaded fork server.
+    """
+    global _executor, _executor_pid  # pylint: disable=global-statement
+    pid = os.getpid()
+    if _executor_pid != pid:
+        with _executor_lock:
+            if _executor_pid != pid:
+                start_method = (
+                    "forkserver"
+                    if "forkserver" in multiprocessing.get_all_start_methods()
+                    else "spawn"
+                )
+                _executor = ProcessPoolExecutor(
+                    max_workers=image_settings()["WORKERS"],
+                    mp_context=multiprocessing.get_context(start_method),
+                    initializer=init_worker,
+                )
+                _executor_pid = pid
+    return _executor  # type: ignore
+
+
+def save_derivatives(product_id: int, derivatives: dict[str, Any]) -> bool:
+    """Store the derivatives of a product unless its image changed meanwhile"""
+    # pylint: disable=import-outside-toplevel
+    from core.models import Products
+
+    product = Products.objects.filter(pk=product_id).first()
+    if product is None or product.image.name != derivatives["source"]:
+        return False
+    previous = product.image_derivatives.get("variants", [])
+    product.image_derivatives = derivatives
+    # A regular save, so cached catalog responses and validators are renewed
+    product.save(update_fields=["image_derivatives", "updated_date"])
+    kept = {
+        variant[image_format]
+        for variant in derivatives["variants"]
+        for image_format in ("webp", "jpeg")
+    }
+    for variant in previous:
+        for image_format in ("webp", "jpeg"):
+            if variant[image_format] not in kept:
+                default_storage.delete(variant[image_format])
+    return True
+
+
+def _on_built(key: tuple[int, str], future: Future) -> None:
+    """Store the derivatives built by the process pool
+
+    Runs on the pool's management thread, whose database connection is
+    closed (returned to the pool) after each save instead of kept open.
+    """
+    product_id = key[0]
+    try:
+        derivatives = future.result()
+    except Exception:  # pylint: disable=broad-except
+        logger.exception("Could not build the image derivatives of %s", product_id)
+        return
+    finally:
+        with _pending_lock:
+            _pending.discard(key)
+    close_old_connections()
+    try:
+        save_derivatives(product_id, derivatives)
+    except DatabaseError:
+        logger.exception("Could not save the image derivatives of %s", product_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_derivatives(product: Any) -> None:
+    """Build the derivatives of a product image once the transaction commits
+
+    A build already pending for the same image is not submitted again.
+    """
+    config = image_settings()
+    args = (product.image.name, tuple(config["WIDTHS"]), config["QUALITY"])
+    key = (product.pk, product.image.name)
+
+    def build() -> None:
+        if not config["ASYNC"]:
+            save_derivatives(key[0], build_derivatives(*args))
+            return
+        with _pending_lock:
+            if key in _pending:
+                return
+            _pending.add(key)
+        try:
+            future = _get_executor().submit(build_derivatives, *args)
+        except Exception:
+            with _pending_lock:
+                _pending.discard(key)
+            raise
+        future.add_done_callback(lambda done: _on_built(key, done))
+
+    transaction.on_commit(build)
+
+
+def image_is_current(product: Any) -> bool:
+    """Return whether the derivatives of a product match its image"""
+    return bool(product.image) and (
+        product.image_derivatives.get("source") == product.image.name
+    )
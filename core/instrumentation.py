@@ -0,0 +1,275 @@
+import json
+import logging
+import random
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from core.middleware import (
+    AsyncCapableMiddleware,
+    call_on_close,
+    reset_after_response,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUEST_TIMING = {
+    "SAMPLE_RATE": 1.0,
+    "SERVER_TIMING_HEADER": True,
+    "LOG": True,
+    # Requests slower than this are logged even when not sampled, with their
+    # total time only.
+    "SLOW_REQUEST_MS": 1000,
+}
+
+_current: ContextVar[Optional["RequestTimings"]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+class RequestTimings:
+    """Durations (in seconds) and query count of a sampled request"""
+
+    __slots__ = ("durations", "queries", "active")
+
+    def __init__(self) -> None:
+        self.durations: dict[str, float] = {}
+        self.queries = 0
+        self.active: set[str] = set()
+
+    def add(self, name: str, duration: float) -> None:
+        """Add a duration to a phase"""
+        self.durations[name] = self.durations.get(name, 0.0) + duration
+
+    def __call__(
+        self, execute: Callable, sql: str, params: Any, many: bool, context: dict
+    ) -> Any:
+        """Database execute wrapper counting queries and their time"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add("db", time.perf_counter() - start)
+            self.queries += 1
+
+
+class timed:  # pylint: disable=invalid-name
+    """Context manager adding its duration to a phase of the current request
+
+    It costs a context variable lookup when the request isn't sampled, and
+    nested uses of the same phase (e.g. nested serializers) are only counted
+    once.
+    """
+
+    __slots__ = ("name", "timings", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.timings: Optional[RequestTimings] = None
+        self.start = 0.0
+
+    def __enter__(self) -> "timed":
+        timings = _current.get()
+        if timings is not None and self.name not in timings.active:
+            timings.active.add(self.name)
+            self.timings = timings
+            self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        if self.timings is not None:
+            self.timings.add(self.name, time.perf_counter() - self.start)
+            self.timings.active.discard(self.name)
+            self.timings = None
+
+
+def route_name(request: HttpRequest) -> str:
+    """Return "<ViewSet>.<action>" for viewset actions, else the URL name"""
+    match = request.resolver_match
+    if match is None:
+        return request.path
+    actions = getattr(match.func, "actions", None)
+    method = request.method.lower()
+    if actions and method in actions:
+        return f"{match.func.cls.__name__}.{actions[method]}"
+    return match.view_name
+
+
+def current_timings() -> Optional[RequestTimings]:
+    """Return the timings of the current request, if it is sampled"""
+    return _current.get()
+
+
+def timing_wrapper(
+    execute: Callable, sql: str, params: Any, many: bool, context: dict
+) -> Any:
+    """Database execute wrapper timing the queries of sampled requests
+
+    It is installed on every connection, so queries run by an async view in a
+    worker thread are counted too.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def _sample(config: dict[str, Any]) -> Optional[RequestTimings]:
+    """Return new timings if the request is sampled, else None"""
+    if random.random() >= config["SAMPLE_RATE"]:
+        return None
+    return RequestTimings()
+
+
+class RequestTimingMiddleware(AsyncCapableMiddleware):
+    """Record where the time of a request goes
+
+    Sampled requests report their query count and database, authentication,
+    serialization, view, render and total times as a `Server-Timing` header
+    and a JSON log line on the `core.instrumentation` logger. The view time
+    includes the database and serialization time spent inside the view. The
+    header of a streaming response covers the time until the view returned,
+    its log line the whole request, body included.
+    """
+
+    @property
+    def config(self) -> dict[str, Any]:
+        """Return the timing settings merged over the defaults"""
+        return {**DEFAULT_REQUEST_TIMING, **getattr(settings, "REQUEST_TIMING", {})}
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self.__acall__(request)
+        config = self.config
+        start = time.perf_counter()
+        token = _current.set(_sample(config))
+        response = None
+        try:
+            response = self.get_response(request)
+            return self.report(request, response, config, start)
+        finally:
+            reset_after_response(_current, token, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        config = self.config
+        start = time.perf_counter()
+        token = _current.set(_sample(config))
+        response = None
+        try:
+            response = await self.get_response(request)
+            return self.report(request, response, config, start)
+        finally:
+            reset_after_response(_current, token, response)
+
+    def report(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        config: dict[str, Any],
+        start: float,
+    ) -> HttpResponse:
+        """Add the Server-Timing header and log the request"""
+        end = time.perf_counter()
+        timings = _current.get()
+        if timings is not None:
+            view_start = getattr(request, "_timing_view_start", None)
+            if "view" not in timings.durations and view_start is not None:
+                # Not a template response: the view returned the final response
+                timings.add("view", end - view_start)
+            if config["SERVER_TIMING_HEADER"]:
+                response["Server-Timing"] = self._server_timing(
+                    self._metrics(timings, end - start), timings.queries
+                )
+        if not config["LOG"]:
+            return response
+        if response.streaming:
+            call_on_close(
+                response,
+                lambda: self._log_request(request, response, config, timings, start),
+            )
+        else:
+            self._log_request(request, response, config, timings, start)
+        return response
+
+    def _log_request(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        config: dict[str, Any],
+        timings: Optional[RequestTimings],
+        start: float,
+    ) -> None:
+        """Log a sampled request, or an unsampled one if it was slow"""
+        total = time.perf_counter() - start
+        if timings is not None:
+            metrics = self._metrics(timings, total)
+            self._log(request, response, metrics, queries=timings.queries)
+        elif total * 1000 >= config["SLOW_REQUEST_MS"]:
+            self._log(request, response, {"total": round(total * 1000, 2)})
+
+    @staticmethod
+    def _metrics(timings: RequestTimings, total: float) -> dict[str, float]:
+        """Return the durations of a request in milliseconds"""
+        durations = {**timings.durations, "total": total}
+        return {name: round(duration * 1000, 2) for name, duration in durations.items()}
+
+    def process_view(self, request: HttpRequest, *args: Any) -> None:
+        """Mark the start of the view"""
+        request._timing_view_start = (  # pylint: disable=protected-access
+            time.perf_counter()
+        )
+
+    async def aprocess_view(self, request: HttpRequest, *args: Any) -> None:
+        """Mark the start of the view, on the event loop"""
+        request._timing_view_start = (  # pylint: disable=protected-access
+            time.perf_counter()
+        )
+
+    def process_template_response(
+        self, request: HttpRequest, response: HttpResponse
+    ) -> HttpResponse:
+        """Record the view time, and the render time once rendered"""
+        timings = _current.get()
+        view_start = getattr(request, "_timing_view_start", None)
+        if timings is None or view_start is None:
+            return response
+        render_start = time.perf_counter()
+        timings.add("view", render_start - view_start)
+        response.add_post_render_callback(
+            lambda _: timings.add("render", time.perf_counter() - render_start)
+        )
+        return response
+
+    @staticmethod
+    def _server_timing(metrics: dict[str, float], queries: int) -> str:
+        """Return a Server-Timing header value"""
+        entries = []
+        for name, duration in metrics.items():
+            entry = f"{name};dur={duration}"
+            if name == "db":
+                entry += f';desc="{queries} queries"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+    @staticmethod
+    def _log(
+        request: HttpRequest,
+        response: HttpResponse,
+        metrics: dict[str, float],
+        queries: Optional[int] = None,
+    ) -> None:
+        """Write a structured log line for a request"""
+        match = request.resolver_match
+        record: dict[str, Any] = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "timings_ms": metrics,
+        }
+        if queries is not None:
+            record["queries"] = queries
+        logger.info(json.dumps(record), extra={"request_timing": record})
@@ -0,0 +1,78 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.images import (
+    build_derivatives,
+    image_is_current,
+    image_settings,
+    init_worker,
+    save_derivatives,
+)
+from core.models import Products
+
+
+class Command(BaseCommand):
+    """Build the resized copies of existing product images"""
+
+    help = (
+        "Build the WebP and JPEG derivatives of product images that have none "
+        "or whose image changed, in a process pool."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--force", action="store_true", help="Rebuild current derivatives too."
+        )
+        parser.add_argument("--workers", type=int, default=None)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        config = image_settings()
+        widths, quality = tuple(config["WIDTHS"]), config["QUALITY"]
+        workers = options["workers"] or config["WORKERS"]
+        products = (
+            Products.objects.exclude(image="")
+            .exclude(image__isnull=True)
+            .only("id", "image", "image_derivatives")
+            .order_by("id")
+        )
+
+        built = failed = skipped = 0
+        pending: dict = {}
+        with ProcessPoolExecutor(workers, initializer=init_worker) as executor:
+
+            def collect(return_when: str) -> tuple[int, int]:
+                done, _ = wait(pending, return_when=return_when)
+                ok = errors = 0
+                for future in done:
+                    product_id = pending.pop(future)
+                    try:
+                        save_derivatives(product_id, future.result())
+                        ok += 1
+                    except Exception as error:  # pylint: disable=broad-except
+                        errors += 1
+                        self.stderr.write(f"Product {product_id}: {error}")
+                return ok, errors
+
+            for product in products.iterator(chunk_size=500):
+                if image_is_current(product) and not options["force"]:
+                    skipped += 1
+                    continue
+                future = executor.submit(
+                    build_derivatives, product.image.name, widths, quality
+                )
+                pending[future] = product.pk
+                # Keep a bounded number of images in flight
+                if len(pending) >= workers * 4:
+                    ok, errors = collect(FIRST_COMPLETED)
+                    built, failed = built + ok, failed + errors
+            while pending:
+                ok, errors = collect(FIRST_COMPLETED)
+                built, failed = built + ok, failed + errors
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Built {built}, skipped {skipped} current, {failed} failed."
+            )
+        )
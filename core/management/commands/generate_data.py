@@ -0,0 +1,394 @@
+import csv
+import datetime
+import io
+import random
+from array import array
+from typing import Any, Optional
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandParser
+from django.core.management.color import no_style
+from django.db import connections
+from django.db.models import Max, Model
+from django.utils import timezone
+
+from core.models import (
+    ORDER_STATUS_CHOICES,
+    Categories,
+    OrderItem,
+    Orders,
+    Products,
+    User,
+)
+
+CATEGORY_NAMES = ("Vinos", "Rones", "Whiskys", "Cervezas", "Licores", "Snacks")
+PRODUCT_NAMES = ("Santa Ana", "Cacique", "Diplomatico", "Polar", "Pampero", "Solera")
+PAYMENT_MODES = ("Credit Card", "Cash", "Transfer", "Zelle")
+CITIES = ("Caracas", "Valencia", "Maracaibo", "Barquisimeto", "Merida")
+ORDER_STATUSES = [status for status, _ in ORDER_STATUS_CHOICES]
+BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _tracking_number(order_id: int) -> str:
+    """Return a unique 10 character tracking number for an order id"""
+    digits = []
+    while order_id:
+        order_id, digit = divmod(order_id, 36)
+        digits.append(BASE36[digit])
+    return "".join(reversed(digits)).rjust(10, "0")
+
+
+def _money(cents: int) -> str:
+    """Format an amount of cents as a decimal string"""
+    return f"{cents // 100}.{cents % 100:02d}"
+
+
+class _TableWriter:
+    """Buffer rows for a table and write them with COPY or executemany"""
+
+    def __init__(self, connection: Any, model: Any, columns: tuple, use_copy: bool):
+        self.connection = connection
+        self.table = model._meta.db_table  # pylint: disable=protected-access
+        self.columns = columns
+        self.use_copy = use_copy
+        self.rows: list[tuple] = []
+        self.written = 0
+
+    def flush(self) -> None:
+        """Write the buffered rows"""
+        if not self.rows:
+            return
+        quote = self.connection.ops.quote_name
+        columns = ", ".join(quote(column) for column in self.columns)
+        with self.connection.cursor() as cursor:
+            if self.use_copy:
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(
+                    tuple(r"\N" if value is None else value for value in row)
+                    for row in self.rows
+                )
+                buffer.seek(0)
+                cursor.copy_expert(
+                    f"COPY {quote(self.table)} ({columns}) FROM STDIN "
+                    f"WITH (FORMAT csv, NULL '\\N')",
+                    buffer,
+                )
+            else:
+                placeholders = ", ".join(["%s"] * len(self.columns))
+                cursor.executemany(
+                    f"INSERT INTO {quote(self.table)} ({columns}) "
+                    f"VALUES ({placeholders})",
+                    self.rows,
+                )
+        self.written += len(self.rows)
+        self.rows = []
+
+
+class Command(BaseCommand):
+    """Generate a large, reproducible synthetic dataset"""
+
+    help = (
+        "Generate users, categories, products, orders and order items with "
+        "bulk inserts (COPY on PostgreSQL). The same seed and options always "
+        "produce the same data."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--categories-per-user", type=int, default=5)
+        parser.add_argument("--products-per-user", type=int, default=50)
+        parser.add_argument(
+            "--orders-per-user",
+            type=int,
+            default=20,
+            help="Average, each user gets between 0 and twice this many.",
+        )
+        parser.add_argument(
+            "--items-per-order",
+            type=int,
+            default=4,
+            help="Average, each order gets between 1 and twice this minus one.",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--password", default="password123")
+        parser.add_argument(
+            "--end-date",
+            type=datetime.date.fromisoformat,
+            default=None,
+            help="Date of the most recent orders (YYYY-MM-DD), today by default.",
+        )
+        parser.add_argument("--days", type=int, default=365)
+        parser.add_argument("--batch-size", type=int, default=50000)
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use multi-row INSERTs even on PostgreSQL.",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        connection = connections[options["database"]]
+        use_copy = connection.vendor == "postgresql" and not options["no_copy"]
+        self.rng = random.Random(options["seed"])
+        self.options = options
+        self.end_date = options["end_date"] or timezone.now().date()
+        self.password = make_password(options["password"])
+
+        self.writers = {
+            model: _TableWriter(connection, model, columns, use_copy)
+            for model, columns in (
+                (
+                    User,
+                    (
+                        "id",
+                        "password",
+                        "is_superuser",
+                        "email",
+                        "name",
+                        "last_name",
+                        "address",
+                        "city",
+                        "state",
+                        "zip_code",
+                        "phone",
+                        "id_type",
+                        "id_number",
+                        "is_active",
+                        "is_staff",
+                    ),
+                ),
+                (Categories, ("id", "user_id", "name", "updated_date")),
+                (
+                    Products,
+                    (
+                        "id",
+                        "user_id",
+                        "name",
+                        "description",
+                        "price",
+                        "weight",
+                        "units",
+                        "featured",
+                        "discount",
+                        "image_derivatives",
+                        "updated_date",
+                    ),
+                ),
+                (
+                    Products.category.through,
+                    ("id", "products_id", "categories_id"),
+                ),
+                (
+                    Orders,
+                    (
+                        "id",
+                        "user_id",
+                        "order_status",
+                        "payment_mode",
+                        "tracking_number",
+                        "order_total",
+                        "is_paid",
+                        "order_date",
+                        "updated_date",
+                        "shipped_date",
+                    ),
+                ),
+                (
+                    OrderItem,
+                    (
+                        "id",
+                        "order_id",
+                        "product_id",
+                        "quantity",
+                        "item_price",
+                        "total_price",
+                        "discount",
+                    ),
+                ),
+            )
+        }
+        # Ids are assigned here so that children can reference their parents
+        # without reading anything back from the database.
+        self.next_ids = {model: self._max_id(model) + 1 for model in self.writers}
+        self.prices = array("I")
+        self.discounts = array("B")
+        self.first_product_id = self.next_ids[Products]
+
+        for _ in range(options["users"]):
+            self._generate_user()
+            if sum(len(writer.rows) for writer in self.writers.values()) >= (
+                options["batch_size"]
+            ):
+                self._flush()
+        self._flush()
+        self._reset_sequences(connection)
+
+        for model, writer in self.writers.items():
+            name = model._meta.db_table  # pylint: disable=protected-access
+            self.stdout.write(f"{name}: {writer.written} rows")
+        self.stdout.write(self.style.SUCCESS("Synthetic data generated."))
+
+    @staticmethod
+    def _max_id(model: Any) -> int:
+        """Return the highest id of a table"""
+        return model.objects.aggregate(max_id=Max("id"))["max_id"] or 0
+
+    def _take_id(self, model: Any) -> int:
+        """Return the next id of a table"""
+        next_id = self.next_ids[model]
+        self.next_ids[model] += 1
+        return next_id
+
+    def _add(self, model: Any, row: tuple) -> None:
+        """Buffer a row for a table"""
+        self.writers[model].rows.append(row)
+
+    def _flush(self) -> None:
+        """Write every buffered row, parents before children"""
+        for writer in self.writers.values():
+            writer.flush()
+
+    def _reset_sequences(self, connection: Any) -> None:
+        """Move the id sequences past the generated ids"""
+        models: list[Optional[type[Model]]] = [
+            User,
+            Categories,
+            Products,
+            Products.category.through,
+            Orders,
+            OrderItem,
+        ]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+    def _generate_user(self) -> None:
+        """Generate a user with its catalog and order history"""
+        rng = self.rng
+        options = self.options
+        now = timezone.now()
+
+        user_id = self._take_id(User)
+        self._add(
+            User,
+            (
+                user_id,
+                self.password,
+                False,
+                f"user{user_id}@bodegonasusalud.com",
+                f"Name {user_id}",
+                f"Last Name {user_id}",
+                f"Calle {rng.randint(1, 200)}",
+                rng.choice(CITIES),
+                "Distrito Capital",
+                rng.randint(1000, 9999),
+                f"+58 412 {rng.randint(1000000, 9999999)}",
+                "V",
+                rng.randint(1000000, 30000000),
+                True,
+                False,
+            ),
+        )
+
+        category_ids = []
+        for _ in range(options["categories_per_user"]):
+            category_id = self._take_id(Categories)
+            category_ids.append(category_id)
+            self._add(
+                Categories,
+                (category_id, user_id, rng.choice(CATEGORY_NAMES), now),
+            )
+
+        product_ids = []
+        for _ in range(options["products_per_user"]):
+            product_id = self._take_id(Products)
+            product_ids.append(product_id)
+            price = rng.randint(100, 20000)
+            discount = rng.choice((0, 0, 0, 5, 10, 15))
+            self.prices.append(price)
+            self.discounts.append(discount)
+            self._add(
+                Products,
+                (
+                    product_id,
+                    user_id,
+                    f"{rng.choice(PRODUCT_NAMES)} {product_id}",
+                    "Producto generado para pruebas de carga.",
+                    _money(price),
+                    rng.choice(("0.35", "0.70", "0.75", "1.00")),
+                    rng.choice(("l", "kg", "und")),
+                    rng.random() < 0.1,
+                    _money(discount * 100) if discount else None,
+                    "{}",
+                    now,
+                ),
+            )
+            if category_ids:
+                for category_id in rng.sample(
+                    category_ids, rng.randint(1, min(3, len(category_ids)))
+                ):
+                    self._add(
+                        Products.category.through,
+                        (
+                            self._take_id(Products.category.through),
+                            product_id,
+                            category_id,
+                        ),
+                    )
+
+        if product_ids:
+            for _ in range(rng.randint(0, 2 * options["orders_per_user"])):
+                self._generate_order(user_id, product_ids, now)
+
+    def _generate_order(self, user_id: int, product_ids: list, now: Any) -> None:
+        """Generate an order with priced items"""
+        rng = self.rng
+        order_id = self._take_id(Orders)
+        order_total = 0
+        items = max(1, rng.randint(1, 2 * self.options["items_per_order"] - 1))
+        for product_id in rng.choices(product_ids, k=items):
+            index = product_id - self.first_product_id
+            price, discount = self.prices[index], self.discounts[index]
+            quantity = rng.randint(1, 6)
+            total = (price * (100 - discount) * quantity + 50) // 100
+            order_total += total
+            self._add(
+                OrderItem,
+                (
+                    self._take_id(OrderItem),
+                    order_id,
+                    product_id,
+                    quantity,
+                    _money(price),
+                    _money(total),
+                    _money(discount * 100) if discount else None,
+                ),
+            )
+
+        order_date = self.end_date - datetime.timedelta(
+            days=rng.randrange(max(1, self.options["days"]))
+        )
+        status = rng.choice(ORDER_STATUSES)
+        shipped = None
+        if status != "Created":
+            shipped = datetime.datetime.combine(
+                order_date + datetime.timedelta(days=rng.randint(1, 5)),
+                datetime.time(12),
+                tzinfo=datetime.timezone.utc,
+            )
+        self._add(
+            Orders,
+            (
+                order_id,
+                user_id,
+                status,
+                rng.choice(PAYMENT_MODES),
+                _tracking_number(order_id),
+                _money(order_total),
+                status != "Created",
+                order_date,
+                now,
+                shipped,
+            ),
+        )
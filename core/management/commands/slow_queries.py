@@ -0,0 +1,52 @@
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from core.models import SlowQuery
+
+
+class Command(BaseCommand):
+    """Show the slow query log"""
+
+    help = "Show the slowest recent statements with their route, stack and plan."
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--limit", type=int, default=20)
+        parser.add_argument("--route", help="Only show statements of this route.")
+        parser.add_argument(
+            "--sort",
+            choices=("recent", "duration"),
+            default="recent",
+        )
+        parser.add_argument("--plans", action="store_true", help="Show plans.")
+        parser.add_argument(
+            "--clear", action="store_true", help="Delete the slow query log."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["clear"]:
+            deleted, _ = SlowQuery.objects.all().delete()
+            self.stdout.write(f"Deleted {deleted} slow queries.")
+            return
+
+        queries = SlowQuery.objects.all()
+        if options["route"]:
+            queries = queries.filter(route=options["route"])
+        if options["sort"] == "duration":
+            queries = queries.order_by("-duration_ms")
+        for slow_query in queries[: options["limit"]]:
+            self.stdout.write(
+                self.style.WARNING(
+                    f"{slow_query.created:%Y-%m-%d %H:%M:%S} "
+                    f"{slow_query.duration_ms:.1f} ms "
+                    f"[{slow_query.database}] {slow_query.route or '-'}"
+                )
+            )
+            self.stdout.write(f"  {slow_query.sql}")
+            if slow_query.params:
+                self.stdout.write(f"  params: {slow_query.params}")
+            for frame in slow_query.stack.splitlines():
+                self.stdout.write(f"    {frame}")
+            if options["plans"] and slow_query.plan:
+                for line in slow_query.plan.splitlines():
+                    self.stdout.write(f"    | {line}")
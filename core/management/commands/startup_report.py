@@ -0,0 +1,110 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+# Loads the WSGI application like a gunicorn master does, printing the time
+LOAD_APPLICATION = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "from backend.wsgi import application\n"
+    "print(time.perf_counter() - start)\n"
+)
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+class ImportTime(NamedTuple):
+    """Time of one module import, in microseconds"""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def parse_importtime(output: str) -> list[ImportTime]:
+    """Return the imports reported by `python -X importtime`"""
+    imports = []
+    for line in output.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append(
+                ImportTime(module, int(self_us), int(cumulative_us), len(indent) // 2)
+            )
+    return imports
+
+
+class Command(BaseCommand):
+    """Report the import time of the application at startup"""
+
+    help = (
+        "Load the WSGI application in a fresh interpreter with -X importtime "
+        "and report the load time and the slowest imports."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--settings-module",
+            default="backend.settings_production",
+            help="Settings of the measured application.",
+        )
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument(
+            "--json", action="store_true", help="Print the report as JSON."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        environ = {**os.environ, "DJANGO_SETTINGS_MODULE": options["settings_module"]}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", LOAD_APPLICATION],
+            cwd=settings.BASE_DIR,
+            env=environ,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if result.returncode:
+            raise CommandError(f"Loading the application failed:\n{result.stderr}")
+
+        imports = parse_importtime(result.stderr)
+        packages: dict[str, int] = defaultdict(int)
+        for entry in imports:
+            packages[entry.module.split(".")[0]] += entry.self_us
+        top = options["top"]
+        import_us = sum(entry.cumulative_us for entry in imports if not entry.depth)
+        report = {
+            "settings": options["settings_module"],
+            "load_seconds": float(result.stdout.split()[-1]),
+            "import_seconds": import_us / 1e6,
+            "modules": len(imports),
+            "packages": dict(sorted(packages.items(), key=lambda item: -item[1])[:top]),
+            "slowest": [
+                entry._asdict()
+                for entry in sorted(imports, key=lambda entry: -entry.self_us)[:top]
+            ],
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f"{report['settings']}: application loaded in "
+            f"{report['load_seconds'] * 1000:.0f} ms, {report['modules']} modules "
+            f"imported in {report['import_seconds'] * 1000:.0f} ms"
+        )
+        self.stdout.write(self.style.WARNING("Import time per package:"))
+        for package, self_us in report["packages"].items():
+            self.stdout.write(f"  {self_us / 1000:8.1f} ms  {package}")
+        self.stdout.write(self.style.WARNING("Slowest modules (own time):"))
+        for entry in report["slowest"]:
+            self.stdout.write(
+                f"  {entry['self_us'] / 1000:8.1f} ms  {entry['module']} "
+                f"({entry['cumulative_us'] / 1000:.1f} ms with its imports)"
+            )
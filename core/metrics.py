@@ -0,0 +1,370 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from core.instrumentation import route_name
+from core.middleware import AsyncCapableMiddleware
+
+DEFAULT_METRICS = {
+    # Directory shared by the workers of a server, each one writes its own
+    # file. Without it every process only reports its own values.
+    "DIRECTORY": "",
+    # Bearer token required by the scrape endpoint. Without one the endpoint
+    # is denied unless ALLOW_ANONYMOUS is set (e.g. behind a private network).
+    "TOKEN": "",
+    "ALLOW_ANONYMOUS": False,
+}
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Methods recorded as such, any other one is labelled "other"
+HTTP_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT")
+)
+# Values of the exited workers, merged by the master (see mark_process_dead)
+DEAD_WORKERS_FILE = "metrics_dead.db"
+INITIAL_SIZE = 64 * 1024
+# Layout: a header with the number of bytes used, then entries of
+# [uint32 key length][utf-8 key][padding to 8 bytes][float64 value].
+HEADER = struct.Struct("<I4x")
+KEY_LENGTH = struct.Struct("<I")
+VALUE = struct.Struct("<d")
+
+
+def _entry_size(key_length: int) -> tuple[int, int]:
+    """Return the offset of the value and the size of an entry"""
+    value_offset = KEY_LENGTH.size + key_length
+    value_offset += -value_offset % 8
+    return value_offset, value_offset + VALUE.size
+
+
+def _read_entries(data: Any) -> Iterator[tuple[str, float, int]]:
+    """Yield the key, value and value position of each entry of a buffer"""
+    (used,) = HEADER.unpack_from(data, 0)
+    position = HEADER.size
+    while position < used:
+        (key_length,) = KEY_LENGTH.unpack_from(data, position)
+        key = bytes(data[position + 4 : position + 4 + key_length]).decode()
+        value_offset, size = _entry_size(key_length)
+        (value,) = VALUE.unpack_from(data, position + value_offset)
+        yield key, value, position + value_offset
+        position += size
+
+
+class MmapValues:
+    """Float values by key in a memory mapped file written by one process
+
+    Values are updated in place and new keys are appended before the used
+    size in the header is moved past them, so other processes can read the
+    file at any time without locking.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._positions: dict[str, int] = {}
+        if path is None:
+            self._map = mmap.mmap(-1, INITIAL_SIZE)
+            self._used = HEADER.size
+            HEADER.pack_into(self._map, 0, self._used)
+            return
+        with open(path, "a+b") as file:
+            size = max(os.fstat(file.fileno()).st_size, INITIAL_SIZE)
+            file.truncate(size)
+            self._map = mmap.mmap(file.fileno(), size)
+        (self._used,) = HEADER.unpack_from(self._map, 0)
+        if not self._used:
+            self._used = HEADER.size
+            HEADER.pack_into(self._map, 0, self._used)
+        for key, _, position in _read_entries(self._map):
+            self._positions[key] = position
+
+    def _grow(self, needed: int) -> None:
+        """Remap the values to a buffer of at least needed bytes"""
+        size = len(self._map)
+        while size < needed:
+            size *= 2
+        if self.path is None:
+            new_map = mmap.mmap(-1, size)
+            new_map[: self._used] = self._map[: self._used]
+        else:
+            with open(self.path, "r+b") as file:
+                file.truncate(size)
+                new_map = mmap.mmap(file.fileno(), size)
+        self._map.close()
+        self._map = new_map
+
+    def _position(self, key: str) -> int:
+        """Return the position of the value of a key, adding it if needed"""
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+        encoded = key.encode()
+        value_offset, size = _entry_size(len(encoded))
+        if self._used + size > len(self._map):
+            self._grow(self._used + size)
+        KEY_LENGTH.pack_into(self._map, self._used, len(encoded))
+        self._map[self._used + 4 : self._used + 4 + len(encoded)] = encoded
+        VALUE.pack_into(self._map, self._used + value_offset, 0.0)
+        position = self._used + value_offset
+        self._used += size
+        HEADER.pack_into(self._map, 0, self._used)
+        self._positions[key] = position
+        return position
+
+    def inc(self, key: str, amount: float) -> None:
+        """Add an amount to the value of a key"""
+        with self._lock:
+            position = self._position(key)
+            (value,) = VALUE.unpack_from(self._map, position)
+            VALUE.pack_into(self._map, position, value + amount)
+
+    def items(self) -> Iterator[tuple[str, float]]:
+        """Yield the keys and values of this process"""
+        with self._lock:
+            entries = [(key, value) for key, value, _ in _read_entries(self._map)]
+        return iter(entries)
+
+
+class Metric:
+    """Base class of the metrics of a registry"""
+
+    kind = ""
+
+    def __init__(
+        self, registry: "Registry", name: str, documentation: str, labelnames: tuple
+    ) -> None:
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+    def key(
+        self, sample: str, labels: dict[str, Any], le: Optional[float] = None
+    ) -> str:
+        """Return the storage key of a sample"""
+        pairs = [[name, str(labels[name])] for name in self.labelnames]
+        if le is not None:
+            pairs.append(["le", repr(le)])
+        return json.dumps([sample, pairs])
+
+
+class Counter(Metric):
+    """Monotonic counter, exposed as <name>_total"""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """Increment the counter for a set of labels"""
+        self.registry.values.inc(self.key(f"{self.name}_total", labels), amount)
+
+
+class Histogram(Metric):
+    """Distribution of observations over fixed buckets"""
+
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        super().__init__(*args)
+        self.buckets = tuple(float(bucket) for bucket in buckets)
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record an observation for a set of labels"""
+        values = self.registry.values
+        for bucket in self.buckets:
+            if value <= bucket:
+                # Buckets are stored non cumulative, one write per observation
+                values.inc(self.key(f"{self.name}_bucket", labels, le=bucket), 1)
+                break
+        values.inc(self.key(f"{self.name}_count", labels), 1)
+        values.inc(self.key(f"{self.name}_sum", labels), value)
+
+
+def _format_labels(labels: list) -> str:
+    """Return labels in the Prometheus text format"""
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+class Registry:
+    """Metrics of the application, aggregated over the worker processes"""
+
+    def __init__(self) -> None:
+        self.metrics: dict[str, Metric] = {}
+        self._values: Optional[MmapValues] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def directory(self) -> str:
+        """Return the directory shared by the worker processes"""
+        return {**DEFAULT_METRICS, **getattr(settings, "METRICS", {})}["DIRECTORY"]
+
+    @property
+    def values(self) -> MmapValues:
+        """Return the values of this process, opened after any fork"""
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    directory = self.directory
+                    path = None
+                    if directory:
+                        Path(directory).mkdir(parents=True, exist_ok=True)
+                        path = Path(directory) / f"metrics_{pid}.db"
+                    self._values = MmapValues(path)
+                    self._pid = pid
+        return self._values  # type: ignore
+
+    def mark_process_dead(self, pid: int) -> None:
+        """Merge the file of an exited worker into the dead workers' one
+
+        Called by the master only (gunicorn's child_exit), so the merged file
+        has a single writer. Totals are kept, and the directory doesn't grow
+        with every recycled worker.
+        """
+        directory = self.directory
+        if not directory:
+            return
+        path = Path(directory) / f"metrics_{pid}.db"
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return
+        dead = MmapValues(Path(directory) / DEAD_WORKERS_FILE)
+        for key, value, _ in _read_entries(data):
+            dead.inc(key, value)
+        path.unlink()
+
+    def reset(self) -> None:
+        """Forget the values of this process, for tests"""
+        with self._lock:
+            self._values = None
+            self._pid = None
+
+    def counter(self, name: str, documentation: str, labelnames: tuple) -> Counter:
+        """Register a counter"""
+        metric = Counter(self, name, documentation, labelnames)
+        self.metrics[name] = metric
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple,
+        buckets: tuple = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Register a histogram"""
+        metric = Histogram(self, name, documentation, labelnames, buckets=buckets)
+        self.metrics[name] = metric
+        return metric
+
+    def collect(self) -> dict[str, float]:
+        """Return the values of every process summed by key"""
+        totals: dict[str, float] = defaultdict(float)
+        directory = self.directory
+        if not directory:
+            for key, value in self.values.items():
+                totals[key] += value
+            return totals
+        for path in Path(directory).glob("metrics_*.db"):
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                continue
+            for key, value, _ in _read_entries(data):
+                totals[key] += value
+        return totals
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text format"""
+        samples: dict[str, list] = defaultdict(list)
+        for key, value in self.collect().items():
+            sample, labels = json.loads(key)
+            samples[sample].append((labels, value))
+
+        lines = []
+        for name, metric in sorted(self.metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if isinstance(metric, Histogram):
+                lines.extend(self._render_histogram(metric, samples))
+                continue
+            for labels, value in sorted(samples[f"{name}_total"]):
+                lines.append(f"{name}_total{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_histogram(metric: Histogram, samples: dict[str, list]) -> list[str]:
+        """Return the cumulative buckets, count and sum lines of a histogram"""
+        name = metric.name
+        buckets: dict[str, dict[float, float]] = defaultdict(dict)
+        for labels, value in samples[f"{name}_bucket"]:
+            buckets[json.dumps(labels[:-1])][float(labels[-1][1])] = value
+        lines = []
+        for labels, count in sorted(samples[f"{name}_count"]):
+            counts = buckets[json.dumps(labels)]
+            cumulative = 0.0
+            for bucket in metric.buckets:
+                cumulative += counts.get(bucket, 0.0)
+                le = _format_labels(labels + [["le", repr(bucket)]])
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            le = _format_labels(labels + [["le", "+Inf"]])
+            lines.append(f"{name}_bucket{le} {count}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        for labels, value in sorted(samples[f"{name}_sum"]):
+            lines.append(f"{name}_sum{_format_labels(labels)} {value}")
+        return lines
+
+
+registry = Registry()
+
+REQUESTS = registry.counter(
+    "http_requests", "Requests handled per route", ("route", "method", "status")
+)
+LATENCY = registry.histogram(
+    "http_request_duration_seconds",
+    "Request latency per route in seconds",
+    ("route", "method"),
+)
+
+
+class MetricsMiddleware(AsyncCapableMiddleware):
+    """Count requests and record their latency per view or viewset action"""
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self.__acall__(request)
+        start = time.perf_counter()
+        response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start)
+        return response
+
+    @staticmethod
+    def observe(request: HttpRequest, response: HttpResponse, duration: float) -> None:
+        """Record a handled request"""
+        # Unresolved paths share one route so that scanners can't add series
+        route = route_name(request) if request.resolver_match else "unmatched"
+        # Like unresolved paths, unknown methods can't add series either
+        method = request.method if request.method in HTTP_METHODS else "other"
+        REQUESTS.inc(route=route, method=method, status=response.status_code)
+        LATENCY.observe(duration, route=route, method=method)
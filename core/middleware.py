@@ -0,0 +1,78 @@
+import asyncio
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Iterator, Optional
+
+from django.http.response import HttpResponseBase
+
+
+class AsyncCapableMiddleware:
+    """Base of middleware that runs on the event loop under ASGI
+
+    Django runs a sync-only middleware, and everything inside it, in a thread
+    for the whole request, so async views behind it would still hold one
+    thread per connection. Subclasses hand over to their `__acall__` coroutine
+    when `is_async` is set, and an `aprocess_view` coroutine replaces
+    `process_view` in that mode.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable) -> None:
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the instance as a coroutine function, like MiddlewareMixin
+            self._is_coroutine = (
+                asyncio.coroutines._is_coroutine  # pylint: disable=protected-access
+            )
+            if hasattr(self, "aprocess_view"):
+                self.process_view = self.aprocess_view
+
+
+def call_on_close(response: HttpResponseBase, callback: Callable[[], Any]) -> None:
+    """Call callback once the server closed a response
+
+    The body of a streaming response is generated while the server sends it,
+    after the middleware returned, and the server closes it once sent.
+    """
+    close = response.close
+
+    def close_then_call() -> None:
+        try:
+            close()
+        finally:
+            callback()
+
+    response.close = close_then_call  # type: ignore
+
+
+def _with_value(var: ContextVar, value: Any, content: Iterator[bytes]) -> Iterator:
+    """Yield a streamed body, setting a context variable while each part is made"""
+    iterator = iter(content)
+    while True:
+        token = var.set(value)
+        try:
+            part = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            var.reset(token)
+        yield part
+
+
+def reset_after_response(
+    var: ContextVar, token: Token, response: Optional[HttpResponseBase]
+) -> None:
+    """Reset a context variable set for a request
+
+    The body of a streaming response is generated after the middleware
+    returned: the variable is set again around each part, so that work is
+    attributed to the request too, without leaking into the context when
+    the body is never consumed or closed.
+    """
+    if response is not None and response.streaming:
+        response.streaming_content = _with_value(
+            var, var.get(), response.streaming_content
+        )
+    var.reset(token)
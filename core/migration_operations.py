@@ -0,0 +1,53 @@
+from typing import Any
+
+from django.contrib.postgres import operations
+from django.db import migrations
+
+
+def _is_postgresql(schema_editor: Any) -> bool:
+    """Return whether a migration runs against PostgreSQL"""
+    return schema_editor.connection.vendor == "postgresql"
+
+
+class AddIndexConcurrently(operations.AddIndexConcurrently):
+    """Build an index without locking writes on PostgreSQL
+
+    Other engines (SQLite in development) have no concurrent index builds, so
+    the index is added as usual there. The migration must be non atomic.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+class RemoveIndexConcurrently(operations.RemoveIndexConcurrently):
+    """Drop an index without locking writes on PostgreSQL, as usual elsewhere"""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.RemoveIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if _is_postgresql(schema_editor):
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.RemoveIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
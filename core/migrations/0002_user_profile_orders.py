@@ -0,0 +1,94 @@
+# Generated by Django 4.0.2 on 2026-10-18 12:02
+
+import core.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='products',
+            name='discount',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='address',
+            field=models.CharField(default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='city',
+            field=models.CharField(default='', max_length=50),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='id_number',
+            field=models.IntegerField(default=1000),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='id_type',
+            field=models.CharField(default='', max_length=20),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='last_name',
+            field=models.CharField(default='', max_length=255),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='phone',
+            field=models.CharField(default='', max_length=20),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='state',
+            field=models.CharField(default='', max_length=50),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='zip_code',
+            field=models.IntegerField(default=1000),
+        ),
+        migrations.CreateModel(
+            name='Orders',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_status', models.CharField(choices=[('Created', 'Created'), ('Shipped', 'Shipped'), ('Completed', 'Completed'), ('Refunded', 'Refunded')], default='Created', max_length=20)),
+                ('payment_mode', models.CharField(max_length=255)),
+                ('tracking_number', models.CharField(default=core.models._generate_tracking_number, max_length=150, null=True, unique=True)),
+                ('order_total', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('is_paid', models.BooleanField(default=False)),
+                ('order_date', models.DateField(auto_now_add=True)),
+                ('updated_date', models.DateTimeField(auto_now=True)),
+                ('shipped_date', models.DateTimeField(blank=True, null=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='OrderItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.IntegerField()),
+                ('item_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('discount', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_items', to='core.orders')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.products')),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.2 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_user_profile_orders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='categories',
+            name='updated_date',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='products',
+            name='updated_date',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.0.2 on 2026-10-18 12:11
+
+from django.db import migrations, models
+
+from core.migration_operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Build the indexes without locking the tables against writes (on
+    # PostgreSQL, other engines build them as usual)
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_catalog_updated_date'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='categories',
+            index=models.Index(fields=['name'], name='categories_name_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='orderitem',
+            index=models.Index(fields=['order', 'product'], name='orderitem_order_product_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='orders',
+            index=models.Index(fields=['user', '-order_date', '-id'], name='orders_user_date_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='orders',
+            index=models.Index(fields=['user', 'updated_date'], name='orders_user_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='products',
+            index=models.Index(fields=['user', '-id'], name='products_user_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='products',
+            index=models.Index(fields=['user', 'updated_date'], name='products_user_updated_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='products',
+            index=models.Index(condition=models.Q(('featured', True)), fields=['user', '-id'], name='products_user_featured_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.0.2 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_per_user_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('duration_ms', models.FloatField()),
+                ('database', models.CharField(max_length=100)),
+                ('route', models.CharField(blank=True, max_length=255)),
+                ('sql', models.TextField()),
+                ('params', models.TextField(blank=True)),
+                ('stack', models.TextField(blank=True)),
+                ('plan', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name_plural': 'slow queries',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.2 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_slow_query'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='products',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.0.2 on 2026-10-18 14:02
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from core.migration_operations import RemoveIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Drop the index without locking the table against writes (on PostgreSQL)
+    atomic = False
+
+    dependencies = [
+        ('core', '0006_products_image_derivatives'),
+    ]
+
+    operations = [
+        RemoveIndexConcurrently(
+            model_name='products',
+            name='products_user_featured_idx',
+        ),
+        # The foreign key indexes are prefixes of the per user indexes of 0004
+        migrations.AlterField(
+            model_name='orderitem',
+            name='order',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='order_items', to='core.orders'),
+        ),
+        migrations.AlterField(
+            model_name='orders',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='products',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -81,6 +81,14 @@ class Categories(models.Model):
         on_delete=models.CASCADE,
     )
     name = models.CharField(max_length=255)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta class for categories"""
+
+        indexes = [
+            models.Index(fields=["name"], name="categories_name_idx"),
+        ]
 
     def __str__(self):  # pylint: disable=invalid-str-returned
         return self.name
@@ -89,9 +97,11 @@ class Categories(models.Model):
 class Products(models.Model):
     """Product to be saved with a category"""
 
+    # Looked up through the indexes led by user (see Meta.indexes)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     name = models.CharField(max_length=255)
     description = models.TextField()
@@ -104,6 +114,19 @@ class Products(models.Model):
         max_digits=10, decimal_places=2, blank=True, null=True
     )
     image = models.ImageField(null=True, upload_to=product_image_file_path)
+    # Resized copies of the image, built by core.images
+    image_derivatives = models.JSONField(default=dict, blank=True)
+    updated_date = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        """Meta class for products"""
+
+        indexes = [
+            models.Index(fields=["user", "-id"], name="products_user_id_idx"),
+            models.Index(
+                fields=["user", "updated_date"], name="products_user_updated_idx"
+            ),
+        ]
 
     def __str__(self):  # pylint: disable=invalid-str-returned
         return self.name
@@ -112,9 +135,11 @@ class Products(models.Model):
 class Orders(models.Model):
     """Orders that will be created with products and users"""
 
+    # Looked up through the indexes led by user (see Meta.indexes)
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
     order_status = models.CharField(
         max_length=20, choices=ORDER_STATUS_CHOICES, default="Created"
@@ -131,6 +156,18 @@ class Orders(models.Model):
     updated_date = models.DateTimeField(auto_now=True)
     shipped_date = models.DateTimeField(blank=True, null=True)
 
+    class Meta:
+        """Meta class for orders"""
+
+        indexes = [
+            models.Index(
+                fields=["user", "-order_date", "-id"], name="orders_user_date_idx"
+            ),
+            models.Index(
+                fields=["user", "updated_date"], name="orders_user_updated_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.id} - {self.tracking_number}"
 
@@ -138,8 +175,9 @@ class Orders(models.Model):
 class OrderItem(models.Model):
     """Order items of the Order"""
 
+    # Looked up through orderitem_order_product_idx
     order = models.ForeignKey(
-        "Orders", related_name="order_items", on_delete=models.CASCADE
+        "Orders", related_name="order_items", on_delete=models.CASCADE, db_index=False
     )
     product = models.ForeignKey("Products", on_delete=models.CASCADE)
     quantity = models.IntegerField()
@@ -149,5 +187,36 @@ class OrderItem(models.Model):
         max_digits=10, decimal_places=2, blank=True, null=True
     )
 
+    class Meta:
+        """Meta class for order items"""
+
+        indexes = [
+            models.Index(
+                fields=["order", "product"], name="orderitem_order_product_idx"
+            ),
+        ]
+
     def __str__(self):
         return f"{self.order.id} - {self.order.tracking_number}"
+
+
+class SlowQuery(models.Model):
+    """Statement slower than the slow query threshold, see core.slow_queries"""
+
+    created = models.DateTimeField(auto_now_add=True)
+    duration_ms = models.FloatField()
+    database = models.CharField(max_length=100)
+    route = models.CharField(max_length=255, blank=True)
+    sql = models.TextField()
+    params = models.TextField(blank=True)
+    stack = models.TextField(blank=True)
+    plan = models.TextField(blank=True)
+
+    class Meta:
+        """Meta class for slow queries"""
+
+        ordering = ["-id"]
+        verbose_name_plural = "slow queries"
+
+    def __str__(self):
+        return f"{self.duration_ms:.0f} ms - {self.route or self.sql[:60]}"
@@ -0,0 +1,263 @@
+import asyncio
+import cProfile
+import hmac
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse
+
+from core.instrumentation import route_name
+from core.middleware import AsyncCapableMiddleware
+
+DEFAULT_REQUEST_PROFILING = {
+    # Value of the X-Profile request header that profiles a request, an empty
+    # token disables the header.
+    "HEADER_TOKEN": "",
+    # Sampling rate per route, keyed by "<ViewSet>.<action>" for viewsets or
+    # by URL name (e.g. "user:me") for other views.
+    "ROUTES": {},
+    "DIRECTORY": "profiles",
+    # "pstats" files for pstats/snakeviz, or "collapsed" stacks for
+    # flamegraph.pl/speedscope, converted in a background thread.
+    "FORMAT": "pstats",
+    # Oldest profiles are deleted once the directory grows past this size.
+    "MAX_BYTES": 100 * 1024 * 1024,
+}
+PROFILE_HEADER = "HTTP_X_PROFILE"
+MAX_STACK_DEPTH = 64
+# Call paths visited for a collapsed profile, the others are dropped
+MAX_STACKS = 20000
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the thread converting the collapsed profiles of this process"""
+    global _executor, _executor_pid  # pylint: disable=global-statement
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="profiling"
+            )
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def wait_for_conversions() -> None:
+    """Wait until the profiles submitted so far are written"""
+    _get_executor().submit(lambda: None).result()
+
+
+def _label(func: tuple) -> str:
+    """Return a flamegraph frame label for a pstats function key"""
+    filename, line, name = func
+    if filename == "~":
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ":")
+
+
+def collapsed_stacks(stats: pstats.Stats) -> Iterator[str]:
+    """Yield "frame;frame;frame microseconds" lines from profile stats
+
+    cProfile only records caller -> callee edges, so the time of a function
+    called from several places is split between its call paths in proportion
+    to the time each caller spent in it. Paths are not followed once their
+    share rounds to 0 microseconds, and at most MAX_STACKS are visited: the
+    paths of a large view multiply with each level of calls.
+    """
+    callees: dict[tuple, dict[tuple, tuple]] = {}
+    roots = []
+    for func, (_, _, _, _, callers) in stats.stats.items():  # type: ignore
+        if not callers:
+            roots.append(func)
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge
+
+    visited = 0
+
+    def visit(func: tuple, path: list[str], self_time: float, total: float) -> Any:
+        nonlocal visited
+        visited += 1
+        if round(self_time * 1e6):
+            yield f"{';'.join(path)} {round(self_time * 1e6)}"
+        func_total = stats.stats[func][3]  # type: ignore
+        if len(path) >= MAX_STACK_DEPTH or not func_total:
+            return
+        ratio = total / func_total
+        for callee, edge in callees.get(func, {}).items():
+            label = _label(callee)
+            if label in path or visited >= MAX_STACKS:
+                continue
+            if not round(edge[3] * ratio * 1e6):
+                # Nothing left to show under this path
+                continue
+            yield from visit(callee, path + [label], edge[2] * ratio, edge[3] * ratio)
+
+    for root in roots:
+        _, _, tt, ct, _ = stats.stats[root]  # type: ignore
+        if visited < MAX_STACKS and round(ct * 1e6):
+            yield from visit(root, [_label(root)], tt, ct)
+
+
+class RequestProfilingMiddleware(AsyncCapableMiddleware):
+    """Profile selected requests with cProfile and save the result
+
+    A request is profiled when it carries the configured X-Profile token or
+    is picked by the sampling rate of its route. The view and the rendering of
+    its response are profiled, and the file name is returned in the
+    X-Profile-File response header (collapsed stacks are written there
+    shortly after the response). Place it last in MIDDLEWARE: it calls the
+    view itself, so the process_view of later middleware would be skipped.
+    Async views are not profiled, their awaits interleave with other requests.
+    """
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        return await self.get_response(request)
+
+    @property
+    def config(self) -> dict[str, Any]:
+        """Return the profiling settings merged over the defaults"""
+        return {
+            **DEFAULT_REQUEST_PROFILING,
+            **getattr(settings, "REQUEST_PROFILING", {}),
+        }
+
+    def should_profile(self, request: HttpRequest, route: str) -> bool:
+        """Return whether to profile a request"""
+        config = self.config
+        token = config["HEADER_TOKEN"]
+        header = request.META.get(PROFILE_HEADER)
+        if token and header and hmac.compare_digest(header, token):
+            return True
+        rate = config["ROUTES"].get(route)
+        return bool(rate) and random.random() < rate
+
+    def process_view(
+        self,
+        request: HttpRequest,
+        view_func: Callable,
+        view_args: tuple,
+        view_kwargs: dict,
+    ) -> Optional[HttpResponse]:
+        """Run the view under the profiler if the request is selected"""
+        route = route_name(request)
+        if asyncio.iscoroutinefunction(view_func) or not self.should_profile(
+            request, route
+        ):
+            return None
+        return self.profile(route, request, view_func, view_args, view_kwargs)
+
+    async def aprocess_view(
+        self,
+        request: HttpRequest,
+        view_func: Callable,
+        view_args: tuple,
+        view_kwargs: dict,
+    ) -> Optional[HttpResponse]:
+        """Run a selected sync view under the profiler, in a thread"""
+        route = route_name(request)
+        if asyncio.iscoroutinefunction(view_func) or not self.should_profile(
+            request, route
+        ):
+            return None
+        return await sync_to_async(self.profile)(
+            route, request, view_func, view_args, view_kwargs
+        )
+
+    def profile(
+        self,
+        route: str,
+        request: HttpRequest,
+        view_func: Callable,
+        view_args: tuple,
+        view_kwargs: dict,
+    ) -> Optional[HttpResponse]:
+        """Run a view and render its response under the profiler"""
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active in this thread
+            return None
+        try:
+            response = view_func(request, *view_args, **view_kwargs)
+            if callable(getattr(response, "render", None)):
+                response = response.render()
+        finally:
+            profiler.disable()
+        duration = (time.perf_counter() - start) * 1000
+        response["X-Profile-File"] = self.save(profiler, route, duration)
+        return response
+
+    def save(self, profiler: cProfile.Profile, route: str, duration: float) -> str:
+        """Write a profile to the profiles directory and return its file name"""
+        config = self.config
+        directory = Path(config["DIRECTORY"])
+        directory.mkdir(parents=True, exist_ok=True)
+        collapsed = config["FORMAT"] == "collapsed"
+        name = "{}-{}-{}-{}ms.{}".format(
+            time.strftime("%Y%m%dT%H%M%S"),
+            re.sub(r"[^\w.-]", "_", route),
+            os.getpid(),
+            round(duration),
+            "collapsed" if collapsed else "pstats",
+        )
+        if collapsed:
+            # The stats are copied here, the walk of the call paths is left to
+            # the profiling thread so it doesn't delay the response
+            _get_executor().submit(
+                self.write_collapsed,
+                pstats.Stats(profiler),
+                directory / name,
+                config["MAX_BYTES"],
+            )
+        else:
+            profiler.dump_stats(directory / name)
+            self.evict(directory, config["MAX_BYTES"], keep=name)
+        return name
+
+    @classmethod
+    def write_collapsed(cls, stats: pstats.Stats, path: Path, max_bytes: int) -> None:
+        """Write the collapsed stacks of a profile, then evict the oldest ones"""
+        partial = path.with_name(path.name + ".tmp")
+        with open(partial, "w", encoding="utf-8") as output:
+            for line in collapsed_stacks(stats):
+                output.write(line + "\n")
+        partial.replace(path)
+        cls.evict(path.parent, max_bytes, keep=path.name)
+
+    @staticmethod
+    def evict(directory: Path, max_bytes: int, keep: str) -> None:
+        """Delete the oldest profiles, other than keep, until the directory fits"""
+        profiles = []
+        for path in directory.iterdir():
+            if path.suffix in (".pstats", ".collapsed") and path.name != keep:
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                profiles.append((stat.st_mtime, stat.st_size, path))
+        total = (directory / keep).stat().st_size
+        total += sum(size for _, size, _ in profiles)
+        for _, size, path in sorted(profiles):
+            if total <= max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,66 @@
+from typing import Any
+
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.images import image_is_current, schedule_derivatives
+from core.instrumentation import timing_wrapper
+from core.models import Categories, OrderItem, Orders, Products
+from core.slow_queries import slow_query_wrapper
+
+
+@receiver(connection_created)
+def install_execute_wrappers(connection: Any, **kwargs: Any) -> None:
+    """Instrument the queries of every connection, in whichever thread
+
+    The wrappers only act within requests, which they find through context
+    variables, so that worker threads of async views are covered too.
+    """
+    # pylint: disable=unused-argument
+    for wrapper in (timing_wrapper, slow_query_wrapper):
+        if wrapper not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wrapper)
+
+
+@receiver(m2m_changed, sender=Products.category.through)
+def touch_products_on_category_change(
+    instance: Any, action: str, reverse: bool, pk_set: Any, **kwargs: Any
+) -> None:
+    """Mark products as modified when their categories are changed"""
+    # pylint: disable=unused-argument
+    if action == "pre_clear" and reverse:
+        # The products are gone from the relation once the category is cleared
+        products = Products.objects.filter(category=instance)
+    elif action in ("post_add", "post_remove", "post_clear") and not reverse:
+        products = Products.objects.filter(pk=instance.pk)
+    elif action in ("post_add", "post_remove") and reverse:
+        products = Products.objects.filter(pk__in=pk_set)
+    else:
+        return
+    products.update(updated_date=timezone.now())
+
+
+@receiver(post_save, sender=Categories)
+@receiver(pre_delete, sender=Categories)
+def touch_products_of_category(instance: Categories, **kwargs: Any) -> None:
+    """Mark products as modified when one of their categories changes"""
+    # pylint: disable=unused-argument
+    Products.objects.filter(category=instance).update(updated_date=timezone.now())
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def touch_order_of_item(instance: OrderItem, **kwargs: Any) -> None:
+    """Mark an order as modified when one of its items changes"""
+    # pylint: disable=unused-argument
+    Orders.objects.filter(pk=instance.order_id).update(updated_date=timezone.now())
+
+
+@receiver(post_save, sender=Products)
+def build_image_derivatives(instance: Products, **kwargs: Any) -> None:
+    """Build resized copies of a new product image off the request"""
+    # pylint: disable=unused-argument
+    if instance.image and not image_is_current(instance):
+        schedule_derivatives(instance)
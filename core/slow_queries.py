@@ -0,0 +1,226 @@
+import logging
+import queue
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connections
+from django.http import HttpRequest, HttpResponse
+
+from core.instrumentation import route_name
+from core.middleware import AsyncCapableMiddleware, reset_after_response
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SLOW_QUERY_LOG = {
+    "THRESHOLD_MS": 200,
+    # Number of slow queries kept, older ones are deleted
+    "CAPACITY": 500,
+    "EXPLAIN": True,
+    # Record (and EXPLAIN) from a background thread, off the request path
+    "ASYNC": True,
+    "STACK_DEPTH": 8,
+    # Save the bound parameters of the statements, with the strings redacted.
+    # Off by default, they may hold credentials or personal data.
+    "STORE_PARAMS": False,
+}
+MAX_PENDING = 1000
+MAX_PARAMS_LENGTH = 2000
+
+# Route of the current request, "" until it is resolved and None outside
+# requests, whose statements aren't logged
+_route: ContextVar[Optional[str]] = ContextVar("slow_query_route", default=None)
+_recording = threading.local()
+
+
+def _config() -> dict[str, Any]:
+    """Return the slow query settings merged over the defaults"""
+    return {**DEFAULT_SLOW_QUERY_LOG, **getattr(settings, "SLOW_QUERY_LOG", {})}
+
+
+def _trimmed_stack(depth: int) -> str:
+    """Return the innermost frames of the project code, outermost first"""
+    base_dir = str(Path(settings.BASE_DIR).resolve())
+    frames = [
+        frame
+        for frame in traceback.extract_stack()
+        if frame.filename.startswith(base_dir)
+        and "site-packages" not in frame.filename
+        and frame.filename != __file__
+    ]
+    return "\n".join(
+        f"{Path(frame.filename).relative_to(base_dir)}:{frame.lineno} in {frame.name}"
+        for frame in frames[-depth:]
+    )
+
+
+def _explain(alias: str, sql: str, params: Any) -> str:
+    """Return the query plan of a statement without running it"""
+    connection = connections[alias]
+    if connection.vendor == "postgresql":
+        prefix = "EXPLAIN (ANALYZE off) "
+    elif connection.vendor == "sqlite":
+        prefix = "EXPLAIN QUERY PLAN "
+    else:
+        prefix = "EXPLAIN "
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return "\n".join(
+                " ".join(str(column) for column in row) for row in cursor.fetchall()
+            )
+    except DatabaseError as error:
+        return f"EXPLAIN failed: {error}"
+
+
+def _redact(param: Any) -> Any:
+    """Return a parameter with its text or binary content hidden"""
+    if isinstance(param, (str, bytes, bytearray, memoryview)):
+        return f"<{type(param).__name__}: {len(param)}>"
+    if isinstance(param, (list, tuple)):
+        return type(param)(_redact(item) for item in param)
+    if isinstance(param, dict):
+        return {key: _redact(value) for key, value in param.items()}
+    return param
+
+
+def _stored_params(params: Any) -> str:
+    """Return the parameters saved with a slow query, if enabled"""
+    if params is None or not _config()["STORE_PARAMS"]:
+        return ""
+    return repr(_redact(params))[:MAX_PARAMS_LENGTH]
+
+
+def record(entry: dict[str, Any]) -> None:
+    """Explain a slow SELECT and save it, keeping only the newest CAPACITY"""
+    # pylint: disable=import-outside-toplevel
+    from core.models import SlowQuery
+
+    config = _config()
+    _recording.active = True
+    try:
+        plan = ""
+        if config["EXPLAIN"] and entry["sql"].lstrip()[:6].upper() == "SELECT":
+            plan = _explain(entry["database"], entry["sql"], entry["raw_params"])
+        slow_query = SlowQuery.objects.create(
+            duration_ms=entry["duration_ms"],
+            database=entry["database"],
+            route=entry["route"] or "",
+            sql=entry["sql"],
+            params=_stored_params(entry["raw_params"]),
+            stack=entry["stack"],
+            plan=plan,
+        )
+        SlowQuery.objects.filter(id__lte=slow_query.id - config["CAPACITY"]).delete()
+    except DatabaseError:
+        logger.exception("Could not record a slow query")
+    finally:
+        _recording.active = False
+
+
+class _Recorder:
+    """Background thread recording slow queries from a bounded queue"""
+
+    def __init__(self) -> None:
+        self.queue: queue.Queue = queue.Queue(maxsize=MAX_PENDING)
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+
+    def submit(self, entry: dict[str, Any]) -> None:
+        """Queue a slow query, dropping it if the recorder is behind"""
+        if self.thread is None or not self.thread.is_alive():
+            with self.lock:
+                if self.thread is None or not self.thread.is_alive():
+                    self.thread = threading.Thread(
+                        target=self.run, name="slow-query-recorder", daemon=True
+                    )
+                    self.thread.start()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            logger.warning("Slow query queue full, dropping: %s", entry["sql"][:200])
+
+    def run(self) -> None:
+        """Record queued slow queries until the process exits"""
+        while True:
+            entry = self.queue.get()
+            close_old_connections()
+            record(entry)
+            close_old_connections()
+            self.queue.task_done()
+
+
+recorder = _Recorder()
+
+
+def slow_query_wrapper(
+    execute: Callable, sql: str, params: Any, many: bool, context: dict
+) -> Any:
+    """Database execute wrapper logging statements slower than the threshold
+
+    It is installed on every connection, and only logs within requests.
+    """
+    route = _route.get()
+    if route is None or getattr(_recording, "active", False):
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration = (time.perf_counter() - start) * 1000
+    config = _config()
+    if duration < config["THRESHOLD_MS"]:
+        return result
+
+    logger.warning("Slow query (%.1f ms) in %s: %s", duration, route, sql[:500])
+    entry = {
+        "duration_ms": round(duration, 2),
+        "database": context["connection"].alias,
+        "route": route,
+        "sql": sql,
+        "raw_params": None if many else params,
+        "stack": _trimmed_stack(config["STACK_DEPTH"]),
+    }
+    if config["ASYNC"]:
+        recorder.submit(entry)
+    else:
+        record(entry)
+    return result
+
+
+class SlowQueryMiddleware(AsyncCapableMiddleware):
+    """Log the slow statements of a request with its view or viewset action
+
+    The statements of a streamed body (e.g. the order export) are logged
+    with the route too, while the server generates it.
+    """
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.is_async:
+            return self.__acall__(request)
+        token = _route.set("")
+        response = None
+        try:
+            response = self.get_response(request)
+            return response
+        finally:
+            reset_after_response(_route, token, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        token = _route.set("")
+        response = None
+        try:
+            response = await self.get_response(request)
+            return response
+        finally:
+            reset_after_response(_route, token, response)
+
+    def process_view(self, request: HttpRequest, *args: Any) -> None:
+        """Attribute the following statements to the resolved route"""
+        _route.set(route_name(request))
+
+    async def aprocess_view(self, request: HttpRequest, *args: Any) -> None:
+        """Attribute the following statements to the resolved route"""
+        _route.set(route_name(request))
@@ -0,0 +1,128 @@
+import importlib
+import json
+import sys
+from io import StringIO
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db.models import Sum
+
+from core import models
+from core.management.commands.startup_report import ImportTime, parse_importtime
+
+OPTIONS = {
+    "users": 3,
+    "categories_per_user": 2,
+    "products_per_user": 4,
+    "orders_per_user": 2,
+    "items_per_order": 2,
+    "end_date": None,
+    "seed": 7,
+    "verbosity": 0,
+}
+
+
+def _production_settings():
+    """Import the production settings afresh, from the current environment"""
+    sys.modules.pop("backend.settings_production", None)
+    return importlib.import_module("backend.settings_production")
+
+
+def _snapshot():
+    """Return the generated data without volatile columns"""
+    return (
+        list(models.Products.objects.order_by("id").values_list("name", "price")),
+        list(
+            models.Orders.objects.order_by("id").values_list(
+                "tracking_number", "order_total", "order_status"
+            )
+        ),
+        list(
+            models.OrderItem.objects.order_by("id").values_list("product", "quantity")
+        ),
+    )
+
+
+@pytest.mark.django_db
+def test_generate_data_creates_consistent_rows():
+    """Test the generator creates the requested rows with matching totals"""
+    call_command("generate_data", **OPTIONS)
+
+    assert models.User.objects.count() == 3
+    assert models.Categories.objects.count() == 6
+    assert models.Products.objects.count() == 12
+    for product in models.Products.objects.prefetch_related("category"):
+        assert {category.user_id for category in product.category.all()} == {
+            product.user_id
+        }
+    user = models.User.objects.first()
+    assert user.check_password("password123")
+    for order in models.Orders.objects.annotate(
+        items_total=Sum("order_items__total_price")
+    ):
+        assert order.order_total == order.items_total
+        assert (
+            order.user_id
+            == models.Products.objects.get(
+                pk=order.order_items.first().product_id
+            ).user_id
+        )
+
+
+@pytest.mark.django_db
+def test_generate_data_is_reproducible():
+    """Test the same seed generates the same data and ids keep increasing"""
+    call_command("generate_data", **OPTIONS)
+    first = _snapshot()
+    models.User.objects.all().delete()
+
+    call_command("generate_data", **OPTIONS)
+    second = _snapshot()
+
+    assert [row[1:] for row in first[1]] == [row[1:] for row in second[1]]
+    assert [row[1] for row in first[0]] == [row[1] for row in second[0]]
+    assert len(first[2]) == len(second[2])
+    models.Categories.objects.create(user=models.User.objects.first(), name="New")
+
+
+def test_parse_importtime():
+    """Test the -X importtime output is parsed with the nesting depth"""
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       367 |        367 |     _json\n"
+        "import time:       686 |       1053 |   json.decoder\n"
+        "import time:       462 |       1515 | json\n"
+    )
+
+    assert parse_importtime(output) == [
+        ImportTime("_json", 367, 367, 2),
+        ImportTime("json.decoder", 686, 1053, 1),
+        ImportTime("json", 462, 1515, 0),
+    ]
+
+
+def test_startup_report(monkeypatch):
+    """Test the report loads the production application in a fresh process"""
+    monkeypatch.setenv("DJANGO_SECRET_KEY", "startup-report")
+    settings_production = _production_settings()
+    out = StringIO()
+
+    call_command("startup_report", "--json", "--top", "3", stdout=out)
+    report = json.loads(out.getvalue())
+
+    assert report["settings"] == "backend.settings_production"
+    assert report["load_seconds"] > 0 and report["import_seconds"] > 0
+    assert "django" in report["packages"] and len(report["slowest"]) == 3
+    assert "django_extensions" not in settings_production.INSTALLED_APPS
+
+
+def test_production_requires_secret_key(monkeypatch):
+    """Test the production settings refuse to fall back to the development key"""
+    monkeypatch.delenv("DJANGO_SECRET_KEY", raising=False)
+
+    with pytest.raises(ImproperlyConfigured):
+        _production_settings()
+
+    monkeypatch.setenv("DJANGO_SECRET_KEY", "from-the-environment")
+    assert _production_settings().SECRET_KEY == "from-the-environment"
@@ -0,0 +1,162 @@
+import threading
+import time
+
+import pytest
+from django.db import close_old_connections, connection
+from django.urls import reverse
+from psycopg2 import extensions
+
+from core.backends.postgresql.pool import (
+    DEFAULT_DB_POOL,
+    ConnectionPool,
+    PoolTimeout,
+    pool_stats,
+)
+
+
+class FakeConnection:
+    """Connection double recording how the pool handles it"""
+
+    def __init__(self) -> None:
+        self.closed = 0
+        self.healthy = True
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def get_transaction_status(self) -> int:
+        return self.status
+
+    def rollback(self) -> None:
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self) -> None:
+        self.closed = 1
+
+    def cursor(self) -> "FakeConnection":
+        return self
+
+    def __enter__(self) -> "FakeConnection":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+    def execute(self, sql: str) -> None:
+        if not self.healthy:
+            raise extensions.QueryCanceledError(sql)
+
+
+def _pool(**config):
+    """Return a pool of fake connections and the list of those it opened"""
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    return ConnectionPool("default", connect, {**DEFAULT_DB_POOL, **config}), opened
+
+
+def test_connections_are_reused():
+    """Test a returned connection is handed out again"""
+    pool, opened = _pool()
+
+    first = pool.checkout()
+    pool.release(first)
+    second = pool.checkout()
+
+    assert second is first
+    assert len(opened) == 1
+    stats = pool.stats()
+    assert stats["checkouts"] == 2 and stats["connects"] == 1
+    assert stats["in_use"] == 1 and stats["idle"] == 0
+
+
+def test_overflow_connections_are_closed_on_return():
+    """Test connections over SIZE are opened when needed, then closed"""
+    pool, opened = _pool(SIZE=1, MAX_OVERFLOW=1)
+
+    first, second = pool.checkout(), pool.checkout()
+    pool.release(second)
+    pool.release(first)
+
+    assert second.closed and not first.closed
+    stats = pool.stats()
+    assert stats["overflow"] == 1 and stats["closed_overflow"] == 1
+    assert stats["open"] == stats["idle"] == 1
+    assert len(opened) == 2
+
+
+def test_exhausted_pool_waits_then_times_out():
+    """Test checkouts wait for a returned connection, up to TIMEOUT"""
+    pool, _ = _pool(SIZE=1, MAX_OVERFLOW=0, TIMEOUT=0.05)
+    held = pool.checkout()
+
+    with pytest.raises(PoolTimeout):
+        pool.checkout()
+    threading.Timer(0.01, pool.release, [held]).start()
+    reused = pool.checkout()
+
+    assert reused is held
+    stats = pool.stats()
+    assert stats["waits"] == 2 and stats["timeouts"] == 1
+    assert stats["wait_seconds"] >= stats["max_wait_seconds"] >= 0.05
+
+
+def test_broken_connections_are_replaced():
+    """Test the health check and the transaction status on return"""
+    pool, opened = _pool()
+    first = pool.checkout()
+    pool.release(first)
+    first.healthy = False
+
+    second = pool.checkout()
+    second.status = extensions.TRANSACTION_STATUS_INERROR
+    pool.release(second)
+    third = pool.checkout()
+    third.status = extensions.TRANSACTION_STATUS_UNKNOWN
+    pool.release(third)
+
+    assert first.closed and second is third and third.closed
+    stats = pool.stats()
+    assert stats["health_check_failures"] == 1 and stats["closed_broken"] == 2
+    assert stats["open"] == 0 and len(opened) == 2
+
+
+def test_old_and_idle_connections_are_closed():
+    """Test MAX_LIFETIME and IDLE_TIMEOUT"""
+    aging, _ = _pool(MAX_LIFETIME=0.01)
+    idling, _ = _pool(IDLE_TIMEOUT=0.01)
+    old, idle = aging.checkout(), idling.checkout()
+    idling.release(idle)
+
+    time.sleep(0.02)
+    aging.release(old)
+    renewed = idling.checkout()
+
+    assert old.closed and idle.closed and renewed is not idle
+    assert aging.stats()["closed_lifetime"] == 1
+    assert idling.stats()["closed_idle"] == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_requests_reuse_pooled_connections(api_client):
+    """Test successive requests share a connection of the default pool
+
+    The test client keeps the connection between requests, so the end of a
+    request is simulated with what the handler's request_finished does.
+    """
+    if connection.vendor != "postgresql":
+        pytest.skip("The pooled backend is PostgreSQL's")
+    client, _ = api_client
+    url = reverse("api:orders-list")
+    client.get(url)
+    close_old_connections()
+
+    before = next(stats for stats in pool_stats() if stats["database"] == "default")
+    for _ in range(3):
+        assert client.get(url).status_code == 200
+        close_old_connections()
+    after = next(stats for stats in pool_stats() if stats["database"] == "default")
+
+    assert after["checkouts"] - before["checkouts"] >= 3
+    assert after["connects"] == before["connects"]
@@ -0,0 +1,144 @@
+import io
+import os
+import re
+import threading
+from concurrent.futures import Future
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from PIL import Image
+
+from api.serializers import ProductsSerializer
+from core import images
+from core.images import build_derivatives
+
+WIDTHS = (200, 400, 800, 1600)
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    """Store media in a temporary directory and build derivatives inline"""
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.PRODUCT_IMAGES = {"WIDTHS": WIDTHS, "ASYNC": False, "WORKERS": 1}
+    return tmp_path
+
+
+def _jpeg(width, height):
+    """Return the bytes of a JPEG image"""
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+def test_build_derivatives(media_root):  # pylint: disable=unused-argument
+    """Test images are resized to every width up to their own"""
+    name = default_storage.save("product/photo.jpg", ContentFile(_jpeg(1000, 500)))
+
+    derivatives = build_derivatives(name, WIDTHS, 80)
+
+    assert derivatives["source"] == name
+    assert [v["width"] for v in derivatives["variants"]] == [200, 400, 800, 1000]
+    for variant in derivatives["variants"]:
+        assert variant["height"] == variant["width"] // 2
+        with default_storage.open(variant["webp"]) as file, Image.open(file) as image:
+            assert image.format == "WEBP"
+            assert image.size == (variant["width"], variant["height"])
+        with default_storage.open(variant["jpeg"]) as file, Image.open(file) as image:
+            assert image.format == "JPEG"
+
+
+@pytest.mark.django_db
+def test_derivatives_built_after_upload(
+    media_root, sample_product, django_capture_on_commit_callbacks
+):  # pylint: disable=unused-argument
+    """Test a new image gets derivatives and the serializer exposes them"""
+    product = sample_product()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product.image.save("photo.jpg", ContentFile(_jpeg(300, 300)))
+    product.refresh_from_db()
+    data = ProductsSerializer(product).data
+
+    assert [size["width"] for size in data["image_variants"]["sizes"]] == [200, 300]
+    assert re.search(
+        r"/300w\.[0-9a-f]{12}\.webp 300w$", data["image_variants"]["srcset"]["webp"]
+    )
+    assert re.search(
+        r"/200w\.[0-9a-f]{12}\.jpg 200w, ", data["image_variants"]["srcset"]["jpeg"]
+    )
+    assert "image_derivatives" not in data
+
+
+@pytest.mark.django_db
+def test_backfill_command(
+    media_root, sample_product
+):  # pylint: disable=unused-argument
+    """Test the command builds missing derivatives and skips current ones"""
+    product = sample_product()
+    # Set the image without the post_save hook, like rows from before it
+    name = default_storage.save("product/old.jpg", ContentFile(_jpeg(500, 250)))
+    type(product).objects.filter(pk=product.pk).update(image=name)
+
+    call_command("build_image_derivatives", workers=1)
+    product.refresh_from_db()
+    call_command("build_image_derivatives", workers=1)
+
+    assert product.image_derivatives["source"] == name
+    assert len(product.image_derivatives["variants"]) == 3
+
+
+class FakeExecutor:
+    """Process pool recording submissions, built by the test"""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, function, *args):
+        """Record a build and return its pending future"""
+        future = Future()
+        self.futures.append((future, function(*args)))
+        return future
+
+
+@pytest.mark.django_db(transaction=True)
+def test_pending_build_not_resubmitted(
+    media_root, sample_product, settings, monkeypatch
+):  # pylint: disable=unused-argument
+    """Test saves during a pending build don't queue it again"""
+    settings.PRODUCT_IMAGES = {**settings.PRODUCT_IMAGES, "ASYNC": True}
+    executor = FakeExecutor()
+    monkeypatch.setattr(images, "_get_executor", lambda: executor)
+    product = sample_product()
+    product.image.save("photo.jpg", ContentFile(_jpeg(300, 300)))
+
+    product.save()
+    product.save()
+    future, derivatives = executor.futures[0]
+    # Completed from another thread, like the pool's management thread
+    thread = threading.Thread(target=future.set_result, args=(derivatives,))
+    thread.start()
+    thread.join()
+    product.refresh_from_db()
+    product.save()
+
+    assert len(executor.futures) == 1
+    assert product.image_derivatives == derivatives
+    assert not images._pending  # pylint: disable=protected-access
+
+
+def test_pool_processes_not_forked_from_server(monkeypatch):
+    """Test the pool starts its processes without forking the threaded worker"""
+    monkeypatch.setattr(images, "_executor", None)
+    monkeypatch.setattr(images, "_executor_pid", None)
+
+    executor = images._get_executor()  # pylint: disable=protected-access
+    try:
+        pid = executor.submit(os.getpid).result(timeout=60)
+        context = executor._mp_context  # pylint: disable=protected-access
+    finally:
+        executor.shutdown()
+
+    assert context.get_start_method() in ("forkserver", "spawn")
+    assert pid != os.getpid()
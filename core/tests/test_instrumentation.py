@@ -0,0 +1,80 @@
+import json
+import logging
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+PRODUCTS_URL = reverse("api:products-list")
+EXPORT_URL = reverse("api:orders-export")
+SAMPLED = {"SAMPLE_RATE": 1.0, "SERVER_TIMING_HEADER": True, "LOG": True}
+
+
+def _server_timing(response):
+    """Return the Server-Timing header as a {metric: (duration, desc)} dict"""
+    metrics = {}
+    for entry in response["Server-Timing"].split(", "):
+        name, *params = entry.split(";")
+        values = dict(param.split("=", 1) for param in params)
+        metrics[name] = (float(values["dur"]), values.get("desc"))
+    return metrics
+
+
+@pytest.mark.django_db
+def test_sampled_request_reports_timings(api_client, sample_product, caplog):
+    """Test a sampled request gets a Server-Timing header and a log line"""
+    client, user = api_client
+    sample_product(user=user)
+
+    with override_settings(REQUEST_TIMING=SAMPLED), caplog.at_level(
+        logging.INFO, logger="core.instrumentation"
+    ):
+        res = client.get(PRODUCTS_URL)
+
+    metrics = _server_timing(res)
+    assert {"db", "serialize", "view", "render", "total"} <= metrics.keys()
+    assert metrics["total"][0] >= metrics["view"][0] >= metrics["serialize"][0]
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["view"] == "api:products-list"
+    assert record["status"] == 200
+    assert metrics["db"][1] == f'"{record["queries"]} queries"'
+    assert record["queries"] > 0
+
+
+@pytest.mark.django_db
+def test_unsampled_request_is_not_instrumented(api_client, caplog):
+    """Test requests outside the sample only log when slow"""
+    client, _ = api_client
+    unsampled = {**SAMPLED, "SAMPLE_RATE": 0.0, "SLOW_REQUEST_MS": 0}
+
+    with override_settings(REQUEST_TIMING=unsampled), caplog.at_level(
+        logging.INFO, logger="core.instrumentation"
+    ):
+        res = client.get(PRODUCTS_URL)
+
+    assert "Server-Timing" not in res
+    record = json.loads(caplog.records[-1].getMessage())
+    assert list(record["timings_ms"]) == ["total"]
+    assert "queries" not in record
+
+
+@pytest.mark.django_db
+def test_streamed_request_logged_once_sent(api_client, sample_order, caplog):
+    """Test a streaming response is logged with the queries of its body"""
+    client, user = api_client
+    sample_order(user)
+
+    with override_settings(REQUEST_TIMING=SAMPLED), caplog.at_level(
+        logging.INFO, logger="core.instrumentation"
+    ):
+        res = client.get(EXPORT_URL)
+        logged_before = len(caplog.records)
+        b"".join(res.streaming_content)
+
+    metrics = _server_timing(res)
+    record = json.loads(caplog.records[-1].getMessage())
+    assert logged_before == 0
+    assert record["view"] == "api:orders-export"
+    assert "db" not in metrics
+    assert record["queries"] > 0
+    assert record["timings_ms"]["total"] >= metrics["total"][0]
@@ -0,0 +1,103 @@
+from urllib.parse import urlsplit
+
+import pytest
+from django.test import Client
+
+from core.media import media_url
+
+HASHED = "product/derivatives/abc/200w.0123456789ab.webp"
+PLAIN = "product/photo.jpg"
+
+
+@pytest.fixture
+def media_files(settings, tmp_path):
+    """Create media files in a temporary MEDIA_ROOT"""
+    media_root = tmp_path / "media"
+    settings.MEDIA_ROOT = str(media_root)
+    settings.MEDIA_DELIVERY = {"MODE": "django"}
+    settings.DEBUG = True
+    for name in (HASHED, PLAIN):
+        path = media_root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"image data")
+    (tmp_path / "secret.txt").write_bytes(b"secret")
+    return media_root
+
+
+def _get(url):
+    """Fetch a media url with the test client"""
+    parts = urlsplit(url)
+    return Client().get(parts.path + (f"?{parts.query}" if parts.query else ""))
+
+
+def test_media_url(settings, rf):
+    """Test media URLs use the configured base or the request host"""
+    settings.MEDIA_DELIVERY = {"BASE_URL": "https://cdn.example.com/media/"}
+    assert media_url(PLAIN) == "https://cdn.example.com/media/product/photo.jpg"
+
+    settings.MEDIA_DELIVERY = {}
+    request = rf.get("/api/products/", HTTP_HOST="shop.example.com")
+    assert (
+        media_url(PLAIN, request) == "http://shop.example.com/media/product/photo.jpg"
+    )
+
+
+def test_serve_with_cache_headers(media_files):  # pylint: disable=unused-argument
+    """Test hashed names are immutable and other files cached briefly"""
+    hashed = _get(media_url(HASHED))
+    plain = _get(media_url(PLAIN))
+
+    assert b"".join(hashed.streaming_content) == b"image data"
+    assert hashed["Content-Type"] == "image/webp"
+    assert hashed["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert plain["Cache-Control"] == "public, max-age=3600"
+    assert _get(media_url("../secret.txt")).status_code == 404
+
+
+@pytest.mark.parametrize(
+    "mode, header, value",
+    [
+        ("x-accel-redirect", "X-Accel-Redirect", "/protected-media/" + HASHED),
+        ("x-sendfile", "X-Sendfile", None),
+    ],
+)
+def test_serve_offloaded_to_proxy(settings, media_files, mode, header, value):
+    """Test the proxy modes only answer with the header naming the file"""
+    settings.MEDIA_DELIVERY = {"MODE": mode}
+
+    res = _get(media_url(HASHED))
+
+    assert res.status_code == 200
+    assert res.content == b""
+    assert res[header] == (value or str(media_files / HASHED))
+    assert res["Cache-Control"].endswith("immutable")
+
+
+def test_signed_urls(settings, media_files):  # pylint: disable=unused-argument
+    """Test signed URLs are required, checked and expire"""
+    settings.MEDIA_DELIVERY = {"SIGNED_URLS": True, "SIGNED_URL_TTL": 60}
+    url = media_url(PLAIN)
+    query = dict(part.split("=") for part in urlsplit(url).query.split("&"))
+
+    res = _get(url)
+    max_age = int(res["Cache-Control"].split("max-age=")[1])
+
+    assert res.status_code == 200
+    assert 60 <= max_age <= 120
+    assert _get(url.split("?")[0]).status_code == 403
+    assert _get(url.replace(PLAIN, HASHED)).status_code == 403
+    expired = url.replace(query["expires"], "1000")
+    assert _get(expired).status_code == 403
+
+
+def test_unsigned_media_not_served_in_production(settings, media_files):
+    """Test media without signed URLs is only served in DEBUG"""
+    # pylint: disable=unused-argument
+    settings.DEBUG = False
+    unsigned = _get(media_url(PLAIN))
+
+    settings.MEDIA_DELIVERY = {"MODE": "django", "SIGNED_URLS": True}
+    signed = _get(media_url(PLAIN))
+
+    assert unsigned.status_code == 404
+    assert signed.status_code == 200
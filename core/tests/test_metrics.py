@@ -0,0 +1,128 @@
+import os
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from core.metrics import MmapValues, Registry, registry
+
+PRODUCTS_URL = reverse("api:products-list")
+METRICS_URL = reverse("metrics")
+
+
+def test_values_survive_remapping(tmp_path):
+    """Test values are kept when the file grows and when it is reopened"""
+    values = MmapValues(tmp_path / "metrics_1.db")
+    for index in range(5000):
+        values.inc(f"key-{index}", index)
+    values.inc("key-3", 0.5)
+
+    reopened = MmapValues(tmp_path / "metrics_1.db")
+
+    assert dict(reopened.items())["key-3"] == 3.5
+    assert len(dict(reopened.items())) == 5000
+
+
+def test_registry_aggregates_worker_processes(tmp_path):
+    """Test the values written by forked workers are summed"""
+    test_registry = Registry()
+    counter = test_registry.counter("jobs", "Jobs", ("kind",))
+    histogram = test_registry.histogram("job_seconds", "Job time", (), buckets=(1, 5))
+
+    with override_settings(METRICS={"DIRECTORY": str(tmp_path)}):
+        counter.inc(kind="a")
+        histogram.observe(0.5)
+        pids = []
+        for _ in range(2):
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover
+                counter.inc(2, kind="a")
+                histogram.observe(3)
+                os._exit(0)  # pylint: disable=protected-access
+            pids.append(pid)
+        for pid in pids:
+            os.waitpid(pid, 0)
+
+        output = test_registry.render()
+
+    assert len(list(tmp_path.iterdir())) == 3
+    assert 'jobs_total{kind="a"} 5.0' in output
+    assert 'job_seconds_bucket{le="1.0"} 1.0' in output
+    assert 'job_seconds_bucket{le="5.0"} 3.0' in output
+    assert 'job_seconds_bucket{le="+Inf"} 3.0' in output
+    assert "job_seconds_sum 6.5" in output
+
+
+@pytest.mark.django_db
+def test_requests_recorded_per_action(api_client, tmp_path):
+    """Test the scrape endpoint reports requests by viewset action"""
+    client, _ = api_client
+
+    with override_settings(METRICS={"DIRECTORY": str(tmp_path), "TOKEN": "t"}):
+        registry.reset()
+        client.get(PRODUCTS_URL)
+        client.get(PRODUCTS_URL)
+        client.get("/not-a-route/")
+        denied = client.get(METRICS_URL)
+        res = client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer t")
+    registry.reset()
+
+    output = res.content.decode()
+    assert denied.status_code == 401
+    assert res.status_code == 200
+    assert (
+        'http_requests_total{route="ProductsViewSet.list",method="GET",status="200"} 2.0'
+        in output
+    )
+    assert (
+        'http_request_duration_seconds_count{route="ProductsViewSet.list",method="GET"} 2.0'
+        in output
+    )
+    assert 'route="unmatched",method="GET",status="404"' in output
+
+
+def test_dead_worker_values_merged(tmp_path):
+    """Test the file of an exited worker is merged, keeping the totals"""
+    test_registry = Registry()
+    counter = test_registry.counter("jobs", "Jobs", ("kind",))
+
+    with override_settings(METRICS={"DIRECTORY": str(tmp_path)}):
+        for pid in (101, 102):
+            MmapValues(tmp_path / f"metrics_{pid}.db").inc(
+                counter.key("jobs_total", {"kind": "a"}), 2
+            )
+        test_registry.mark_process_dead(101)
+        test_registry.mark_process_dead(102)
+        test_registry.mark_process_dead(103)
+        output = test_registry.render()
+
+    assert [path.name for path in tmp_path.iterdir()] == ["metrics_dead.db"]
+    assert 'jobs_total{kind="a"} 4.0' in output
+
+
+@pytest.mark.django_db
+def test_unknown_methods_share_a_label(api_client, tmp_path):
+    """Test arbitrary request methods don't add series"""
+    client, _ = api_client
+
+    with override_settings(METRICS={"DIRECTORY": str(tmp_path)}):
+        registry.reset()
+        client.generic("FOOBAR", PRODUCTS_URL)
+        client.generic("BAZ", PRODUCTS_URL)
+        output = registry.render()
+    registry.reset()
+
+    assert 'method="other",status="405"} 2.0' in output
+    assert "FOOBAR" not in output
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "config,status_code", [({}, 403), ({"ALLOW_ANONYMOUS": True}, 200)]
+)
+def test_scrape_without_token(client, config, status_code):
+    """Test the scrape endpoint is denied without a token unless allowed"""
+    with override_settings(METRICS=config):
+        res = client.get(METRICS_URL)
+
+    assert res.status_code == status_code
@@ -0,0 +1,112 @@
+import os
+import pstats
+import time
+
+import pytest
+from django.test import override_settings
+from django.urls import reverse
+
+from core import profiling
+from core.models import OrderItem
+from core.profiling import RequestProfilingMiddleware
+
+ORDERS_URL = reverse("api:orders-list")
+PRODUCTS_URL = reverse("api:products-list")
+
+
+@pytest.mark.django_db
+def test_profile_requested_by_header(api_client, tmp_path):
+    """Test a request with the profiling token is saved as a pstats file"""
+    client, _ = api_client
+    config = {"HEADER_TOKEN": "secret", "ROUTES": {}, "DIRECTORY": tmp_path}
+
+    with override_settings(REQUEST_PROFILING=config):
+        res = client.get(PRODUCTS_URL, HTTP_X_PROFILE="secret")
+        other = client.get(PRODUCTS_URL, HTTP_X_PROFILE="wrong")
+
+    assert res.status_code == 200
+    assert "-ProductsViewSet.list-" in res["X-Profile-File"]
+    stats = pstats.Stats(str(tmp_path / res["X-Profile-File"]))
+    assert stats.total_calls > 0
+    assert "X-Profile-File" not in other
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+@pytest.mark.django_db
+def test_profile_sampled_by_route(api_client, sample_product, tmp_path):
+    """Test routes are sampled per viewset action as collapsed stacks"""
+    client, user = api_client
+    product = sample_product(user=user)
+    payload = {
+        "payment_mode": "Cash",
+        "order_items": [{"product": product.id, "quantity": 1}],
+    }
+    config = {
+        "ROUTES": {"OrderViewSet.create": 1.0},
+        "DIRECTORY": tmp_path,
+        "FORMAT": "collapsed",
+    }
+
+    with override_settings(REQUEST_PROFILING=config):
+        listed = client.get(ORDERS_URL)
+        created = client.post(ORDERS_URL, payload, format="json")
+        profiling.wait_for_conversions()
+
+    assert "X-Profile-File" not in listed
+    name = created["X-Profile-File"]
+    assert "OrderViewSet.create" in name and name.endswith(".collapsed")
+    lines = (tmp_path / name).read_text().splitlines()
+    assert lines
+    for line in lines:
+        stack, micros = line.rsplit(" ", 1)
+        assert stack and int(micros) > 0
+    assert any("create (views.py" in line for line in lines)
+
+
+def test_evict_oldest_profiles(tmp_path):
+    """Test the oldest profiles are deleted once over the size limit"""
+    for index, name in enumerate(("a.pstats", "b.pstats", "c.pstats")):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 10)
+        os.utime(path, (index, index))
+
+    RequestProfilingMiddleware.evict(tmp_path, 20, keep="c.pstats")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "b.pstats",
+        "c.pstats",
+    ]
+
+
+@pytest.mark.django_db
+def test_collapsed_profile_of_expanded_list(
+    api_client, sample_product, sample_order, tmp_path
+):
+    """Test the stacks of a real view are converted in bounded time"""
+    client, user = api_client
+    product = sample_product(user=user)
+    for _ in range(100):
+        order = sample_order(user)
+        OrderItem.objects.create(
+            order=order,
+            product=product,
+            quantity=1,
+            discount=0,
+            item_price=product.price,
+            total_price=product.price,
+        )
+    config = {"HEADER_TOKEN": "secret", "DIRECTORY": tmp_path, "FORMAT": "collapsed"}
+
+    with override_settings(REQUEST_PROFILING=config):
+        start = time.perf_counter()
+        res = client.get(
+            ORDERS_URL, {"expand": "order_items.product"}, HTTP_X_PROFILE="secret"
+        )
+        profiling.wait_for_conversions()
+        elapsed = time.perf_counter() - start
+
+    assert res.status_code == 200
+    lines = (tmp_path / res["X-Profile-File"]).read_text().splitlines()
+    assert 0 < len(lines) <= profiling.MAX_STACKS
+    assert any(";list (" in line for line in lines)
+    assert elapsed < 30
@@ -0,0 +1,108 @@
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from core.models import SlowQuery
+
+PRODUCTS_URL = reverse("api:products-list")
+EXPORT_URL = reverse("api:orders-export")
+LOG_EVERYTHING = {"THRESHOLD_MS": 0, "CAPACITY": 3, "EXPLAIN": True, "ASYNC": False}
+
+
+@pytest.mark.django_db
+def test_slow_queries_recorded_with_route(api_client, sample_product):
+    """Test slow statements are saved with their action, stack and plan"""
+    client, user = api_client
+    sample_product(user=user)
+
+    with override_settings(SLOW_QUERY_LOG=LOG_EVERYTHING):
+        res = client.get(PRODUCTS_URL)
+
+    assert res.status_code == 200
+    slow_queries = list(SlowQuery.objects.all())
+    assert 0 < len(slow_queries) <= 3
+    for slow_query in slow_queries:
+        assert slow_query.route == "ProductsViewSet.list"
+        assert slow_query.sql.startswith("SELECT")
+        assert slow_query.plan and not slow_query.plan.startswith("EXPLAIN failed")
+        assert "api/" in slow_query.stack
+
+
+@pytest.mark.django_db
+def test_fast_queries_not_recorded(api_client):
+    """Test statements under the threshold are ignored"""
+    client, _ = api_client
+
+    with override_settings(SLOW_QUERY_LOG={**LOG_EVERYTHING, "THRESHOLD_MS": 10**6}):
+        client.get(PRODUCTS_URL)
+
+    assert not SlowQuery.objects.exists()
+
+
+@pytest.mark.django_db
+def test_slow_queries_command(capsys):
+    """Test the command lists and clears the slow query log"""
+    SlowQuery.objects.create(
+        duration_ms=512.5,
+        database="default",
+        route="OrderViewSet.list",
+        sql="SELECT 1",
+        stack="api/views.py:10 in list",
+        plan="Result",
+    )
+
+    call_command("slow_queries", "--plans")
+    output = capsys.readouterr().out
+    call_command("slow_queries", "--clear")
+
+    assert "512.5 ms [default] OrderViewSet.list" in output
+    assert "api/views.py:10 in list" in output
+    assert "| Result" in output
+    assert not SlowQuery.objects.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("store_params", [False, True])
+def test_slow_query_params_redacted(api_client, store_params):
+    """Test parameters are only saved when enabled, without their strings"""
+    client, _ = api_client
+    config = {**LOG_EVERYTHING, "CAPACITY": 100, "STORE_PARAMS": store_params}
+
+    with override_settings(SLOW_QUERY_LOG=config):
+        client.get(PRODUCTS_URL, {"category": "secreto"})
+
+    params = list(SlowQuery.objects.values_list("params", flat=True))
+    assert not any("Secreto" in value for value in params)
+    assert any("<str: 7>" in value for value in params) is store_params
+    if not store_params:
+        assert set(params) == {""}
+
+
+@pytest.mark.django_db
+def test_streamed_queries_recorded_with_route(api_client, sample_order):
+    """Test the statements of a streamed body are logged with their action"""
+    client, user = api_client
+    sample_order(user)
+
+    with override_settings(SLOW_QUERY_LOG={**LOG_EVERYTHING, "CAPACITY": 100}):
+        res = client.get(EXPORT_URL)
+        SlowQuery.objects.all().delete()
+        b"".join(res.streaming_content)
+
+    routes = set(SlowQuery.objects.values_list("route", flat=True))
+    assert routes == {"OrderViewSet.export"}
+
+
+@pytest.mark.django_db
+def test_unread_streamed_body_keeps_no_route(api_client, sample_order):
+    """Test a streamed body never consumed doesn't leave its route set"""
+    client, user = api_client
+    sample_order(user)
+
+    with override_settings(SLOW_QUERY_LOG={**LOG_EVERYTHING, "CAPACITY": 100}):
+        client.get(EXPORT_URL)
+        SlowQuery.objects.all().delete()
+        list(SlowQuery.objects.all())
+
+    assert not SlowQuery.objects.exists()
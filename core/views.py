@@ -0,0 +1,74 @@
+import hmac
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+
+from core.media import (
+    DEFAULT_CONTENT_TYPE,
+    cache_control,
+    check_signature,
+    media_settings,
+)
+from core.metrics import DEFAULT_METRICS, registry
+
+
+@require_GET
+def metrics(request: HttpRequest) -> HttpResponse:
+    """Return the metrics of every worker in the Prometheus text format"""
+    config = {**DEFAULT_METRICS, **getattr(settings, "METRICS", {})}
+    token = config["TOKEN"]
+    if token:
+        authorization = request.META.get("HTTP_AUTHORIZATION", "")
+        if not hmac.compare_digest(authorization, f"Bearer {token}"):
+            return HttpResponse(status=401)
+    elif not config["ALLOW_ANONYMOUS"]:
+        return HttpResponse(status=403)
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@require_GET
+def serve_media(request: HttpRequest, path: str) -> HttpResponse:
+    """Authorize a media request and send the file, or have the proxy send it
+
+    Outside DEBUG only signed URLs are served, unsigned media must be served
+    by the front proxy or a CDN (BASE_URL) instead of being public here.
+    """
+    config = media_settings()
+    expires = None
+    if not config["SIGNED_URLS"] and not settings.DEBUG:
+        raise Http404("Media file not found.")
+    if config["SIGNED_URLS"]:
+        expires = check_signature(
+            path, request.GET.get("expires"), request.GET.get("signature")
+        )
+        if expires is None:
+            return HttpResponse(status=403)
+
+    root = os.path.realpath(settings.MEDIA_ROOT)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if not full_path.startswith(root + os.sep) or not os.path.isfile(full_path):
+        raise Http404("Media file not found.")
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    mode = config["MODE"]
+    if mode == "x-accel-redirect":
+        response = HttpResponse(content_type=content_type or DEFAULT_CONTENT_TYPE)
+        prefix = config["INTERNAL_PREFIX"].rstrip("/")
+        response["X-Accel-Redirect"] = f"{prefix}/{quote(path)}"
+    elif mode == "x-sendfile":
+        response = HttpResponse(content_type=content_type or DEFAULT_CONTENT_TYPE)
+        response["X-Sendfile"] = full_path
+    else:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+        response["Last-Modified"] = http_date(os.stat(full_path).st_mtime)
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Cache-Control"] = cache_control(path, config, expires)
+    return response
@@ -0,0 +1,20 @@
+import pytest
+
+from api.cache import catalog_cache
+from user.authentication import token_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_catalog_cache():
+    """Start every test with an empty catalog cache."""
+    catalog_cache.reset()
+    yield
+    catalog_cache.reset()
+
+
+@pytest.fixture(autouse=True)
+def clear_token_cache():
+    """Start every test with an empty api token cache."""
+    token_cache.clear()
+    yield
+    token_cache.clear()
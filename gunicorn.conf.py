@@ -0,0 +1,108 @@
+"""
+Gunicorn configuration of the production server.
+
+Run ``gunicorn`` from the project directory. Every setting can be overridden
+on the command line, and the sizing through the environment. Each thread
+uses at most one connection per database and the DB_POOL is per process, so
+THREADS should stay within its SIZE + MAX_OVERFLOW (checked at startup), and
+the WORKERS x (SIZE + MAX_OVERFLOW) connections of the server, summed over
+the servers, within Postgres' max_connections.
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backend.settings_production")
+
+# CPUs this process may run on, which respects container CPU sets
+CPUS = len(os.sched_getaffinity(0))
+
+wsgi_app = "backend.wsgi:application"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Load the application in the master before forking: the workers share its
+# memory copy-on-write, and boot (or are recycled) without importing Django
+preload_app = True
+
+# A worker runs Python on one core at a time, its threads overlap the time
+# requests wait on Postgres
+workers = int(os.environ.get("GUNICORN_WORKERS", CPUS + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 4))
+worker_class = "gthread"
+
+# Recycle workers to bound the growth of their memory, not all at once
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = max_requests // 10
+
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+# The heartbeat file of the workers, kept off a possibly slow container disk
+worker_tmp_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+accesslog = "-"
+
+_loading_started = time.perf_counter()
+
+
+def on_starting(server):
+    """Empty the metrics directory of the previous run"""
+    directory = os.environ.get("DJANGO_METRICS_DIR")
+    if directory and Path(directory).is_dir():
+        server.log.info("Emptying the metrics directory %s", directory)
+        shutil.rmtree(directory)
+
+
+def when_ready(server):
+    """Report the cold start and the pool sizing, close the master's connections"""
+    # pylint: disable=import-outside-toplevel
+    from django.db import connections
+
+    from core.backends.postgresql.pool import pool_settings, pools
+
+    server.log.info(
+        "Application loaded in %.3fs", time.perf_counter() - _loading_started
+    )
+    pool_config = pool_settings()
+    per_worker = pool_config["SIZE"] + pool_config["MAX_OVERFLOW"]
+    if server.cfg.threads > per_worker:
+        server.log.warning(
+            "%s threads per worker share at most %s pooled connections "
+            "(DB_POOL SIZE + MAX_OVERFLOW): requests will wait for one",
+            server.cfg.threads,
+            per_worker,
+        )
+    server.log.info(
+        "Up to %s connections per database (%s workers x %s), to keep within "
+        "Postgres' max_connections",
+        server.cfg.workers * per_worker,
+        server.cfg.workers,
+        per_worker,
+    )
+    connections.close_all()
+    for pool in pools():
+        pool.close_idle()
+
+
+def pre_fork(server, worker):
+    """Time the boot of a worker from the fork"""
+    # pylint: disable=unused-argument
+    worker.boot_started = time.perf_counter()
+
+
+def child_exit(server, worker):
+    """Merge the metrics file of an exited worker"""
+    # pylint: disable=import-outside-toplevel,unused-argument
+    from core.metrics import registry
+
+    registry.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    """Report the boot time of a new or recycled worker"""
+    worker.log.info(
+        "Worker %s booted in %.3fs",
+        worker.pid,
+        time.perf_counter() - worker.boot_started,
+    )
@@ -34,5 +34,27 @@ if "--test" in pytest_args:
     else:
         pytest_args.append(os.path.abspath(parts[0]))
 
+# Check if the endpoint benchmarks should run instead of the tests. The size of
+# the seeded dataset is set with the BENCH_USERS, BENCH_PRODUCTS,
+# BENCH_CATEGORIES, BENCH_ORDERS and BENCH_ITEMS environment variables. The
+# committed budgets are PostgreSQL's, they are not checked on other engines.
+if "--benchmark" in pytest_args:
+    pytest_args.remove("--benchmark")
+
+    # Record the results as the new baselines instead of checking the budgets
+    if "--update-baselines" in pytest_args:
+        pytest_args.remove("--update-baselines")
+        os.environ["BENCH_UPDATE_BASELINES"] = "1"
+
+    # Check the latencies too, not only the query counts
+    if "--timing-budgets" in pytest_args:
+        pytest_args.remove("--timing-budgets")
+        os.environ["BENCH_TIMING_BUDGETS"] = "1"
+
+    BENCHMARKS_PATH = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "benchmarks"
+    )
+    pytest_args += ["-o", "python_files=bench_*.py", BENCHMARKS_PATH]
+
 # Run pytest with the provided arguments
 pytest.main(pytest_args)
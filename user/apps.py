@@ -6,3 +6,8 @@ class UserConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "user"
+
+    def ready(self):
+        """Connect the token cache invalidation signals"""
+        # pylint: disable=import-outside-toplevel,unused-import
+        from user import signals  # noqa: F401
@@ -0,0 +1,180 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.async_db import run_in_db_thread
+from core.instrumentation import timed
+
+DEFAULT_TOKEN_AUTH_CACHE = {
+    "MAX_ENTRIES": 10000,
+    "TIMEOUT": 60,
+}
+
+
+class TokenCache:
+    """Bounded TTL/LRU cache of api token key -> (user, token)
+
+    The cache lives in the process: changes handled by a worker invalidate
+    its own entries right away, other workers drop theirs once the timeout
+    expires.
+    """
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, tuple[float, Any, Any]]" = OrderedDict()
+        self._keys_by_user: dict[Any, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def config(self) -> dict[str, int]:
+        """Return the cache configuration from the settings"""
+        return getattr(settings, "TOKEN_AUTH_CACHE", DEFAULT_TOKEN_AUTH_CACHE)
+
+    def get(self, key: str) -> Optional[tuple[Any, Any]]:
+        """Return the cached (user, token) for key, if still fresh"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], entry[2]
+
+    def set(self, key: str, user: Any, token: Any) -> None:
+        """Cache the user and token for key, evicting the oldest entries"""
+        max_entries = self.config["MAX_ENTRIES"]
+        if max_entries <= 0:
+            return
+        expires = time.monotonic() + self.config["TIMEOUT"]
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (expires, user, token)
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > max_entries:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _discard(self, key: str) -> None:
+        """Remove key, the lock must be held"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[1].pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1].pk]
+
+    def invalidate_token(self, key: str) -> None:
+        """Drop the entry for a token key"""
+        with self._lock:
+            self._discard(key)
+
+    def invalidate_user(self, user_id: Any) -> None:
+        """Drop every entry of a user"""
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss/eviction counters and the number of entries"""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "max_entries": self.config["MAX_ENTRIES"],
+        }
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that caches the token -> user lookup"""
+
+    def authenticate(self, request: Any) -> Optional[tuple[Any, Any]]:
+        """Authenticate the request inside the "auth" timing phase"""
+        with timed("auth"):
+            key = self.token_key(request)
+            return None if key is None else self.authenticate_credentials(key)
+
+    async def aauthenticate(self, request: Any) -> Optional[tuple[Any, Any]]:
+        """Authenticate the request of an async view
+
+        Cached tokens are checked on the event loop, only a cache miss takes a
+        database thread.
+        """
+        with timed("auth"):
+            key = self.token_key(request)
+            if key is None:
+                return None
+            credentials = self.cached_credentials(key)
+            if credentials is None:
+                credentials = await run_in_db_thread(self.load_credentials, key)
+            return credentials
+
+    def token_key(self, request: Any) -> Optional[str]:
+        """Return the key of the Authorization header, None without a token"""
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) == 1:
+            msg = _("Invalid token header. No credentials provided.")
+            raise AuthenticationFailed(msg)
+        if len(auth) > 2:
+            msg = _("Invalid token header. Token string should not contain spaces.")
+            raise AuthenticationFailed(msg)
+        try:
+            return auth[1].decode()
+        except UnicodeError as exc:
+            msg = _(
+                "Invalid token header. "
+                "Token string should not contain invalid characters."
+            )
+            raise AuthenticationFailed(msg) from exc
+
+    def authenticate_credentials(self, key: str) -> tuple[Any, Any]:
+        """Return the user and token for key, from the cache when possible"""
+        credentials = self.cached_credentials(key)
+        if credentials is None:
+            credentials = self.load_credentials(key)
+        return credentials
+
+    @staticmethod
+    def cached_credentials(key: str) -> Optional[tuple[Any, Any]]:
+        """Return the cached user and token for key, if any"""
+        cached = token_cache.get(key)
+        if cached is None:
+            return None
+        user, token = cached
+        # Hand out a copy so changes made while handling a request never leak
+        # into the cached instance shared with other requests.
+        return copy.copy(user), token
+
+    def load_credentials(self, key: str) -> tuple[Any, Any]:
+        """Look up the user and token for key in the database and cache them"""
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return copy.copy(user), token
@@ -0,0 +1,24 @@
+from typing import Any
+
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from user.authentication import token_cache
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+def invalidate_token(instance: Token, **kwargs: Any) -> None:
+    """Drop a cached token when it changes or is deleted"""
+    # pylint: disable=unused-argument
+    token_cache.invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def invalidate_user_tokens(instance: Any, **kwargs: Any) -> None:
+    """Drop the cached tokens of a user when it is updated or deleted"""
+    # pylint: disable=unused-argument
+    token_cache.invalidate_user(instance.pk)
@@ -0,0 +1,84 @@
+import pytest
+
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from user.authentication import token_cache
+
+ME_URL = reverse("user:me")
+
+
+def token_client(token):
+    """Return a client sending the api token header"""
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+    return client
+
+
+@pytest.mark.django_db
+def test_token_lookup_cached(sample_user, django_assert_num_queries):
+    """Test that a known token is authenticated without queries"""
+    token = Token.objects.create(user=sample_user())
+    client = token_client(token)
+
+    client.get(ME_URL)
+    with django_assert_num_queries(0):
+        res = client.get(ME_URL)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert token_cache.stats()["hits"] == 1
+
+
+@pytest.mark.django_db
+def test_deleted_token_rejected(sample_user):
+    """Test that deleting a token invalidates the cached entry"""
+    token = Token.objects.create(user=sample_user())
+    client = token_client(token)
+
+    client.get(ME_URL)
+    token.delete()
+    res = client.get(ME_URL)
+
+    assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_deactivated_user_rejected(sample_user):
+    """Test that deactivating a user invalidates its cached tokens"""
+    user = sample_user()
+    client = token_client(Token.objects.create(user=user))
+
+    client.get(ME_URL)
+    user.is_active = False
+    user.save()
+    res = client.get(ME_URL)
+
+    assert res.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_profile_update_refreshes_cache(sample_user):
+    """Test that updating the profile is visible on the next request"""
+    client = token_client(Token.objects.create(user=sample_user()))
+
+    client.patch(ME_URL, {"name": "New Name"})
+    res = client.get(ME_URL)
+
+    assert res.data["name"] == "New Name"
+
+
+@pytest.mark.django_db
+def test_cache_bounded(sample_user, settings):
+    """Test that the least recently used tokens are evicted"""
+    settings.TOKEN_AUTH_CACHE = {"MAX_ENTRIES": 1, "TIMEOUT": 60}
+    first = Token.objects.create(user=sample_user())
+    second = Token.objects.create(user=sample_user(email="two@bodegonasusalud.com"))
+
+    token_client(first).get(ME_URL)
+    token_client(second).get(ME_URL)
+
+    assert token_cache.stats()["entries"] == 1
+    assert token_cache.stats()["evictions"] == 1